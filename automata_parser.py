@@ -1,6 +1,7 @@
 import json
 from dataclasses import dataclass
 from typing import Dict, Set, Tuple, List, Optional
+from .regex_automata import hopcroft_minimize
 
 @dataclass
 class DFA:
@@ -10,6 +11,15 @@ class DFA:
     accepts: Set[str]
     transitions: Dict[Tuple[str, str], str]
 
+    def recognizes(self, word: str) -> bool:
+        """Simula el DFA sobre `word` (un carácter por símbolo); transición ausente = rechazo."""
+        q = self.start
+        for ch in word:
+            q = self.transitions.get((q, ch))
+            if q is None:
+                return False
+        return q in self.accepts
+
 def parse_automaton(text: str):
     """Parsea JSON de autómata. 'type' ∈ {'DFA','NFA','PDA','TM','LBA'}."""
     data = json.loads(text)
@@ -27,6 +37,19 @@ def parse_automaton(text: str):
     # Para otros tipos, devolvemos solo el tipo
     return (a_type, data)
 
+def minimize_automaton(dfa: DFA) -> DFA:
+    """DFA mínimo (Hopcroft) sin estados inalcanzables ni muertos.
+    Cada estado conserva el menor nombre de los estados originales que fusiona."""
+    groups, trans, accepts = hopcroft_minimize(dfa.start, dfa.accepts, dfa.transitions, dfa.alphabet)
+    names = [min(g) for g in groups]
+    return DFA(
+        states=set(names),
+        alphabet=set(dfa.alphabet),
+        start=names[0],
+        accepts={names[i] for i in accepts},
+        transitions={(names[s], a): names[t] for (s, a), t in trans.items()},
+    )
+
 def classify_automaton_type(a_type: str) -> int:
     """Mapea el tipo de autómata a la jerarquía de Chomsky."""
     a_type = a_type.upper()
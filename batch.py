@@ -0,0 +1,91 @@
+import csv, fnmatch, glob, json, os, time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, Optional
+from .grammar_parser import parse_grammar
+from .classifier import classify_grammar
+
+SUMMARY_FIELDS = ["file", "type", "ms", "error"]
+
+def iter_grammar_files(paths: Iterable[str], pattern: str = "*.txt") -> Iterator[str]:
+    """Expande directorios (recursivo, filtrando por pattern), globs y archivos sueltos."""
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, files in os.walk(p):
+                for name in sorted(fnmatch.filter(files, pattern)):
+                    yield os.path.join(root, name)
+        elif glob.has_magic(p):
+            for f in sorted(glob.glob(p, recursive=True)):
+                if os.path.isfile(f):
+                    yield f
+        else:
+            yield p
+
+def classify_file(path: str) -> Dict:
+    """Clasifica un archivo; los errores se reportan en la fila, no se propagan."""
+    t0 = time.perf_counter()
+    row = {"file": path, "type": None, "ms": 0.0, "error": ""}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        t, _ = classify_grammar(parse_grammar(text))
+        row["type"] = t
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return row
+
+def _classify_chunk(paths: List[str]) -> List[Dict]:
+    return [classify_file(p) for p in paths]
+
+def _chunks(it: Iterable[str], size: int) -> Iterator[List[str]]:
+    buf: List[str] = []
+    for x in it:
+        buf.append(x)
+        if len(buf) >= size:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+def classify_batch(paths: Iterable[str], workers: Optional[int] = None, chunksize: int = 64,
+                   pattern: str = "*.txt") -> Iterator[Dict]:
+    """Clasifica muchos archivos en un pool de procesos.
+
+    Los archivos se envían en bloques de `chunksize` para reducir el costo de IPC,
+    y solo hay unos pocos bloques en vuelo a la vez, así que la memoria no crece con
+    el tamaño del corpus. Las filas salen en orden de finalización.
+    """
+    files = iter_grammar_files(paths, pattern)
+    if workers == 1:
+        for path in files:
+            yield classify_file(path)
+        return
+    workers = workers or os.cpu_count() or 1
+    max_inflight = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in _chunks(files, max(1, chunksize)):
+            pending.add(pool.submit(_classify_chunk, chunk))
+            if len(pending) >= max_inflight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield from fut.result()
+        for fut in pending:
+            yield from fut.result()
+
+def write_summary(rows: Iterable[Dict], out_path: str) -> Dict[str, int]:
+    """Escribe el resumen como CSV o JSONL (según extensión) y devuelve conteos por tipo."""
+    counts: Dict[str, int] = {}
+    as_jsonl = out_path.lower().endswith((".jsonl", ".ndjson", ".json"))
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        writer = None if as_jsonl else csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        if writer:
+            writer.writeheader()
+        for row in rows:
+            key = "error" if row["error"] else f"tipo {row['type']}"
+            counts[key] = counts.get(key, 0) + 1
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return counts
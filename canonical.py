@@ -0,0 +1,113 @@
+import hashlib
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+from .grammar_parser import Grammar, CompiledGrammar
+from .utils import EPSILON
+
+def _structural_colors(c: CompiledGrammar) -> Dict[int, int]:
+    """Color de cada no terminal que no depende de su nombre: se parte de sus cuerpos con
+    los no terminales enmascarados y se refina con los colores de los que aparecen en
+    ellos hasta que la partición deja de cambiar."""
+    nts = c.nonterminals | set(c.by_lhs)
+    color = {A: 0 for A in nts}
+    for _ in range(len(nts)):
+        sig = {A: (color[A], tuple(sorted({tuple((1, color[s]) if c.is_nt[s] else (2, c.symbols[s]) for s in body)
+                                            for body in c.by_lhs.get(A, ())})))
+               for A in nts}
+        rank = {x: i for i, x in enumerate(sorted(set(sig.values())))}
+        new = {A: rank[sig[A]] for A in nts}
+        stable = len(rank) == len(set(color.values()))
+        color = new
+        if stable:
+            break
+    return color
+
+def _rename_map(c: CompiledGrammar) -> Dict[int, str]:
+    """Asigna <N0>, <N1>, ... a los no terminales en orden BFS desde el símbolo inicial.
+
+    En cada no terminal las alternativas se recorren ordenadas por una clave que no
+    depende de los nombres originales (terminales tal cual, no terminales ya vistos por
+    su nombre canónico, no vistos por su color estructural). Los no terminales
+    inalcanzables van al final: cada uno sin nombre abre un nuevo recorrido.
+    """
+    names: Dict[int, str] = {}
+    color = _structural_colors(c)
+
+    def assign(sym: int) -> bool:
+        if sym in names:
+            return False
+        names[sym] = f"<N{len(names)}>"
+        return True
+
+    def key(body: Tuple[int, ...]):
+        return tuple((0, names[s]) if s in names else (1, color[s]) if c.is_nt[s] else (2, c.symbols[s])
+                     for s in body)
+
+    # tras el inicial, cada inalcanzable aún sin nombre abre otro BFS: primero los que no
+    # aparecen en ningún cuerpo ajeno, luego por color y por último por nombre
+    used = {s for A, bodies in c.by_lhs.items() for body in bodies for s in body if s != A}
+    roots = [c.start] + sorted(c.nonterminals - {c.start},
+                               key=lambda s: (s in used, color[s], c.symbols[s]))
+    for root in roots:
+        if not assign(root):
+            continue
+        queue = deque([root])
+        while queue:
+            A = queue.popleft()
+            for body in sorted(c.by_lhs.get(A, ()), key=key):
+                for s in body:
+                    if c.is_nt[s] and assign(s):
+                        queue.append(s)
+    return names
+
+def canonical_productions(g: Grammar) -> List[Tuple[str, str]]:
+    """Producciones canónicas: no terminales renombrados, sin duplicados, una línea por LHS
+    con las alternativas ordenadas."""
+    c = g.compiled
+    return _productions(c, _rename_map(c))
+
+def _productions(c: CompiledGrammar, names: Dict[int, str]) -> List[Tuple[str, str]]:
+    def text(syms: Iterable[int]) -> str:
+        return " ".join(names.get(s, c.symbols[s]) for s in syms) or EPSILON
+
+    by_lhs: Dict[str, Set[str]] = {}
+    for rule in c.rules:
+        lhs = text(rule.lhs_syms)
+        for toks in rule.alts:
+            by_lhs.setdefault(lhs, set()).add(text(t for t in toks if t != c.epsilon))
+    order = {n: i for i, n in enumerate(sorted(names.values(), key=lambda n: int(n[2:-1])))}
+    lhss = sorted(by_lhs, key=lambda lhs: (order.get(lhs, len(order)), lhs))
+    return [(lhs, " | ".join(sorted(by_lhs[lhs]))) for lhs in lhss]
+
+def canonicalize(g: Grammar) -> Grammar:
+    return Grammar(start="<N0>", productions=canonical_productions(g))
+
+def _text(prods: List[Tuple[str, str]]) -> str:
+    return "\n".join(f"{lhs} -> {rhs}" for lhs, rhs in prods)
+
+def canonical_text(g: Grammar) -> str:
+    return _text(canonical_productions(g))
+
+def grammar_fingerprint(g: Grammar) -> str:
+    """Hash estable ante renombrar no terminales, reordenar o duplicar producciones."""
+    return hashlib.sha256(canonical_text(g).encode("utf-8")).hexdigest()
+
+def canonical_form(g: Grammar) -> Tuple[Grammar, str, Dict[str, str]]:
+    """(canonicalize(g), grammar_fingerprint(g), nombre canónico -> nombre en g) con un
+    solo renombrado, para quien cachea por huella pero muestra los nombres originales."""
+    c = g.compiled
+    names = _rename_map(c)
+    prods = _productions(c, names)
+    fp = hashlib.sha256(_text(prods).encode("utf-8")).hexdigest()
+    return (Grammar(start="<N0>", productions=prods), fp,
+            {canon: c.symbols[s] for s, canon in names.items()})
+
+def dedup_grammars(grammars: Iterable[Grammar]) -> List[Grammar]:
+    seen: Set[str] = set()
+    out: List[Grammar] = []
+    for g in grammars:
+        fp = grammar_fingerprint(g)
+        if fp not in seen:
+            seen.add(fp)
+            out.append(g)
+    return out
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Caché de resultados direccionada por contenido.
+
+Dos niveles: un LRU acotado en memoria y, opcionalmente, una base SQLite en disco
+con expulsión por antigüedad y por tamaño total. La clave es un hash de la operación,
+el texto normalizado y los parámetros.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+import hashlib, inspect, json, os, pickle, sqlite3, threading, time
+
+_MISS = object()
+
+def normalize_text(text: str) -> str:
+    """Normaliza finales de línea y quita espacios en los bordes y líneas vacías.
+    No toca espacios internos: el parser de extras los usa para medir |α|."""
+    lines = (ln.strip() for ln in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"))
+    return "\n".join(ln for ln in lines if ln)
+
+def cache_key(op: str, *texts: str, **params: Any) -> str:
+    h = hashlib.sha256(op.encode("utf-8"))
+    for t in texts:
+        h.update(b"\x00" + normalize_text(t).encode("utf-8"))
+    h.update(b"\x00" + json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+class LRUCache:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return _MISS
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class SQLiteCache:
+    """Nivel persistente. Expulsa entradas con más de `max_age` segundos y, si el total
+    supera `max_bytes`, las menos usadas recientemente."""
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, max_age: Optional[float] = 7 * 24 * 3600,
+                 evict_every: int = 128):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evict_every = evict_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.max_age is not None and now - row[1] > self.max_age:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return _MISS
+            try:
+                value = pickle.loads(row[0])
+            except Exception:
+                # Entrada de otra versión del código: se trata como fallo
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return _MISS
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now))
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.max_age is not None:
+            self._conn.execute("DELETE FROM entries WHERE created < ?", (now - self.max_age,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            victims, freed = [], 0
+            for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                victims.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._conn.commit()
+
+    def evict(self) -> None:
+        with self._lock:
+            self._evict(time.time())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+class ResultCache:
+    def __init__(self, maxsize: int = 1024, db_path: Optional[str] = None, **disk_opts: Any):
+        self.memory = LRUCache(maxsize)
+        self.disk = SQLiteCache(db_path, **disk_opts) if db_path else None
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.memory.get(key)
+        if value is not _MISS:
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not _MISS:
+                self.memory.set(key, value)
+                return value
+        value = compute()
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        out = {"memory": {"hits": self.memory.hits, "misses": self.memory.misses, "size": len(self.memory)}}
+        if self.disk is not None:
+            out["disk"] = {"hits": self.disk.hits, "misses": self.disk.misses, "size": len(self.disk)}
+        return out
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+# Caché global; la variable de entorno CHOMSKY_CACHE_DB activa el nivel SQLite.
+_cache = ResultCache(db_path=os.environ.get("CHOMSKY_CACHE_DB") or None)
+
+def configure_cache(maxsize: int = 1024, db_path: Optional[str] = None, **disk_opts: Any) -> ResultCache:
+    global _cache
+    _cache = ResultCache(maxsize=maxsize, db_path=db_path, **disk_opts)
+    return _cache
+
+def get_cache() -> ResultCache:
+    return _cache
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return _cache.stats()
+
+def cached(op: str, ntexts: int = 1, normalize: Callable[[str], str] = normalize_text) -> Callable:
+    """Decora f(texto[, texto2], ...) para consultar la caché antes de calcular.
+    Los primeros `ntexts` parámetros pasan por `normalize` (p. ej. una forma canónica);
+    el resto (con sus valores por defecto) forma parte de la clave."""
+    def deco(fn: Callable) -> Callable:
+        sig = inspect.signature(fn)
+        names = list(sig.parameters)[:ntexts]
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            texts = tuple(normalize(params.pop(n)) for n in names)
+            key = cache_key(op, *texts, **params)
+            return _cache.get_or_compute(key, lambda: fn(*args, **kwargs))
+        wrapper.uncached = fn
+        return wrapper
+    return deco
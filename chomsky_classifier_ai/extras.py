@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+from dataclasses import dataclass
 from typing import Dict, List, Set, Tuple, Optional
-import re, os, time, json, io, importlib, sys
+import re, os, time, json, io, importlib, importlib.util, sys, hashlib, string, random
+from collections import deque
+
+try:
+    from .cache import cached
+except ImportError:  # ejecutado suelto (streamlit run ui_streamlit.py)
+    from cache import cached
 
 EPS = "e"
 NONTERM_RE = re.compile(r"^[A-Z]$")
@@ -38,68 +45,160 @@ def parse_grammar(text: str, default_start: str = "S") -> Grammar:
             g.add(left, "" if _is_epsilon(a) else a.replace(" ", ""))
     return g
 
-def _is_regular_right_linear(g: Grammar) -> Tuple[bool, str]:
-    for A, prods in g.rules.items():
-        if not _lhs_is_single_nonterminal(A):
-            return False, f"LHS '{A}' no es un no terminal simple."
-        for p in prods:
-            if p == "":
-                continue
-            if len(p) == 1:
-                if not p.islower():
-                    return False, f"Producción {A}->{p} no es terminal simple."
-                continue
-            if len(p) == 2 and p[0].islower() and p[1].isupper():
-                continue
-            return False, f"Producción {A}->{p} no cumple A->aB | a | ε."
-    return True, "Todas las producciones son A->aB | a | ε."
-
-def _is_context_free(g: Grammar) -> Tuple[bool, str]:
-    for A in g.rules:
-        if not _lhs_is_single_nonterminal(A):
-            return False, f"LHS '{A}' invalida GLC (debe ser no terminal simple)."
-    return True, "Todos los LHS son un solo no terminal (GLC)."
-
-def _is_context_sensitive(g: Grammar) -> Tuple[bool, str]:
+@dataclass(frozen=True)
+class RuleViolation:
+    lhs: str
+    prod: Optional[str]  # "" = ε; None si la violación es del LHS
+    check: str     # "Tipo 3" | "Tipo 2" | "Tipo 1"
+    reason: str
+
+@dataclass(frozen=True)
+class GrammarAnalysis:
+    """Resultado de un único análisis de la gramática; lo comparten
+    clasificación, modo explicativo, UI y reporte PDF."""
+    type_id: int
+    type_name: str
+    explanation: str
+    violations: Tuple[RuleViolation, ...]
+    steps: Tuple[str, ...]
+
+    def as_dict(self) -> Dict:
+        return {"type_id": self.type_id, "type_name": self.type_name, "explanation": self.explanation}
+
+def _first_reason(violations: List[RuleViolation], check: str) -> Optional[str]:
+    return next((v.reason for v in violations if v.check == check), None)
+
+@cached("analyze_grammar")
+def analyze_grammar(rules_text: str) -> GrammarAnalysis:
+    """Recorre las reglas una sola vez y evalúa a la vez las restricciones de los tipos 3, 2 y 1."""
+    g = parse_grammar(rules_text)
+    violations: List[RuleViolation] = []
+    lhs_bad: List[str] = []
     for A, prods in g.rules.items():
+        simple = _lhs_is_single_nonterminal(A)
+        if not simple:
+            lhs_bad.append(A)
+            violations.append(RuleViolation(A, None, "Tipo 3", f"LHS '{A}' no es un no terminal simple."))
+            violations.append(RuleViolation(A, None, "Tipo 2", f"LHS '{A}' invalida GLC (debe ser no terminal simple)."))
         for p in prods:
+            if simple and p != "":
+                if len(p) == 1:
+                    if not p.islower():
+                        violations.append(RuleViolation(A, p, "Tipo 3", f"Producción {A}->{p} no es terminal simple."))
+                elif not (len(p) == 2 and p[0].islower() and p[1].isupper()):
+                    violations.append(RuleViolation(A, p, "Tipo 3", f"Producción {A}->{p} no cumple A->aB | a | ε."))
             if len(A) == 0:
-                return False, f"LHS vacío en {A}->{p}."
-            if p != "" and len(A) > len(p):
-                return False, f"Longitud decrece en {A}->{p}."
-    return True, "No hay contracciones de longitud (|α|≤|β|)."
+                violations.append(RuleViolation(A, p, "Tipo 1", f"LHS vacío en {A}->{p}."))
+            elif p != "" and len(A) > len(p):
+                violations.append(RuleViolation(A, p, "Tipo 1", f"Longitud decrece en {A}->{p}."))
 
-def _classify_dict(rules_text: str) -> Dict:
-    g = parse_grammar(rules_text)
-    ok3, why3 = _is_regular_right_linear(g)
+    why3 = _first_reason(violations, "Tipo 3")
+    why2 = _first_reason(violations, "Tipo 2")
+    why1 = _first_reason(violations, "Tipo 1")
+    ok3, ok2, ok1 = why3 is None, why2 is None, why1 is None
+    why3 = why3 or "Todas las producciones son A->aB | a | ε."
+    why2 = why2 or "Todos los LHS son un solo no terminal (GLC)."
+    why1 = why1 or "No hay contracciones de longitud (|α|≤|β|)."
     if ok3:
-        return {"type_id": 3, "type_name": "Regular (Tipo 3)", "explanation": why3}
-    ok2, why2 = _is_context_free(g)
-    if ok2:
-        return {"type_id": 2, "type_name": "Libre de Contexto (Tipo 2)", "explanation": why2}
-    ok1, why1 = _is_context_sensitive(g)
-    if ok1:
-        return {"type_id": 1, "type_name": "Sensible al Contexto (Tipo 1)", "explanation": why1}
-    return {"type_id": 0, "type_name": "Recursivamente Enumerable (Tipo 0)",
-            "explanation": "No cumple restricciones de tipos 1–3."}
-
-def classify_grammar_text(rules_text: str) -> Tuple[str, str]:
-    res = _classify_dict(rules_text)
-    return res["type_name"], res["explanation"]
+        type_id, type_name, explanation = 3, "Regular (Tipo 3)", why3
+    elif ok2:
+        type_id, type_name, explanation = 2, "Libre de Contexto (Tipo 2)", why2
+    elif ok1:
+        type_id, type_name, explanation = 1, "Sensible al Contexto (Tipo 1)", why1
+    else:
+        type_id, type_name, explanation = 0, "Recursivamente Enumerable (Tipo 0)", "No cumple restricciones de tipos 1–3."
 
-def explain_grammar_steps(rules_text: str) -> List[str]:
-    g = parse_grammar(rules_text)
     steps: List[str] = []
-    lhs_bad = [A for A in g.rules if not _lhs_is_single_nonterminal(A)]
     if lhs_bad:
         steps.append(f"❌ LHS no simples: {', '.join(lhs_bad)} → no puede ser Tipo 2/3.")
     else:
         steps.append("✅ Todos los LHS son no terminales simples (candidato a Tipo 2/3).")
-    ok3, why3 = _is_regular_right_linear(g); steps.append(("✅ " if ok3 else "ℹ️ ") + why3)
-    ok2, why2 = _is_context_free(g);      steps.append(("✅ " if ok2 else "ℹ️ ") + why2)
-    ok1, why1 = _is_context_sensitive(g); steps.append(("✅ " if ok1 else "ℹ️ ") + why1)
-    final = _classify_dict(rules_text)["type_name"]; steps.append(f"➡️ Clasificación final: {final}")
-    return steps
+    steps.append(("✅ " if ok3 else "ℹ️ ") + why3)
+    steps.append(("✅ " if ok2 else "ℹ️ ") + why2)
+    steps.append(("✅ " if ok1 else "ℹ️ ") + why1)
+    steps.append(f"➡️ Clasificación final: {type_name}")
+    return GrammarAnalysis(type_id, type_name, explanation, tuple(violations), tuple(steps))
+
+def _classify_dict(rules_text: str) -> Dict:
+    return analyze_grammar(rules_text).as_dict()
+
+def classify_grammar_text(rules_text: str) -> Tuple[str, str]:
+    res = analyze_grammar(rules_text)
+    return res.type_name, res.explanation
+
+def explain_grammar_steps(rules_text: str) -> List[str]:
+    return list(analyze_grammar(rules_text).steps)
+
+# ---------------- Forma canónica ----------------
+_CANON_NAMES = "S" + "".join(c for c in string.ascii_uppercase if c != "S")
+
+def canonicalize_grammar(g: Grammar) -> Grammar:
+    """Renombra no terminales en orden BFS desde el inicial (S, A, B, ...), quita
+    producciones duplicadas y ordena alternativas. Las alternativas de cada no terminal
+    se visitan ordenadas por una clave que no depende de los nombres originales; los
+    no terminales aún sin nombre se desempatan por su color estructural."""
+    nts = {ch for A, prods in g.rules.items() for ch in A + "".join(prods) if ch in string.ascii_uppercase}
+    nts.add(g.start)
+    # color estructural: cuerpos con los no terminales enmascarados, refinado hasta estabilizarse
+    color = {A: 0 for A in nts}
+    for _ in range(len(nts)):
+        sig = {A: (color[A], tuple(sorted({tuple((1, color[ch]) if ch in nts else (2, ch) for ch in p)
+                                            for p in g.rules.get(A, [])}))) for A in nts}
+        rank = {x: i for i, x in enumerate(sorted(set(sig.values())))}
+        stable = len(rank) == len(set(color.values()))
+        color = {A: rank[sig[A]] for A in nts}
+        if stable: break
+    names: Dict[str, str] = {}
+
+    def assign(A: str) -> bool:
+        if A in names:
+            return False
+        names[A] = _CANON_NAMES[len(names)]
+        return True
+
+    def key(p: str):
+        return tuple((0, names[ch]) if ch in names else (1, color[ch]) if ch in nts else (2, ch) for ch in p)
+
+    # los inalcanzables abren nuevos recorridos: primero los que no usa nadie más
+    used = {ch for A, prods in g.rules.items() for p in prods for ch in p if ch != A}
+    for root in [g.start] + sorted(nts - {g.start}, key=lambda A: (A in used, color[A], A)):
+        if not assign(root): continue
+        queue = deque([root])
+        while queue:
+            A = queue.popleft()
+            for p in sorted(set(g.rules.get(A, [])), key=key):
+                for ch in p:
+                    if ch in nts and assign(ch):
+                        queue.append(ch)
+    table = str.maketrans(names)
+    rules: Dict[str, Set[str]] = {}
+    for A, prods in g.rules.items():
+        rules.setdefault(A.translate(table), set()).update(p.translate(table) for p in prods)
+    order = {n: i for i, n in enumerate(_CANON_NAMES)}
+    out = Grammar(start=names[g.start])
+    for A in sorted(rules, key=lambda A: (order.get(A, len(order)), A)):
+        for p in sorted(rules[A]):
+            out.add(A, p)
+    return out
+
+def canonical_rules_text(rules_text: str) -> str:
+    """Texto canónico de la gramática; si tiene más no terminales que letras, solo se normaliza."""
+    g = parse_grammar(rules_text)
+    try:
+        return _grammar_to_text(canonicalize_grammar(g))
+    except IndexError:
+        return _grammar_to_text(g)
+
+def grammar_fingerprint(rules_text: str) -> str:
+    return hashlib.sha256(canonical_rules_text(rules_text).encode("utf-8")).hexdigest()
+
+def dedup_grammar_texts(texts: List[str]) -> List[str]:
+    seen: Set[str] = set(); out: List[str] = []
+    for t in texts:
+        fp = grammar_fingerprint(t)
+        if fp not in seen:
+            seen.add(fp); out.append(t)
+    return out
 
 # ---------------- Regex → Gramática ----------------
 def _insert_concat_ops(regex: str) -> str:
@@ -132,47 +231,46 @@ class _NFA:
     def __init__(self, start: int, accepts: Set[int], trans: Dict[Tuple[int, Optional[str]], Set[int]]):
         self.start = start; self.accepts = accepts; self.trans = trans
 
-def _nfa_symbol(a: str, sid: int) -> _NFA:
+# Los fragmentos son pares (inicio, aceptación) y todas las aristas se agregan a un
+# único diccionario compartido: ningún operador copia transiciones, la construcción es lineal.
+def _edge(trans: Dict[Tuple[int, Optional[str]], Set[int]], u: int, a: Optional[str], v: int) -> None:
+    trans.setdefault((u, a), set()).add(v)
+
+def _nfa_symbol(trans, a: str, sid: int) -> Tuple[int, int]:
     s, f = sid, sid+1
-    return _NFA(s, {f}, {(s, a): {f}})
+    _edge(trans, s, a, f)
+    return s, f
 
-def _nfa_concat(n1: _NFA, n2: _NFA) -> _NFA:
-    trans = {}
-    for k,v in n1.trans.items(): trans.setdefault(k,set()).update(v)
-    for k,v in n2.trans.items(): trans.setdefault(k,set()).update(v)
-    for a in n1.accepts: trans.setdefault((a, None), set()).add(n2.start)
-    return _NFA(n1.start, n2.accepts, trans)
+def _nfa_concat(trans, n1: Tuple[int, int], n2: Tuple[int, int]) -> Tuple[int, int]:
+    _edge(trans, n1[1], None, n2[0])
+    return n1[0], n2[1]
 
-def _nfa_union(n1: _NFA, n2: _NFA, sid: int) -> _NFA:
+def _nfa_union(trans, n1: Tuple[int, int], n2: Tuple[int, int], sid: int) -> Tuple[int, int]:
     s, f = sid, sid+1
-    trans = {}
-    for k,v in n1.trans.items(): trans.setdefault(k,set()).update(v)
-    for k,v in n2.trans.items(): trans.setdefault(k,set()).update(v)
-    trans.setdefault((s, None), set()).update({n1.start, n2.start})
-    for a in n1.accepts: trans.setdefault((a, None), set()).add(f)
-    for a in n2.accepts: trans.setdefault((a, None), set()).add(f)
-    return _NFA(s, {f}, trans)
+    _edge(trans, s, None, n1[0]); _edge(trans, s, None, n2[0])
+    _edge(trans, n1[1], None, f); _edge(trans, n2[1], None, f)
+    return s, f
 
-def _nfa_star(n: _NFA, sid: int) -> _NFA:
+def _nfa_star(trans, n: Tuple[int, int], sid: int) -> Tuple[int, int]:
     s, f = sid, sid+1
-    trans = {}
-    for k,v in n.trans.items(): trans.setdefault(k,set()).update(v)
-    trans.setdefault((s, None), set()).update({n.start, f})
-    for a in n.accepts: trans.setdefault((a, None), set()).update({n.start, f})
-    return _NFA(s, {f}, trans)
+    _edge(trans, s, None, n[0]); _edge(trans, s, None, f)
+    _edge(trans, n[1], None, n[0]); _edge(trans, n[1], None, f)
+    return s, f
 
 def _build_nfa(regex: str) -> _NFA:
     regex = _insert_concat_ops(regex)
     postfix = _to_postfix(regex)
-    stack: List[_NFA] = []; next_id = 0
+    trans: Dict[Tuple[int, Optional[str]], Set[int]] = {}
+    stack: List[Tuple[int, int]] = []; next_id = 0
     for c in postfix:
-        if c.isalnum(): stack.append(_nfa_symbol(c, next_id)); next_id += 2
-        elif c == ".": b=stack.pop(); a=stack.pop(); stack.append(_nfa_concat(a,b))
-        elif c == "|": b=stack.pop(); a=stack.pop(); stack.append(_nfa_union(a,b,next_id)); next_id += 2
-        elif c == "*": a=stack.pop(); stack.append(_nfa_star(a,next_id)); next_id += 2
+        if c.isalnum(): stack.append(_nfa_symbol(trans, c, next_id)); next_id += 2
+        elif c == ".": b=stack.pop(); a=stack.pop(); stack.append(_nfa_concat(trans, a, b))
+        elif c == "|": b=stack.pop(); a=stack.pop(); stack.append(_nfa_union(trans, a, b, next_id)); next_id += 2
+        elif c == "*": a=stack.pop(); stack.append(_nfa_star(trans, a, next_id)); next_id += 2
         else: raise ValueError(f"Token no soportado en postfix: {c}")
     if len(stack)!=1: raise ValueError("Regex inválida.")
-    return stack[0]
+    s, f = stack[0]
+    return _NFA(s, {f}, trans)
 
 def _epsilon_closure(state: int, trans: Dict[Tuple[int, Optional[str]], Set[int]]) -> Set[int]:
     stack, vis = [state], {state}
@@ -190,6 +288,7 @@ def _grammar_to_text(G) -> str:
         lines.append(f"{A} -> " + " | ".join(alts))
     return "\n".join(lines)
 
+@cached("regex_to_right_linear_grammar")
 def regex_to_right_linear_grammar(regex: str) -> Tuple[bool, str]:
     try:
         nfa = _build_nfa(regex)
@@ -260,6 +359,10 @@ def generate_pdf_report(rules_text: str) -> Tuple[bool, bytes | str]:
         return True, _build_pdf(rules_text)
     except Exception:
         pass
+    try:
+        analysis = analyze_grammar(rules_text)
+    except Exception as e:
+        return False, f"No pude analizar la gramática: {e}"
     try:
         from reportlab.lib.pagesizes import letter
         from reportlab.pdfgen import canvas
@@ -272,39 +375,138 @@ def generate_pdf_report(rules_text: str) -> Tuple[bool, bytes | str]:
         for line in rules_text.splitlines():
             c.drawString(84, y, line); y -= 16
             if y < 72: c.showPage(); y = 760; c.setFont("Helvetica", 12)
+        y -= 8
+        c.setFont("Helvetica-Bold", 12); c.drawString(72, y, f"Clasificación: {analysis.type_name}"); y -= 18
+        c.setFont("Helvetica", 12); c.drawString(72, y, "Pasos:"); y -= 18
+        for s in analysis.steps:
+            c.drawString(84, y, s); y -= 16
+            if y < 72: c.showPage(); y = 760; c.setFont("Helvetica", 12)
         c.showPage(); c.save()
         pdf = buf.getvalue(); buf.close()
         return True, pdf
     except Exception as e:
         return False, f"No pude generar PDF (instala 'reportlab'): {e}"
 
+# ---------------- Adaptador al paquete raíz ----------------
+def _load_root():
+    """
+    Paquete raíz (el directorio padre), donde están los algoritmos:
+    1) el paquete que contiene a este, si se importó como subpaquete
+    2) cargado desde su ruta si extras se ejecuta suelto o como paquete de primer nivel
+    """
+    parent = (__package__ or "").rpartition(".")[0]
+    if parent:
+        return importlib.import_module(parent)
+    name = "_chomsky_root"
+    if name not in sys.modules:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        spec = importlib.util.spec_from_file_location(name, os.path.join(root, "__init__.py"),
+                                                      submodule_search_locations=[root])
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[name] = mod
+        try:
+            spec.loader.exec_module(mod)
+        except BaseException:
+            del sys.modules[name]
+            raise
+    return sys.modules[name]
+
+_root = _load_root()
+_grammar_parser = importlib.import_module(_root.__name__ + ".grammar_parser")
+_equivalence = importlib.import_module(_root.__name__ + ".equivalence")
+_counting = importlib.import_module(_root.__name__ + ".counting")
+_sampling = importlib.import_module(_root.__name__ + ".sampling")
+_rewriting = importlib.import_module(_root.__name__ + ".rewriting")
+
+def _to_root(g: Grammar):
+    """La misma gramática como grammar_parser.Grammar. Cada carácter es un símbolo (las
+    mayúsculas, no terminales) y "" es ε; no se vuelve a tokenizar el texto."""
+    return _grammar_parser.Grammar.from_symbols(
+        g.start, [(tuple(A.replace(" ", "")), [tuple(p) for p in prods]) for A, prods in g.rules.items()])
+
+# ---------------- Reescritura (Tipo 0/1) ----------------
+_REWRITE_STEPS = 20000      # formas sentenciales expandidas como mucho
+_REWRITE_SECONDS = 2.0
+_REWRITE_MEMORY_MB = 64     # tope aproximado de las formas visitadas
+
+def _language_up_to(g: Grammar, max_len: int) -> Tuple[Set[str], bool]:
+    """(cadenas de longitud ≤ max_len, ¿exacto?); solo las de Tipo 0/1 pueden no serlo,
+    porque se buscan derivaciones con los topes de arriba (rewriting.RewriteEngine)."""
+    rg = _to_root(g)
+    if not _rewriting.has_context_rules(rg):
+        return set(_equivalence.strings_by_length(rg, max_len)), True
+    r = _rewriting.RewriteEngine(rg).search(max_len, max_steps=_REWRITE_STEPS, max_seconds=_REWRITE_SECONDS,
+                                             max_memory_mb=_REWRITE_MEMORY_MB)
+    return set(r.strings), r.exact
+
 def _generate_strings(g: Grammar, max_len: int = 5) -> Set[str]:
-    results: Set[str] = set()
-    stack: List[Tuple[str, int]] = [(g.start, 0)]
-    seen = set(stack)
-    while stack:
-        sent, depth = stack.pop()
-        if depth > max_len: continue
-        if not any(ch.isupper() for ch in sent):
-            if len(sent) <= max_len: results.add(sent)
-            continue
-        for i, ch in enumerate(sent):
-            if ch.isupper():
-                A = ch; left, right = sent[:i], sent[i+1:]
-                for p in g.rules.get(A, [""]):
-                    new = left + p + right
-                    key = (new, depth+1)
-                    if len(new) <= max_len and key not in seen:
-                        seen.add(key); stack.append(key)
-                break
-    return results
+    return _language_up_to(g, max_len)[0]
 
+# ---------------- Equivalencia exacta (Tipo 3) ----------------
+@cached("regular_equivalence", ntexts=2, normalize=canonical_rules_text)
+def regular_equivalence(g1_text: str, g2_text: str) -> Optional[Tuple[bool, Optional[str]]]:
+    """Decisión exacta para dos gramáticas de Tipo 3: (¿equivalentes?, contraejemplo más
+    corto). None si alguna no es regular (equivalence.regular_equivalence)."""
+    if analyze_grammar(g1_text).type_id != 3 or analyze_grammar(g2_text).type_id != 3:
+        return None
+    return _equivalence.regular_equivalence(_to_root(parse_grammar(g1_text)), _to_root(parse_grammar(g2_text)))
+
+def _fmt_count(x: int) -> str:
+    """Conteo legible: exacto hasta 15 cifras, si no en notación científica (sin float)."""
+    d = str(x)
+    return d if len(d) <= 15 else f"≈{d[0]}.{d[1:4]}e{len(d) - 1}"
+
+def _overlap_counts(g1_text: str, g2_text: str, n: int) -> Tuple[List[int], List[int], List[int]]:
+    """(|L1|, |L2|, |L1∩L2|) por longitud 0..n para dos gramáticas de Tipo 3, contando
+    caminos en el DFA producto sin generar cadenas (counting.overlap_counts)."""
+    return _counting.overlap_counts(_to_root(parse_grammar(g1_text)), _to_root(parse_grammar(g2_text)), n)
+
+# ---------------- Muestreo uniforme (Tipo 2) ----------------
+_ENUM_MAX_LEN = 10   # hasta aquí se enumera; por encima se estima por muestreo
+_SAMPLES = 200       # muestras por gramática en la estimación
+
+def _estimate_jaccard(g1_text: str, g2_text: str, n: int, samples: int = _SAMPLES,
+                      confidence: float = 0.95, seed: int = 0) -> Tuple[float, float, float]:
+    """(estimación, inferior, superior) de la similitud de Jaccard para longitudes ≤ n,
+    con cadenas uniformes de cada lenguaje (sampling.estimate_jaccard). Semilla fija:
+    reproducible."""
+    e = _sampling.estimate_jaccard(_to_root(parse_grammar(g1_text)), _to_root(parse_grammar(g2_text)), n,
+                                   samples, confidence, rng=random.Random(seed))
+    return e.estimate, e.low, e.high
+
+# El lenguaje no depende de los nombres de no terminales: la clave usa la forma canónica
+@cached("compare_grammars_up_to", ntexts=2, normalize=canonical_rules_text)
 def compare_grammars_up_to(g1_text: str, g2_text: str, n: int = 6) -> Tuple[float, str]:
+    """Similitud de Jaccard entre las cadenas de longitud ≤ n. Si ambas son de
+    Tipo 3 se cuentan por longitud en el DFA producto (n puede ser de miles) y las notas
+    empiezan con la respuesta exacta de equivalencia. Si no, se enumeran las cadenas, o
+    para gramáticas de Tipo 2 con n > _ENUM_MAX_LEN se estima por muestreo uniforme."""
+    exact = regular_equivalence(g1_text, g2_text)
+    if exact is not None:
+        c1, c2, both = _overlap_counts(g1_text, g2_text, n)
+        inter = sum(both); union = sum(c1) + sum(c2) - inter
+        sim = (inter / union) if union else 1.0
+        witness = exact[1] or "ε"
+        head = ("Exacto (Tipo 3): equivalentes." if exact[0] else
+                f"Exacto (Tipo 3): no equivalentes; contraejemplo más corto: {witness!r}.")
+        return sim, f"{head}\n|L1∩L2|={_fmt_count(inter)}, |L1∪L2|={_fmt_count(union)} (longitud ≤ {n})"
+    note = ""
+    if n > _ENUM_MAX_LEN and analyze_grammar(g1_text).type_id >= 2 and analyze_grammar(g2_text).type_id >= 2:
+        try:
+            est, lo, hi = _estimate_jaccard(g1_text, g2_text, n)
+            return est, (f"Estimación por muestreo uniforme ({_SAMPLES} cadenas por gramática, "
+                         f"longitud ≤ {n}): IC 95% [{lo:.3f}, {hi:.3f}]")
+        except ValueError as e:
+            note = f"{e}; se enumera hasta longitud {_ENUM_MAX_LEN}.\n"
+            n = _ENUM_MAX_LEN
     G1, G2 = parse_grammar(g1_text), parse_grammar(g2_text)
-    L1, L2 = _generate_strings(G1, n), _generate_strings(G2, n)
+    (L1, ok1), (L2, ok2) = _language_up_to(G1, n), _language_up_to(G2, n)
+    if not (ok1 and ok2):
+        note += ("Tipo 0/1: búsqueda de derivaciones acotada (pasos, tiempo o longitud de las formas); "
+                 "los conjuntos pueden estar incompletos.\n")
     union = L1 | L2; inter = L1 & L2
     sim = (len(inter) / len(union)) if union else 1.0
-    notes = (f"|L1∩L2|={len(inter)}, |L1∪L2|={len(union)}\n"
+    notes = (f"{note}|L1∩L2|={len(inter)}, |L1∪L2|={len(union)}\n"
              f"L1-L2: {sorted(L1 - L2)[:20]}\n"
              f"L2-L1: {sorted(L2 - L1)[:20]}")
     return sim, notes
@@ -322,6 +524,6 @@ def generate_quiz_question(kind: str = "Aleatoria") -> Dict:
     }
     import random
     bucket = mapping_title.get(kind, None) or random.choice(list(bank.keys()))
-    rules = random.choice(bank[bucket])
+    rules = random.choice(dedup_grammar_texts(bank[bucket]))
     answer_num = {"Regular": "3", "Libre de contexto": "2", "Sensibles al contexto": "1", "Tipo 0": "0"}[bucket]
     return {"grammar": rules, "answer": answer_num, "explain": f"Esta gramática es {bucket} (Tipo {answer_num})."}
@@ -11,6 +11,7 @@ import streamlit as st
 
 # Funciones públicas expuestas por extras.py
 from extras import (
+    analyze_grammar,
     classify_grammar_text,
     explain_grammar_steps,
     regex_to_right_linear_grammar,
@@ -18,6 +19,7 @@ from extras import (
     generate_pdf_report,
     generate_quiz_question,
     compare_grammars_up_to,
+    regular_equivalence,
     generate_grammar_png,  # <- genera PNG y devuelve la ruta
 )
 
@@ -112,6 +114,12 @@ with tab_grammar:
                 st.markdown(f"**Tipo detectado:** <span class='badge'>{kind}</span>", unsafe_allow_html=True)
                 st.markdown("**Justificación**")
                 st.info(reason or "Sin explicación disponible.")
+                violations = analyze_grammar(gtxt).violations
+                if violations:
+                    with st.expander(f"Violaciones por regla ({len(violations)})"):
+                        for v in violations:
+                            prod = v.lhs if v.prod is None else f"{v.lhs} -> {v.prod or 'ε'}"
+                            st.write(f"• [{v.check}] {prod}: {v.reason}")
 
         with c2:
             if st.button("Generar diagrama (PNG)", key="btn_diag_grammar"):
@@ -244,17 +252,34 @@ with tab_quiz:
 # TAB 7 - Comparar
 # =======================================================
 with tab_compare:
-    st.markdown("#### Comparar dos gramáticas (heurístico)")
+    st.markdown("#### Comparar dos gramáticas")
+    st.caption("Si ambas son regulares (Tipo 3) la respuesta es exacta y la similitud se cuenta sin generar "
+               "cadenas. Si son libres de contexto, por encima de longitud 10 se estima con muestreo uniforme "
+               "(n ≤ 40); en otro caso se enumeran las cadenas hasta longitud 12 como máximo (en Tipo 0/1, "
+               "buscando derivaciones con tope de pasos, tiempo y memoria).")
     c1, c2 = st.columns(2)
     with c1:
         g1 = st.text_area("Gramática 1", height=200, value="S -> aS b | ab", key="cmp_g1")
     with c2:
         g2 = st.text_area("Gramática 2", height=200, value="S -> aA; A -> Sb | b", key="cmp_g2")
 
-    n = 6
+    n = st.slider("Longitud máxima n", min_value=1, max_value=2000, value=6, key="cmp_n")
     if st.button("Comparar", key="btn_compare"):
+        exact = regular_equivalence(g1, g2)
+        if exact is None:
+            cfg = analyze_grammar(g1).type_id >= 2 and analyze_grammar(g2).type_id >= 2
+            n = min(n, 40 if cfg else 12)
+        if exact is not None:
+            same, witness = exact
+            if same:
+                st.markdown("**Resultado exacto:** <span class='badge-info'>Equivalentes</span>",
+                            unsafe_allow_html=True)
+            else:
+                st.markdown("**Resultado exacto:** <span class='badge-warn'>No equivalentes</span>",
+                            unsafe_allow_html=True)
+                st.write(f"Contraejemplo más corto: `{witness or 'ε'}`")
         sim, notes = compare_grammars_up_to(g1, g2, n)
-        st.markdown(f"**Similitud aproximada:** <span class='badge-warn'>{int(sim*100)}%</span>",
+        st.markdown(f"**Similitud (Jaccard, longitud ≤ {n}):** <span class='badge-warn'>{int(sim*100)}%</span>",
                     unsafe_allow_html=True)
         if notes:
             with st.expander("Notas"):
@@ -1,60 +1,70 @@
 from typing import List, Tuple
-from .grammar_parser import Grammar, productions_expanded, rhs_tokens, occurs_on_rhs
-from .utils import EPSILON, is_nonterminal
+from .grammar_parser import Grammar, CompiledGrammar
+from .utils import EPSILON
+from .ll1 import ll1_table
 
-def _is_regular_rule(lhs: str, alt: str) -> Tuple[bool, str]:
-    toks = rhs_tokens(alt)
-    if toks == [EPSILON] or alt == "":
+def _is_regular_rule(c: CompiledGrammar, toks: Tuple[int, ...], alt: str) -> Tuple[bool, str]:
+    if toks == (c.epsilon,) or alt == "":
         return True, "Permite ε en gramática regular (si no introduce ambigüedad)."
-    if len(toks) == 1 and not is_nonterminal(toks[0]):
+    if len(toks) == 1 and not c.is_nt[toks[0]]:
         return True, "A -> a"
-    if len(toks) == 2 and (not is_nonterminal(toks[0])) and is_nonterminal(toks[1]):
+    if len(toks) == 2 and (not c.is_nt[toks[0]]) and c.is_nt[toks[1]]:
         return True, "A -> aB"
     return False, f"No es de la forma regular (A -> aB | a). RHS='{alt}'"
 
-def classify_grammar(g: Grammar) -> Tuple[int, List[str]]:
-    """Retorna (tipo, pasos) con tipo en {3,2,1,0}."""
+def _ll1_step(g: Grammar) -> str:
+    # solo la tabla tal cual; las transformaciones quedan para ll1_status / el subcomando ll1
+    if ll1_table(g).is_ll1:
+        return "LL(1): sí (tabla predictiva sin conflictos)."
+    return "LL(1): no (ver ll1 --transform)."
+
+def classify_grammar(g: Grammar, ll1: bool = False) -> Tuple[int, List[str]]:
+    """Retorna (tipo, pasos) con tipo en {3,2,1,0}. Con ll1=True, para los tipos 3 y 2
+    se añade si la gramática es LL(1) (cuesta FIRST/FOLLOW; por eso es opcional)."""
     steps: List[str] = []
-    expanded = productions_expanded(g)
+    c = g.compiled
 
     # Verificación GLC (tipo 2): LHS es exactamente un no terminal
     is_cfg = True
-    for lhs, alts in expanded:
-        lhs_syms = lhs.split()
-        if not (len(lhs_syms) == 1 and is_nonterminal(lhs_syms[0])):
+    for rule in c.rules:
+        if not (len(rule.lhs_syms) == 1 and c.is_nt[rule.lhs_syms[0]]):
             is_cfg = False
-            steps.append(f"Violación CFG: LHS '{lhs}' no es un único no terminal.")
+            steps.append(f"Violación CFG: LHS '{rule.lhs}' no es un único no terminal.")
             break
 
     # Verificación Regular (tipo 3)
     is_regular = is_cfg
     if is_cfg:
-        for lhs, alts in expanded:
-            for alt in alts:
-                ok, why = _is_regular_rule(lhs, alt.strip())
+        for rule in c.rules:
+            for toks, alt in zip(rule.alts, rule.alt_texts):
+                ok, why = _is_regular_rule(c, toks, alt.strip())
                 if not ok:
                     is_regular = False
-                    steps.append(f"Violación Regular: {why} en {lhs} -> {alt}")
+                    steps.append(f"Violación Regular: {why} en {rule.lhs} -> {alt}")
                     break
             if not is_regular:
                 break
         if is_regular:
             steps.append("Todas las producciones cumplen A -> aB | a | ε.")
+            if ll1:
+                steps.append(_ll1_step(g))
             return 3, steps
 
     # Si no es regular pero cumple CFG
     if is_cfg:
         steps.append("Todas las producciones tienen un único no terminal en el LHS (CFG).")
+        if ll1:
+            steps.append(_ll1_step(g))
         return 2, steps
 
     # Verificación CSG (tipo 1): |alpha| ≤ |beta| y restricciones de ε
     is_csg = True
-    s_in_rhs = occurs_on_rhs(g, g.start)
-    for lhs, alts in expanded:
-        for alt in alts:
-            lhs_len = len(lhs.split())
-            rhs_len = len(rhs_tokens(alt))
-            if rhs_len == 1 and alt.strip() == EPSILON:
+    s_in_rhs = c.start in c.rhs_symbols
+    for rule in c.rules:
+        lhs, lhs_len = rule.lhs, len(rule.lhs_syms)
+        for toks, alt in zip(rule.alts, rule.alt_texts):
+            rhs_len = len(toks)
+            if toks == (c.epsilon,) and alt.strip() == EPSILON:
                 if lhs != g.start or s_in_rhs:
                     is_csg = False
                     steps.append(f"Violación CSG: Producción vacía {lhs} -> ε no permitida salvo S->ε y S no en RHS.")
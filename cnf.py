@@ -0,0 +1,184 @@
+from dataclasses import dataclass
+from itertools import product
+from typing import Dict, List, Set, Tuple
+from .grammar_parser import Grammar, CompiledGrammar
+from .utils import EPSILON
+
+Body = Tuple[int, ...]
+
+@dataclass(frozen=True, eq=False)
+class CNFGrammar:
+    """Gramática en Forma Normal de Chomsky: A -> B C | a, y S -> ε solo si ε ∈ L.
+
+    Símbolos como enteros: `symbols[i]` es el nombre, `is_nt[i]` si es no terminal.
+    El símbolo inicial no aparece en ningún lado derecho.
+    """
+    symbols: Tuple[str, ...]
+    is_nt: Tuple[bool, ...]
+    start: int
+    accepts_empty: bool
+    binary: Tuple[Tuple[int, int, int], ...]      # (A, B, C) por cada A -> B C
+    unary: Tuple[Tuple[int, int], ...]            # (A, a) por cada A -> a (a terminal)
+
+    @property
+    def nonterminals(self) -> List[int]:
+        return sorted({self.start} | {r[0] for r in self.binary} | {r[0] for r in self.unary})
+
+    def size(self) -> int:
+        return len(self.binary) + len(self.unary) + int(self.accepts_empty)
+
+    def to_grammar(self) -> Grammar:
+        """Grammar equivalente en texto (para mostrarla, clasificarla o guardarla)."""
+        bodies: Dict[int, List[str]] = {}
+        if self.accepts_empty:
+            bodies.setdefault(self.start, []).append(EPSILON)
+        for A, a in self.unary:
+            bodies.setdefault(A, []).append(self.symbols[a])
+        for A, B, C in self.binary:
+            bodies.setdefault(A, []).append(self.symbols[B] + " " + self.symbols[C])
+        order = [self.start] + sorted(set(bodies) - {self.start}, key=lambda s: self.symbols[s])
+        prods = [(self.symbols[A], " | ".join(bodies[A])) for A in order if A in bodies]
+        return Grammar(start=self.symbols[self.start], productions=prods)
+
+class _Builder:
+    """Producciones A -> {cuerpos} sobre ids enteros, con no terminales nuevos."""
+    def __init__(self, c: CompiledGrammar):
+        self.symbols: List[str] = list(c.symbols)
+        self.is_nt: List[bool] = list(c.is_nt)
+        self.taken = set(self.symbols)
+        self.prods: Dict[int, Set[Body]] = {}
+        for rule in c.rules:
+            if not (len(rule.lhs_syms) == 1 and c.is_nt[rule.lhs_syms[0]]):
+                raise ValueError(f"No es libre de contexto: LHS '{rule.lhs}' no es un único no terminal")
+        for A, bodies in c.by_lhs.items():
+            self.prods.setdefault(A, set()).update(bodies)
+        self.start = c.start
+
+    def fresh(self, base: str) -> int:
+        name, k = f"<{base}>", 1
+        while name in self.taken:
+            k += 1
+            name = f"<{base}{k}>"
+        self.taken.add(name)
+        self.symbols.append(name)
+        self.is_nt.append(True)
+        return len(self.symbols) - 1
+
+    def isolate_start(self) -> None:
+        """START: S0 -> S con S0 nuevo, para que el inicial no aparezca a la derecha."""
+        if any(self.start in body for bodies in self.prods.values() for body in bodies):
+            s0 = self.fresh(self.symbols[self.start].strip("<>") + "0")
+            self.prods[s0] = {(self.start,)}
+            self.start = s0
+
+    def binarize(self) -> None:
+        """TERM + BIN: terminales en cuerpos largos pasan a T_a -> a y los cuerpos de
+        más de dos símbolos se parten en cadenas de no terminales nuevos. Se hace antes
+        de eliminar ε para que esa eliminación no crezca exponencialmente."""
+        term_nt: Dict[int, int] = {}
+        for A in list(self.prods):
+            new: Set[Body] = set()
+            for body in self.prods[A]:
+                if len(body) >= 2:
+                    body = tuple(s if self.is_nt[s] else self._term(s, term_nt) for s in body)
+                while len(body) > 2:
+                    X = self.fresh(self.symbols[A].strip("<>") + "_")
+                    self.prods[X] = {body[-2:]}
+                    body = body[:-2] + (X,)
+                new.add(body)
+            self.prods[A] = new
+
+    def _term(self, a: int, term_nt: Dict[int, int]) -> int:
+        T = term_nt.get(a)
+        if T is None:
+            T = term_nt[a] = self.fresh("T_" + self.symbols[a])
+            self.prods[T] = {(a,)}
+        return T
+
+    def nullable(self) -> Set[int]:
+        null: Set[int] = set()
+        changed = True
+        while changed:
+            changed = False
+            for A, bodies in self.prods.items():
+                if A not in null and any(all(s in null for s in b) for b in bodies):
+                    null.add(A)
+                    changed = True
+        return null
+
+    def remove_epsilon(self) -> bool:
+        """DEL: quita A -> ε agregando las variantes sin símbolos anulables. Devuelve si
+        ε estaba en el lenguaje (queda como S -> ε, permitido por ser S aislado)."""
+        null = self.nullable()
+        for A in list(self.prods):
+            new: Set[Body] = set()
+            for body in self.prods[A]:
+                options = [((s,), ()) if s in null else ((s,),) for s in body]
+                for choice in product(*options):
+                    b = tuple(s for part in choice for s in part)
+                    if b:
+                        new.add(b)
+            self.prods[A] = new
+        return self.start in null
+
+    def remove_units(self) -> None:
+        """UNIT: A -> B se reemplaza por los cuerpos no unitarios de todo B alcanzable
+        por cadenas de producciones unitarias."""
+        unit: Dict[int, Set[int]] = {}
+        for A in self.prods:
+            seen, stack = {A}, [A]
+            while stack:
+                X = stack.pop()
+                for b in self.prods.get(X, ()):
+                    if len(b) == 1 and self.is_nt[b[0]] and b[0] not in seen:
+                        seen.add(b[0])
+                        stack.append(b[0])
+            unit[A] = seen
+        self.prods = {A: {b for B in unit[A] for b in self.prods.get(B, ())
+                          if not (len(b) == 1 and self.is_nt[b[0]])}
+                      for A in self.prods}
+
+    def remove_useless(self) -> None:
+        """Quita no terminales que no generan cadenas terminales y luego los inalcanzables."""
+        gen: Set[int] = set()
+        changed = True
+        while changed:
+            changed = False
+            for A, bodies in self.prods.items():
+                if A not in gen and any(all(s in gen or not self.is_nt[s] for s in b) for b in bodies):
+                    gen.add(A)
+                    changed = True
+        prods = {A: {b for b in bodies if all(s in gen or not self.is_nt[s] for s in b)}
+                 for A, bodies in self.prods.items() if A in gen}
+        reach, stack = {self.start}, [self.start]
+        while stack:
+            for b in prods.get(stack.pop(), ()):
+                for s in b:
+                    if self.is_nt[s] and s not in reach:
+                        reach.add(s)
+                        stack.append(s)
+        self.prods = {A: bodies for A, bodies in prods.items() if A in reach}
+
+def to_cnf(g: Grammar) -> CNFGrammar:
+    """Convierte una gramática libre de contexto a FNC.
+
+    Pasos: START (aislar el inicial), TERM/BIN (terminales y cuerpos largos), DEL
+    (ε), UNIT (A -> B) y eliminación de símbolos inútiles. Lanza ValueError si la
+    gramática no es de tipo 2.
+    """
+    b = _Builder(g.compiled)
+    b.isolate_start()
+    b.binarize()
+    empty = b.remove_epsilon()
+    b.remove_units()
+    b.remove_useless()
+    binary: List[Tuple[int, int, int]] = []
+    unary: List[Tuple[int, int]] = []
+    for A in sorted(b.prods):
+        for body in sorted(b.prods[A]):
+            if len(body) == 2:
+                binary.append((A, body[0], body[1]))
+            else:
+                unary.append((A, body[0]))
+    return CNFGrammar(symbols=tuple(b.symbols), is_nt=tuple(b.is_nt), start=b.start,
+                      accepts_empty=empty, binary=tuple(binary), unary=tuple(unary))
@@ -0,0 +1,98 @@
+from fractions import Fraction
+from typing import Dict, List, Sequence, Tuple
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from .grammar_parser import Grammar
+from .equivalence import nfa_from_regular_grammar
+from .regex_automata import BitNFA
+
+_INT64_SAFE = 2 ** 62
+
+def _product(nfas: Sequence[BitNFA]) -> Tuple[List[Tuple[int, int, int]], List[Tuple[bool, ...]]]:
+    """DFA producto alcanzable de los AFN (subconjuntos como máscaras), sin el estado
+    donde todos están muertos: no aporta cadenas. Devuelve aristas (p, q, cuántos
+    símbolos van de p a q) y, por estado, la aceptación de cada componente."""
+    alphabet = sorted(set().union(*(bn.alphabet for bn in nfas)))
+    start = tuple(bn.start_mask for bn in nfas)
+    index: Dict[Tuple[int, ...], int] = {start: 0}
+    order = [start]
+    mult: Dict[Tuple[int, int], int] = {}
+    i = 0
+    while i < len(order):
+        cur = order[i]
+        for a in alphabet:
+            nxt = tuple(bn.move(m, a) for bn, m in zip(nfas, cur))
+            if not any(nxt):
+                continue
+            j = index.get(nxt)
+            if j is None:
+                j = index[nxt] = len(order)
+                order.append(nxt)
+            mult[(i, j)] = mult.get((i, j), 0) + 1
+        i += 1
+    accepting = [tuple(bool(m & bn.accept_mask) for bn, m in zip(nfas, q)) for q in order]
+    return [(p, q, k) for (p, q), k in mult.items()], accepting
+
+def _counts(n_states: int, edges: List[Tuple[int, int, int]], accept: List[List[bool]],
+            max_len: int, branching: int) -> List[List[int]]:
+    """counts[f][k] = caminos de longitud k desde el estado 0 que terminan en un estado
+    aceptado por el filtro f. Con NumPy cada paso v_{k+1}[q] = Σ v_k[p]·M[p, q] es un
+    np.add.at sobre las aristas (la matriz de transferencia es dispersa): en int64
+    mientras no pueda desbordar (a lo sumo branching^k caminos) y con enteros de
+    Python (dtype=object) después. Sin NumPy, el mismo paso en Python."""
+    out: List[List[int]] = [[] for _ in accept]
+    if np is not None:
+        src = np.array([p for p, _, _ in edges], dtype=np.intp)
+        dst = np.array([q for _, q, _ in edges], dtype=np.intp)
+        w = np.array([m for _, _, m in edges], dtype=np.int64)
+        A = np.array(accept, dtype=np.int64).reshape(len(accept), n_states).T  # estados × filtros
+        v = np.zeros(n_states, dtype=np.int64)
+        v[0] = 1
+        bound = 1
+        for k in range(max_len + 1):
+            for f, c in enumerate(v.dot(A)):
+                out[f].append(int(c))
+            bound *= max(branching, 1)
+            if v.dtype != object and bound >= _INT64_SAFE:
+                w, A, v = w.astype(object), A.astype(object), v.astype(object)
+            nv = np.zeros(n_states, dtype=v.dtype)
+            np.add.at(nv, dst, v[src] * w)
+            v = nv
+        return out
+    v = [0] * n_states
+    v[0] = 1
+    for k in range(max_len + 1):
+        for f, acc in enumerate(accept):
+            out[f].append(sum(x for x, ok in zip(v, acc) if ok))
+        nv = [0] * n_states
+        for p, q, m in edges:
+            if v[p]:
+                nv[q] += v[p] * m
+        v = nv
+    return out
+
+def count_by_length(g: Grammar, max_len: int) -> List[int]:
+    """Número exacto de cadenas de L(g) de cada longitud 0..max_len (g de tipo 3),
+    sin generarlas."""
+    bn = BitNFA(nfa_from_regular_grammar(g))
+    edges, accepting = _product([bn])
+    return _counts(len(accepting), edges, [[a[0] for a in accepting]], max_len, len(bn.alphabet))[0]
+
+def overlap_counts(g1: Grammar, g2: Grammar, max_len: int) -> Tuple[List[int], List[int], List[int]]:
+    """(|L1|, |L2|, |L1∩L2|) por longitud 0..max_len, sobre el DFA producto."""
+    nfas = [BitNFA(nfa_from_regular_grammar(g1)), BitNFA(nfa_from_regular_grammar(g2))]
+    edges, accepting = _product(nfas)
+    filters = [[a[0] for a in accepting], [a[1] for a in accepting], [a[0] and a[1] for a in accepting]]
+    branching = len(set(nfas[0].alphabet) | set(nfas[1].alphabet))
+    c1, c2, both = _counts(len(accepting), edges, filters, max_len, branching)
+    return c1, c2, both
+
+def exact_jaccard(g1: Grammar, g2: Grammar, max_len: int) -> Fraction:
+    """|L1∩L2| / |L1∪L2| sobre las cadenas de longitud ≤ max_len (1 si ambas son vacías)."""
+    c1, c2, both = overlap_counts(g1, g2, max_len)
+    inter = sum(both)
+    union = sum(c1) + sum(c2) - inter
+    return Fraction(inter, union) if union else Fraction(1)
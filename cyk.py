@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, List, Optional
+from .grammar_parser import Grammar
+from .cnf import CNFGrammar, to_cnf
+
+class CYKRecognizer:
+    """Reconocedor CYK sobre la FNC de una gramática, con celdas como bitsets.
+
+    Cada celda de la tabla es un int cuyos bits son los no terminales que generan el
+    tramo. Para combinar dos celdas solo se recorren los B presentes a la izquierda y,
+    de cada uno, los C presentes a la derecha que tienen alguna regla A -> B C: el OR
+    de las máscaras de A precalculadas da la celda. La FNC se calcula una vez y se
+    reutiliza en todas las cadenas.
+    """
+    def __init__(self, grammar: Grammar = None, cnf: Optional[CNFGrammar] = None):
+        if cnf is None:
+            if grammar is None:
+                raise ValueError("Se necesita una gramática o su FNC")
+            cnf = to_cnf(grammar)
+        self.cnf = cnf
+        nts = cnf.nonterminals
+        bit = {A: i for i, A in enumerate(nts)}
+        self.start_mask = 1 << bit[cnf.start]
+        # terminal -> máscara de los A con A -> a
+        self.leaf: Dict[str, int] = {}
+        for A, a in cnf.unary:
+            name = cnf.symbols[a]
+            self.leaf[name] = self.leaf.get(name, 0) | (1 << bit[A])
+        # right_of[B] = máscara de los C con alguna A -> B C; pair[B][C] = máscara de esos A
+        self.right_of: List[int] = [0] * len(nts)
+        self.pair: List[Dict[int, int]] = [dict() for _ in nts]
+        for A, B, C in cnf.binary:
+            b, c = bit[B], bit[C]
+            self.right_of[b] |= 1 << c
+            self.pair[b][c] = self.pair[b].get(c, 0) | (1 << bit[A])
+
+    def _combine(self, left: int, right: int) -> int:
+        out = 0
+        right_of, pair = self.right_of, self.pair
+        while left:
+            low = left & -left
+            b = low.bit_length() - 1
+            left ^= low
+            m = right & right_of[b]
+            if m:
+                row = pair[b]
+                while m:
+                    lc = m & -m
+                    out |= row[lc.bit_length() - 1]
+                    m ^= lc
+        return out
+
+    def table(self, word: str) -> Optional[List[List[int]]]:
+        """Tabla CYK: table[l][i] = no terminales que generan word[i:i+l+1]
+        (None si algún carácter no es terminal de la gramática)."""
+        n = len(word)
+        leaf = self.leaf
+        row0 = []
+        for ch in word:
+            m = leaf.get(ch, 0)
+            if not m:
+                return None
+            row0.append(m)
+        T = [row0]
+        combine = self._combine
+        for l in range(1, n):
+            row = []
+            for i in range(n - l):
+                cell = 0
+                for k in range(l):
+                    left = T[k][i]
+                    if left:
+                        right = T[l - k - 1][i + k + 1]
+                        if right:
+                            cell |= combine(left, right)
+                row.append(cell)
+            T.append(row)
+        return T
+
+    def accepts(self, word: str) -> bool:
+        if word == "":
+            return self.cnf.accepts_empty
+        T = self.table(word)
+        return T is not None and bool(T[-1][0] & self.start_mask)
+
+    def accepts_batch(self, words: Iterable[str]) -> List[bool]:
+        """Pertenencia de muchas cadenas con la misma FNC; las repetidas dentro del lote se
+        memorizan (solo durante la llamada, para no crecer sin límite en trabajos largos)."""
+        memo: Dict[str, bool] = {}
+        out: List[bool] = []
+        for w in words:
+            r = memo.get(w)
+            if r is None:
+                r = memo[w] = self.accepts(w)
+            out.append(r)
+        return out
+
+def cyk_accepts(g: Grammar, word: str) -> bool:
+    return CYKRecognizer(g).accepts(word)
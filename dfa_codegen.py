@@ -0,0 +1,153 @@
+import hashlib, json, os, threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from . import regex_automata
+from . import automata_parser
+from .utils import write_atomic
+
+_VERSION = 1  # cambiarlo invalida los matchers guardados en disco
+
+AnyDFA = Union[regex_automata.DFA, automata_parser.DFA]
+
+def default_cache_dir() -> str:
+    return os.environ.get("CHOMSKY_CODEGEN_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "chomsky-ai", "dfa")
+
+def _normalize(dfa: AnyDFA) -> Tuple[list, set, Dict[Tuple[int, str], int], List[str]]:
+    """Estados numerados desde 0 (el inicial primero), aceptación y transiciones por índice."""
+    if isinstance(dfa, automata_parser.DFA):
+        start, accepts, trans, alphabet = dfa.start, dfa.accepts, dfa.transitions, dfa.alphabet
+        states = set(dfa.states)
+    else:
+        start, accepts, trans, alphabet = dfa.start, dfa.accepts, dfa.trans, dfa.alphabet
+        states = set()
+    states |= {start} | set(accepts)
+    for (s, _), t in trans.items():
+        states.update((s, t))
+    bad = [a for a in alphabet if len(a) != 1]
+    if bad:
+        raise ValueError(f"Solo se admiten símbolos de un carácter: {sorted(bad)}")
+    order = [start] + sorted(states - {start}, key=str)
+    index = {q: i for i, q in enumerate(order)}
+    itrans = {(index[s], a): index[t] for (s, a), t in trans.items()}
+    return order, {index[q] for q in accepts}, itrans, sorted(alphabet)
+
+def generate_source(dfa: AnyDFA) -> str:
+    """Código Python de `match(word) -> bool` y `match_many(words)` para el DFA.
+
+    Los símbolos con la misma columna en todos los estados forman una clase; un
+    `str.translate` pasa la palabra entera a números de clase (0 = fuera del
+    alfabeto) y el bucle solo indexa una tabla plana: T[q + c], con q ya
+    multiplicado por el número de clases. Hay un estado muerto absorbente al final.
+    """
+    order, accepts, trans, alphabet = _normalize(dfa)
+    n = len(order)
+    dead = n
+    cols: Dict[Tuple[int, ...], int] = {}
+    cls: Dict[int, int] = {}
+    for a in alphabet:
+        col = tuple(trans.get((q, a), dead) for q in range(n))
+        cls[ord(a)] = cols.setdefault(col, len(cols) + 1)
+    k = len(cols) + 1
+    table = [dead * k] * ((n + 1) * k)
+    for col, c in cols.items():
+        for q, t in enumerate(col):
+            table[q * k + c] = t * k
+    acc = sorted(q * k for q in accepts)
+    if table and max(table) < 256:
+        table_src = repr(bytes(table))
+    else:
+        table_src = "(" + ", ".join(map(str, table)) + ",)"
+    if k <= 256:
+        loop = 'for c in word.translate(_CLASSES).encode("latin-1"):'
+    else:
+        loop = 'for c in map(ord, word.translate(_CLASSES)):'
+    return f'''# Generado por dfa_codegen (v{_VERSION}); no editar.
+# {n} estados, {len(alphabet)} símbolos en {k - 1} clases.
+
+class _Classes(dict):
+    def __missing__(self, key):
+        return 0
+
+_CLASSES = _Classes({cls!r})
+_T = {table_src}
+_ACCEPT = frozenset({acc!r})
+
+def match(word):
+    T = _T
+    q = 0
+    {loop}
+        q = T[q + c]
+    return q in _ACCEPT
+
+def match_many(words):
+    return [match(w) for w in words]
+'''
+
+def load_source(source: str, filename: str = "<dfa_codegen>") -> Dict[str, Callable]:
+    """Compila el código generado y devuelve su espacio de nombres."""
+    ns: Dict[str, object] = {"__name__": "dfa_codegen_generated"}
+    exec(compile(source, filename, "exec"), ns)
+    return ns
+
+def dfa_key(dfa: AnyDFA) -> str:
+    order, accepts, trans, _ = _normalize(dfa)
+    payload = json.dumps([_VERSION, len(order), sorted(accepts), sorted([s, a, t] for (s, a), t in trans.items())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def regex_key(pattern: str) -> str:
+    return hashlib.sha256(f"{_VERSION}\0regex\0{pattern}".encode("utf-8")).hexdigest()
+
+_MAXLOADED = 512  # matchers en memoria (LRU), como regex_automata.compile
+_loaded: "OrderedDict[str, Dict[str, Callable]]" = OrderedDict()
+_loaded_lock = threading.Lock()
+
+def _cached(key: str, build: Callable[[], str], cache_dir: Optional[str]) -> Dict[str, Callable]:
+    """Matcher por clave: memoria, luego `<cache_dir>/<clave>.py`, luego build()."""
+    with _loaded_lock:
+        ns = _loaded.get(key)
+        if ns is not None:
+            _loaded.move_to_end(key)
+            return ns
+    path = None
+    source = None
+    if cache_dir != "":
+        cache_dir = cache_dir or default_cache_dir()
+        path = os.path.join(cache_dir, key + ".py")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+        except OSError:
+            source = None
+    if source is None:
+        source = build()
+        if path is not None:
+            write_atomic(path, source)
+        ns = load_source(source, path or f"<dfa {key[:12]}>")
+    else:
+        try:
+            ns = load_source(source, path)
+        except Exception:
+            # archivo dañado o de otra versión: se regenera
+            source = build()
+            ns = load_source(source, path)
+            write_atomic(path, source)
+    with _loaded_lock:
+        _loaded[key] = ns
+        _loaded.move_to_end(key)
+        while len(_loaded) > _MAXLOADED:
+            _loaded.popitem(last=False)
+    return ns
+
+def compile_dfa(dfa: AnyDFA, cache_dir: Optional[str] = None) -> Callable[[str], bool]:
+    """`match(word)` generado para un DFA (de regex o de JSON). cache_dir="" desactiva el disco."""
+    return _cached(dfa_key(dfa), lambda: generate_source(dfa), cache_dir)["match"]
+
+def compile_regex(pattern: str, cache_dir: Optional[str] = None) -> Callable[[str], bool]:
+    """Como compile_dfa para una regex, con clave = hash del patrón: si ya está en disco
+    ni siquiera se construye el DFA."""
+    return _cached(regex_key(pattern), lambda: generate_source(regex_automata.compile(pattern).dfa),
+                   cache_dir)["match"]
+
+def clear_loaded() -> None:
+    with _loaded_lock:
+        _loaded.clear()
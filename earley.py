@@ -0,0 +1,391 @@
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from .grammar_parser import Grammar
+
+Item = Tuple[int, int, int]  # (regla, punto, origen)
+
+class _Chart:
+    """Conjuntos de Earley de una palabra, con enlaces para armar el bosque.
+
+    links[i][ítem] = familias del ítem: (ítem previo | None, hijo). Un enlace
+    ('leo', j, A) marca un ítem superior agregado por la optimización de Leo: la
+    compleción de A sobre [j, i] sube por una cadena determinista de ítems que no se
+    guardan; los ítems virtuales (vlinks, vcompleted) se reconstruyen solo si el
+    bosque los necesita.
+    """
+    def __init__(self, parser: "EarleyParser", n: int):
+        self.p = parser
+        self.n = n
+        self.links: List[Dict[Item, Set]] = [dict() for _ in range(n + 1)]
+        self.completed: List[Dict[Tuple[int, int], List[Item]]] = [dict() for _ in range(n + 1)]
+        self.waiting: List[Dict[int, List[Item]]] = [dict() for _ in range(n + 1)]
+        self.leo: List[Dict[int, Optional[Item]]] = [dict() for _ in range(n + 1)]
+        self.vlinks: List[Dict[Item, Set]] = [dict() for _ in range(n + 1)]
+        self.vcompleted: List[Dict[Tuple[int, int], List[Item]]] = [dict() for _ in range(n + 1)]
+        self.error: Optional[int] = None
+        self._expanded: Set[Tuple[int, Item]] = set()
+
+    def _step(self, j: int, X: int) -> Optional[Item]:
+        """Único ítem del conjunto j que espera X como último símbolo (o None)."""
+        ws = self.waiting[j].get(X, ())
+        if len(ws) != 1:
+            return None
+        r, d, _ = ws[0]
+        return ws[0] if d + 1 == len(self.p.rules[r][1]) else None
+
+    def leo_top(self, j: int, X: int) -> Optional[Item]:
+        """Ítem completo más alto de la cadena determinista que dispara completar X
+        con origen j (memorizado por conjunto; iterativo, sin recursión)."""
+        memo = self.leo[j]
+        if X in memo:
+            return memo[X]
+        chain: List[Tuple[int, int, Item]] = []
+        top: Optional[Item] = None
+        jj, Y = j, X
+        while True:
+            if Y in self.leo[jj]:
+                top = self.leo[jj][Y]
+                break
+            p = self._step(jj, Y)
+            if p is None:
+                self.leo[jj][Y] = None
+                break
+            chain.append((jj, Y, p))
+            jj, Y = p[2], self.p.rules[p[0]][0]
+        for jj, Y, (r, d, o) in reversed(chain):
+            if top is None:
+                top = (r, d + 1, o)
+            self.leo[jj][Y] = top
+        return memo[X]
+
+    def _expand_top(self, i: int, top: Item) -> None:
+        """Reconstruye los ítems de las cadenas de Leo que terminan en `top`: cada paso
+        es un ítem completo con su enlace. Dos cadenas que comparten un nodo comparten
+        todo lo que está por encima, así que los nodos virtuales de un ítem superior
+        solo se alcanzan desde él y basta expandirlo cuando el bosque llega a él."""
+        self._expanded.add((i, top))
+        rules = self.p.rules
+        vlinks, vdone = self.vlinks[i], self.vcompleted[i]
+        for l in self.links[i][top]:
+            if l is None or l[0] != 'leo':
+                continue
+            _, jj, Y = l
+            while True:
+                r, d, o = p = self._step(jj, Y)
+                adv = (r, d + 1, o)
+                vlinks.setdefault(adv, set()).add((('i', jj, p) if d else None, ('s', Y, jj, i)))
+                if adv == top:
+                    break
+                bucket = vdone.setdefault((rules[r][0], o), [])
+                if adv not in bucket:
+                    bucket.append(adv)
+                jj, Y = o, rules[r][0]
+
+    def item_links(self, i: int, item: Item) -> Set:
+        real = self.links[i].get(item)
+        if real is None:
+            return self.vlinks[i].get(item, set())
+        if (i, item) not in self._expanded and any(l is not None and l[0] == 'leo' for l in real):
+            self._expand_top(i, item)
+        out = {l for l in real if l is None or l[0] != 'leo'}
+        return out | self.vlinks[i].get(item, set())
+
+    def completed_items(self, i: int, A: int, k: int) -> List[Item]:
+        return self.completed[i].get((A, k), []) + self.vcompleted[i].get((A, k), [])
+
+    def accepted(self) -> bool:
+        if self.error is not None:
+            return False
+        key = (self.p.start, 0)
+        if self.completed[self.n].get(key):
+            return True
+        # S sobre [0, n] puede ser un paso intermedio de una cadena de Leo
+        for top, ls in self.links[self.n].items():
+            if (self.n, top) not in self._expanded and any(l is not None and l[0] == 'leo' for l in ls):
+                self._expand_top(self.n, top)
+        return bool(self.vcompleted[self.n].get(key))
+
+class ParseForest:
+    """Bosque de análisis compartido y empaquetado (SPPF) armado sobre el chart.
+
+    Nodos de símbolo ('s', A, k, i): A deriva palabra[k:i]; sus familias (nodos
+    empaquetados) son los ítems completos de A con origen k en el conjunto i. Nodos
+    intermedios ('i', i, ítem): el prefijo del cuerpo antes del punto; cada enlace
+    (ítem previo, hijo) es una familia. Así el bosque tiene tamaño polinomial aunque
+    la cantidad de árboles sea exponencial (o infinita si hay ciclos).
+    """
+    def __init__(self, parser: "EarleyParser", word: Sequence[str], chart: _Chart, root):
+        self._p = parser
+        self.word = word
+        self._chart = chart
+        self.root = root
+        self._counts: Optional[Dict] = None
+        self._choice: Dict = {}
+        self._cyclic = False
+
+    def _links(self, i: int, item: Item) -> Set:
+        return self._chart.item_links(i, item)
+
+    def _alternatives(self, node) -> List[List]:
+        if node[0] == 's':
+            _, A, k, i = node
+            return [[('i', i, it)] for it in self._chart.completed_items(i, A, k)]
+        _, i, item = node
+        if item[1] == 0:
+            return [[]]
+        return [[d for d in link if d is not None and d[0] != 't'] for link in self._links(i, item)]
+
+    def _evaluate(self) -> None:
+        """Cuenta árboles en post-orden (iterativo) y elige para cada nodo una familia
+        que lleve a un árbol finito, para poder extraer uno sin recursión."""
+        if self._counts is not None:
+            return
+        state: Dict = {}
+        order: List = []
+        stack = [(self.root, None)]
+        while stack:
+            node, deps = stack[-1]
+            if deps is None:
+                state[node] = 1
+                deps = iter({d for alt in self._alternatives(node) for d in alt})
+                stack[-1] = (node, deps)
+            for d in deps:
+                st = state.get(d)
+                if st is None:
+                    stack.append((d, None))
+                    break
+                if st == 1:
+                    self._cyclic = True
+            else:
+                stack.pop()
+                state[node] = 2
+                order.append(node)
+        counts: Dict = {}
+        if not self._cyclic:
+            for node in order:
+                total = 0
+                for alt in self._alternatives(node):
+                    c = 1
+                    for d in alt:
+                        c *= counts[d]
+                    total += c
+                counts[node] = total
+        self._counts = counts
+        # familias elegidas: punto fijo sobre nodos con alguna familia ya resuelta
+        choice = self._choice
+        pending = list(order)
+        while pending:
+            rest = []
+            for node in pending:
+                for alt in self._alternatives(node):
+                    if all(d in choice for d in alt):
+                        choice[node] = alt
+                        break
+                else:
+                    rest.append(node)
+            if len(rest) == len(pending):
+                break
+            pending = rest
+
+    def count(self) -> Union[int, float]:
+        """Cantidad de árboles de análisis (math.inf si la gramática tiene ciclos
+        que los hacen infinitos). No construye los árboles."""
+        self._evaluate()
+        # todo nodo del bosque tiene al menos un árbol finito: un ciclo alcanzable
+        # desde la raíz se puede repetir sin límite
+        return math.inf if self._cyclic else self._counts[self.root]
+
+    @property
+    def ambiguous(self) -> bool:
+        return self.count() > 1
+
+    def _children(self, node) -> List:
+        """Hijos (símbolos y terminales, en orden) de un nodo de símbolo según la elección."""
+        out: List = []
+        item_node = self._choice[node][0]
+        while True:
+            _, i, item = item_node
+            if item[1] == 0:
+                break
+            alt = self._choice[item_node]
+            pred, child = next(l for l in self._links(i, item)
+                               if [d for d in l if d is not None and d[0] != 't'] == alt)
+            out.append(child)
+            if pred is None:
+                break
+            item_node = pred
+        out.reverse()
+        return out
+
+    def tree(self):
+        """Un árbol de derivación como (símbolo, [hijos]); los terminales son cadenas."""
+        self._evaluate()
+        names = self._p.names
+        root: Tuple[str, list] = (names[self.root[1]], [])
+        stack = [(root[1], iter(self._children(self.root)))]
+        while stack:
+            out, it = stack[-1]
+            child = next(it, None)
+            if child is None:
+                stack.pop()
+                continue
+            if child[0] == 't':
+                out.append(child[1])
+            else:
+                node: Tuple[str, list] = (names[child[1]], [])
+                out.append(node)
+                stack.append((node[1], iter(self._children(child))))
+        return root
+
+    def node_count(self) -> int:
+        self._evaluate()
+        return len(self._choice)
+
+class EarleyParser:
+    """Earley sobre las producciones tal cual (sin pasar a FNC).
+
+    - Anulables a la Aycock–Horspool: al predecir un B anulable el punto avanza
+      también sobre B en el mismo conjunto.
+    - Predicción indexada por no terminal (una vez por conjunto) y ítems en espera
+      indexados por el símbolo siguiente, así el escaneo y la compleción solo tocan
+      los ítems que sirven.
+    - Optimización de Leo para la recursión por la derecha: una cadena determinista
+      de compleciones se resuelve en un paso. Con esto las gramáticas LR-regulares
+      (las no ambiguas usuales) se reconocen en tiempo lineal. Se desactiva si la
+      gramática es cíclica (A =>+ A), para que el bosque conserve esos ciclos.
+    """
+    def __init__(self, grammar: Grammar):
+        c = grammar.compiled
+        for rule in c.rules:
+            if not (len(rule.lhs_syms) == 1 and c.is_nt[rule.lhs_syms[0]]):
+                raise ValueError(f"No es libre de contexto: LHS '{rule.lhs}' no es un único no terminal")
+        self.names = c.symbols
+        self.is_nt = c.is_nt
+        self.start = c.start
+        self.rules: List[Tuple[int, Tuple[int, ...]]] = []
+        self.by_lhs: Dict[int, List[int]] = {}
+        for A, bodies in c.by_lhs.items():
+            for body in dict.fromkeys(bodies):
+                self.by_lhs.setdefault(A, []).append(len(self.rules))
+                self.rules.append((A, body))
+        self.nullable: Set[int] = set()
+        changed = True
+        while changed:
+            changed = False
+            for A, body in self.rules:
+                if A not in self.nullable and all(s in self.nullable for s in body):
+                    self.nullable.add(A)
+                    changed = True
+        self.use_leo = not self._cyclic()
+
+    def _cyclic(self) -> bool:
+        """¿Existe A =>+ A? (A -> αBβ con α y β anulables forma una arista A -> B)."""
+        succ: Dict[int, Set[int]] = {}
+        for A, body in self.rules:
+            for k, B in enumerate(body):
+                if self.is_nt[B] and all(s in self.nullable for s in body[:k] + body[k + 1:]):
+                    succ.setdefault(A, set()).add(B)
+        state: Dict[int, int] = {}
+        for root in succ:
+            if root in state:
+                continue
+            stack = [(root, iter(succ.get(root, ())))]
+            state[root] = 1
+            while stack:
+                A, it = stack[-1]
+                for B in it:
+                    st = state.get(B)
+                    if st == 1:
+                        return True
+                    if st is None:
+                        state[B] = 1
+                        stack.append((B, iter(succ.get(B, ()))))
+                        break
+                else:
+                    state[A] = 2
+                    stack.pop()
+        return False
+
+    def _chart(self, word: Sequence[str]) -> _Chart:
+        rules, by_lhs, is_nt, nullable = self.rules, self.by_lhs, self.is_nt, self.nullable
+        n = len(word)
+        ch = _Chart(self, n)
+        waiting_t: Dict[str, List[Item]] = {}
+        for i in range(n + 1):
+            items = ch.links[i]
+            completed = ch.completed[i]
+            agenda: List[Item] = []
+            predicted: Set[int] = set()
+
+            def add(item: Item, link) -> None:
+                links = items.get(item)
+                if links is None:
+                    items[item] = {link} if link is not None else set()
+                    agenda.append(item)
+                elif link is not None:
+                    links.add(link)
+
+            if i == 0:
+                for r in by_lhs.get(self.start, ()):
+                    add((r, 0, 0), None)
+            else:
+                a = word[i - 1]
+                for it in waiting_t.get(a, ()):
+                    r, d, j = it
+                    add((r, d + 1, j), (('i', i - 1, it) if d else None, ('t', a, i - 1, i)))
+            if not items:
+                ch.error = max(i - 1, 0)
+                return ch
+            waiting_t = {}
+            waits = ch.waiting[i]
+            while agenda:
+                it = agenda.pop()
+                r, d, j = it
+                A, body = rules[r]
+                if d < len(body):
+                    X = body[d]
+                    if not is_nt[X]:
+                        waiting_t.setdefault(self.names[X], []).append(it)
+                        continue
+                    waits.setdefault(X, []).append(it)
+                    if X not in predicted:
+                        predicted.add(X)
+                        for r2 in by_lhs.get(X, ()):
+                            add((r2, 0, i), None)
+                    if X in nullable:
+                        add((r, d + 1, j), (('i', i, it) if d else None, ('s', X, i, i)))
+                    continue
+                completed.setdefault((A, j), []).append(it)
+                if j < i and self.use_leo:
+                    top = ch.leo_top(j, A)
+                    if top is not None:
+                        add(top, ('leo', j, A))
+                        continue
+                for parent in list(ch.waiting[j].get(A, ())):
+                    pr, pd, pj = parent
+                    add((pr, pd + 1, pj), (('i', j, parent) if pd else None, ('s', A, j, i)))
+        return ch
+
+    def recognize(self, word: Sequence[str]) -> bool:
+        return self._chart(word).accepted()
+
+    def parse(self, word: Sequence[str]) -> Optional[ParseForest]:
+        """Bosque de análisis de `word`, o None si no pertenece al lenguaje."""
+        ch = self._chart(word)
+        if not ch.accepted():
+            return None
+        return ParseForest(self, word, ch, ('s', self.start, 0, len(word)))
+
+    def error_position(self, word: Sequence[str]) -> Optional[int]:
+        """Índice del primer símbolo que ninguna derivación puede leer; len(word) si la
+        entrada termina antes de tiempo y None si la palabra pertenece al lenguaje."""
+        ch = self._chart(word)
+        if ch.error is not None:
+            return ch.error
+        return None if ch.accepted() else len(word)
+
+    def accepts_batch(self, words: Iterable[Sequence[str]]) -> List[bool]:
+        return [self.recognize(w) for w in words]
+
+def earley_parse(g: Grammar, word: Sequence[str]) -> Optional[ParseForest]:
+    return EarleyParser(g).parse(word)
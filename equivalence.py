@@ -1,35 +1,184 @@
-from typing import Set, List, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from collections import deque
 from .grammar_parser import Grammar
+from .classifier import _is_regular_rule
+from .regex_automata import NFA, BitNFA, LazyDFA
+from .rewriting import RewriteEngine, has_context_rules
 
-def derive_strings(g: Grammar, max_len: int = 5, max_steps: int = 2000) -> Set[str]:
-    """Heurística: deriva cadenas hasta longitud max_len (BFS)."""
-    derived: Set[str] = set()
-    queue = deque()
-    queue.append([g.start])
-    steps = 0
-    while queue and steps < max_steps:
-        sentential = queue.popleft()
-        steps += 1
-        if all((tok.islower() or not tok.isalpha()) for tok in sentential):
-            s = ''.join(tok for tok in sentential if tok != 'ε')
-            if len(s) <= max_len:
-                derived.add(s)
-            continue
-        for i, tok in enumerate(sentential):
-            if tok.isupper() or (tok.startswith('<') and tok.endswith('>')):
-                lhs = tok
-                for p_lhs, rhs in g.productions:
-                    if p_lhs.split()[0] == lhs:
-                        for alt in rhs.split('|'):
-                            alt_toks = [t for t in alt.strip() if t]
-                            new_sent = sentential[:i] + alt_toks + sentential[i+1:]
-                            if len(''.join([x for x in new_sent if x != 'ε'])) <= max_len:
-                                queue.append(new_sent)
-                break
-    return derived
+def strings_by_length(g: Grammar, max_len: int) -> Iterator[str]:
+    """Cadenas de L(g) de longitud ≤ max_len, por longitud y luego en orden alfabético.
+
+    Programación dinámica: L[A][k] = cadenas de longitud k que deriva A. Cada nivel k
+    combina niveles ya completos (todo no terminal del cuerpo con longitud < k) y luego
+    cierra por las aristas "unitarias" (B con longitud k y el resto del cuerpo anulable)
+    con una lista de trabajo, así que los ciclos como S -> SS | S | ε terminan. Se
+    calcula nivel a nivel y se entrega cada uno en cuanto está listo. Solo se usan las
+    reglas con un único símbolo a la izquierda; las demás las expande derive_strings.
+    """
+    c = g.compiled
+    rules = [(A, body) for A, bodies in c.by_lhs.items() for body in dict.fromkeys(bodies)]
+    L: Dict[int, List[Set[str]]] = {A: [] for A in c.nonterminals}
+    L.update({A: [] for A, _ in rules})
+    # longitud mínima de cada no terminal (inf si no genera nada), para podar particiones
+    INF = float("inf")
+    min_len: Dict[int, float] = {A: INF for A in L}
+    changed = True
+    while changed:
+        changed = False
+        for A, body in rules:
+            m = sum(min_len[s] if c.is_nt[s] else len(c.symbols[s]) for s in body)
+            if m < min_len[A]:
+                min_len[A] = m
+                changed = True
+
+    def width(s: int) -> float:
+        return min_len[s] if c.is_nt[s] else len(c.symbols[s])
+
+    nullable = {A for A, m in min_len.items() if m == 0}
+    unit: Dict[int, Set[int]] = {}  # B -> {A}: A -> α B β con α β anulables
+    for A, body in rules:
+        for i, B in enumerate(body):
+            if c.is_nt[B] and all(c.is_nt[s] and s in nullable for j, s in enumerate(body) if j != i):
+                unit.setdefault(B, set()).add(A)
+
+    for k in range(max_len + 1):
+        for A in L:
+            L[A].append(set())
+        # partes con todos los no terminales en niveles ya completos (< k)
+        for A, body in rules:
+            if not min_len[A] <= k:
+                continue
+            rest = [0.0] * (len(body) + 1)
+            for i in range(len(body) - 1, -1, -1):
+                rest[i] = rest[i + 1] + width(body[i])
+            if rest[0] > k:
+                continue
+            cur: Dict[int, Set[str]] = {0: {""}}
+            for i, X in enumerate(body):
+                nxt: Dict[int, Set[str]] = {}
+                for l1, prefixes in cur.items():
+                    if c.is_nt[X]:
+                        options = ((l2, L[X][l2]) for l2 in range(min(k - l1, k - 1) + 1) if l2 < len(L[X]))
+                    else:
+                        options = ((len(c.symbols[X]), {c.symbols[X]}),)
+                    for l2, words in options:
+                        if words and l1 + l2 + rest[i + 1] <= k:
+                            nxt.setdefault(l1 + l2, set()).update(x + y for x in prefixes for y in words)
+                cur = nxt
+                if not cur:
+                    break
+            L[A][k] |= cur.get(k, set())
+        # cierre por aristas unitarias dentro del nivel k
+        work = deque(A for A in L if L[A][k])
+        while work:
+            B = work.popleft()
+            for A in unit.get(B, ()):
+                if not L[B][k] <= L[A][k]:
+                    L[A][k] |= L[B][k]
+                    work.append(A)
+        yield from sorted(L[c.start][k]) if c.start in L else ()
+
+def derive_strings(g: Grammar, max_len: int = 5, max_steps: int = 20000) -> Set[str]:
+    """Todas las cadenas derivables de longitud ≤ max_len. Si todos los LHS son un único
+    símbolo es exacto (ver strings_by_length); si no (tipo 1/0) se buscan derivaciones
+    con RewriteEngine, expandiendo a lo sumo max_steps formas sentenciales."""
+    if has_context_rules(g):
+        return set(RewriteEngine(g).search(max_len, max_steps=max_steps).strings)
+    return set(strings_by_length(g, max_len))
+
+def nfa_from_regular_grammar(g: Grammar) -> NFA:
+    """AFN de una gramática de tipo 3 (A -> aB | a | ε): un estado por no terminal
+    y uno final extra. ValueError si alguna regla no es regular."""
+    c = g.compiled
+    final = len(c.symbols)
+    accepts = {final}
+    trans: Dict[Tuple[int, Optional[str]], Set[int]] = {}
+    for rule in c.rules:
+        if not (len(rule.lhs_syms) == 1 and c.is_nt[rule.lhs_syms[0]]):
+            raise ValueError(f"No es regular: LHS '{rule.lhs}' no es un único no terminal")
+        A = rule.lhs_syms[0]
+        for toks, alt in zip(rule.alts, rule.alt_texts):
+            ok, why = _is_regular_rule(c, toks, alt.strip())
+            if not ok:
+                raise ValueError(f"No es regular: {why}")
+            if toks == (c.epsilon,) or not toks:
+                accepts.add(A)
+            else:
+                trans.setdefault((A, c.symbols[toks[0]]), set()).add(toks[1] if len(toks) == 2 else final)
+    return NFA(start=c.start, accepts=accepts, trans=trans)
+
+def _shortest_difference(a: BitNFA, b: BitNFA, alphabet: List[str]) -> Optional[str]:
+    """BFS sobre el producto de los dos DFA perezosos: la primera pareja con distinta
+    aceptación da el contraejemplo más corto."""
+    start = (a.start_mask, b.start_mask)
+    parent: Dict[Tuple[int, int], Tuple[Tuple[int, int], str]] = {}
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        p, q = pair = queue.popleft()
+        if bool(p & a.accept_mask) != bool(q & b.accept_mask):
+            out: List[str] = []
+            while pair != start:
+                pair, ch = parent[pair]
+                out.append(ch)
+            return "".join(reversed(out))
+        for ch in alphabet:
+            nxt = (a.move(p, ch), b.move(q, ch))
+            if nxt not in seen:
+                seen.add(nxt)
+                parent[nxt] = (pair, ch)
+                queue.append(nxt)
+    return None
+
+def regular_equivalence(g1: Grammar, g2: Grammar) -> Tuple[bool, Optional[str]]:
+    """Equivalencia exacta de dos gramáticas de tipo 3: (¿equivalentes?, contraejemplo
+    más corto o None).
+
+    Cada gramática pasa a AFN y se determiniza bajo demanda (conjuntos como máscaras);
+    Hopcroft–Karp une los estados que deben ser equivalentes con union-find y se
+    detiene en cuanto une uno de aceptación con uno que no lo es. Solo si falla se
+    recorre el producto por anchura para dar la cadena más corta que los distingue.
+    """
+    a, b = BitNFA(nfa_from_regular_grammar(g1)), BitNFA(nfa_from_regular_grammar(g2))
+    alphabet = sorted(set(a.alphabet) | set(b.alphabet))
+    uf: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+    def find(x: Tuple[int, int]) -> Tuple[int, int]:
+        root = x
+        while uf.get(root, root) != root:
+            root = uf[root]
+        while x != root:
+            uf[x], x = root, uf[x]
+        return root
+
+    def accepting(x: Tuple[int, int]) -> bool:
+        return bool(x[1] & (a, b)[x[0]].accept_mask)
+
+    todo = [((0, a.start_mask), (1, b.start_mask))]
+    uf[todo[0][0]] = todo[0][1]
+    while todo:
+        x, y = todo.pop()
+        if accepting(x) != accepting(y):
+            return False, _shortest_difference(a, b, alphabet)
+        for ch in alphabet:
+            x2, y2 = (0, a.move(x[1], ch)), (1, b.move(y[1], ch))
+            rx, ry = find(x2), find(y2)
+            if rx != ry:
+                uf[rx] = ry
+                todo.append((x2, y2))
+    return True, None
 
 def are_grammars_equivalent(g1: Grammar, g2: Grammar, max_len: int = 5):
-    s1 = derive_strings(g1, max_len)
-    s2 = derive_strings(g2, max_len)
-    return s1 == s2, s1 - s2, s2 - s1
+    """(¿iguales?, L1 - L2, L2 - L1). Si las dos son de tipo 3 la respuesta es exacta
+    y las diferencias contienen solo el contraejemplo más corto; si no, se comparan
+    las cadenas derivadas hasta max_len."""
+    try:
+        same, witness = regular_equivalence(g1, g2)
+    except ValueError:
+        s1 = derive_strings(g1, max_len)
+        s2 = derive_strings(g2, max_len)
+        return s1 == s2, s1 - s2, s2 - s1
+    if same:
+        return True, set(), set()
+    in_g1 = LazyDFA(nfa_from_regular_grammar(g1)).fullmatch(witness)
+    return False, {witness} if in_g1 else set(), set() if in_g1 else {witness}
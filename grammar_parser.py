@@ -1,21 +1,139 @@
-from dataclasses import dataclass
-from typing import List, Tuple, Set
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple, Set
 from .utils import split_alternatives, normalize_arrow, deduce_symbols, strip_comments, EPSILON, tokenize_rhs, is_nonterminal
 
+@dataclass(frozen=True)
+class CompiledRule:
+    lhs: str                               # texto original del LHS
+    lhs_syms: Tuple[int, ...]              # ids del LHS tokenizado como un cuerpo
+    alts: Tuple[Tuple[int, ...], ...]      # tokens de cada alternativa (incluye ε)
+    alt_texts: Tuple[str, ...]             # alternativas en texto, para mensajes
+
+@dataclass(frozen=True, eq=False)
+class CompiledGrammar:
+    """Forma compilada de una gramática: símbolos internados como enteros,
+    alternativas pre-tokenizadas e índice de producciones por LHS."""
+    symbols: Tuple[str, ...]               # id -> nombre
+    ids: Dict[str, int]                    # nombre -> id
+    is_nt: Tuple[bool, ...]                # id -> ¿no terminal?
+    epsilon: int                           # id de ε
+    start: int
+    rules: Tuple[CompiledRule, ...]
+    by_lhs: Dict[int, Tuple[Tuple[int, ...], ...]]  # A -> cuerpos sin ε (solo LHS de un símbolo)
+    nonterminals: FrozenSet[int]
+    terminals: FrozenSet[int]
+    rhs_symbols: FrozenSet[int]            # símbolos que aparecen en algún RHS
+
+    def name(self, sym: int) -> str:
+        return self.symbols[sym]
+
+    def names(self, syms) -> Set[str]:
+        return {self.symbols[s] for s in syms}
+
+def _intern_rules(start: str, rules: List[Tuple[str, Tuple[str, ...], Tuple[str, ...], Tuple[Tuple[Optional[str], ...], ...]]]) -> CompiledGrammar:
+    """Interna reglas ya tokenizadas: (texto del LHS, símbolos del LHS, alternativas en
+    texto, símbolos de cada alternativa con None por ε)."""
+    symbols: List[str] = [EPSILON]
+    ids: Dict[str, int] = {}
+    eps = 0
+
+    def intern(tok: Optional[str]) -> int:
+        if tok is None:
+            return eps
+        i = ids.get(tok)
+        if i is None:
+            i = ids[tok] = len(symbols)
+            symbols.append(tok)
+        return i
+
+    start_id = intern(start)
+    NT: Set[int] = {start_id} if is_nonterminal(start) else set()  # también si es un LHS como "AB"
+    T: Set[int] = set()
+    on_rhs: Set[int] = set()
+    compiled: List[CompiledRule] = []
+    by_lhs: Dict[int, List[Tuple[int, ...]]] = {}
+    for lhs, lhs_toks, alt_texts, alt_toks in rules:
+        lhs_syms = tuple(intern(s) for s in lhs_toks)
+        for s, i in zip(lhs_toks, lhs_syms):
+            if is_nonterminal(s) or (len(s) == 1 and s.isupper()):
+                NT.add(i)
+        alts = []
+        for toks in alt_toks:
+            toks = tuple(intern(t) for t in toks)
+            alts.append(toks)
+            on_rhs.update(toks)
+            for t in toks:
+                if t == eps:
+                    continue
+                name = symbols[t]
+                if is_nonterminal(name) or (len(name) == 1 and name.isupper()):
+                    NT.add(t)
+                else:
+                    T.add(t)
+        compiled.append(CompiledRule(lhs, lhs_syms, tuple(alts), alt_texts))
+        if len(lhs_syms) == 1:
+            bucket = by_lhs.setdefault(lhs_syms[0], [])
+            for toks in alts:
+                bucket.append(tuple(t for t in toks if t != eps))
+    ids.setdefault(EPSILON, eps)
+    is_nt = tuple(i in NT for i in range(len(symbols)))
+    return CompiledGrammar(
+        symbols=tuple(symbols), ids=ids, is_nt=is_nt, epsilon=eps, start=start_id,
+        rules=tuple(compiled), by_lhs={a: tuple(b) for a, b in by_lhs.items()},
+        nonterminals=frozenset(NT), terminals=frozenset(T), rhs_symbols=frozenset(on_rhs),
+    )
+
+def compile_grammar(start: str, productions: List[Tuple[str, str]]) -> CompiledGrammar:
+    rules = []
+    for lhs, rhs in productions:
+        # el LHS se parte en símbolos igual que los cuerpos: "AB" y "A B" son dos símbolos
+        lhs_toks = tuple(t for t in tokenize_rhs(lhs) if t != EPSILON)
+        alt_texts = tuple(split_alternatives(rhs))
+        alt_toks = tuple(tuple(None if t == EPSILON else t for t in tokenize_rhs(alt)) for alt in alt_texts)
+        rules.append((lhs, lhs_toks, alt_texts, alt_toks))
+    return _intern_rules(start, rules)
+
+def compile_symbols(start: str, rules: List[Tuple[Tuple[str, ...], List[Tuple[str, ...]]]]) -> CompiledGrammar:
+    """Como compile_grammar con los símbolos ya separados: cada nombre es un símbolo tal
+    cual (sin tokenize_rhs, así "<" o "ε" pueden ser terminales) y un cuerpo vacío es ε."""
+    return _intern_rules(start, [(" ".join(lhs), tuple(lhs), tuple(" ".join(b) or EPSILON for b in bodies),
+                                  tuple(tuple(b) or (None,) for b in bodies)) for lhs, bodies in rules])
+
 @dataclass
 class Grammar:
     start: str
     productions: List[Tuple[str, str]]  # (lhs, rhs) con posibles alternativas separadas por |
+    _compiled: Optional[CompiledGrammar] = field(default=None, init=False, repr=False, compare=False)
+    _compiled_src: Optional[Tuple[str, List[Tuple[str, str]]]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def compiled(self) -> CompiledGrammar:
+        """Compila una sola vez; se recompila solo si cambian start o productions."""
+        src = (self.start, self.productions)
+        if self._compiled is None or self._compiled_src != src:
+            self._compiled = compile_grammar(self.start, self.productions)
+            self._compiled_src = (self.start, list(self.productions))
+        return self._compiled
+
+    @classmethod
+    def from_symbols(cls, start: str, rules: List[Tuple[Tuple[str, ...], List[Tuple[str, ...]]]]) -> "Grammar":
+        """Gramática ya compilada con compile_symbols. productions queda en texto para
+        mostrarla; si se modifica, se recompila desde ese texto."""
+        g = cls(start=start, productions=[(" ".join(lhs), " | ".join(" ".join(b) or EPSILON for b in bodies))
+                                          for lhs, bodies in rules])
+        g._compiled = compile_symbols(start, rules)
+        g._compiled_src = (g.start, list(g.productions))
+        return g
 
     @property
     def nonterminals(self) -> Set[str]:
-        NT, _ = deduce_symbols(self.productions)
-        return NT
+        c = self.compiled
+        return c.names(c.nonterminals)
 
     @property
     def terminals(self) -> Set[str]:
-        _, T = deduce_symbols(self.productions)
-        return T
+        c = self.compiled
+        return c.names(c.terminals)
 
 def parse_grammar(text: str) -> Grammar:
     """Parsea reglas tipo:
@@ -43,18 +161,12 @@ def parse_grammar(text: str) -> Grammar:
     return Grammar(start=start_symbol, productions=prods)
 
 def productions_expanded(g: Grammar) -> List[Tuple[str, List[str]]]:
-    out = []
-    for lhs, rhs in g.productions:
-        alts = split_alternatives(rhs)
-        out.append((lhs, alts))
-    return out
+    return [(r.lhs, list(r.alt_texts)) for r in g.compiled.rules]
 
 def rhs_tokens(rhs: str) -> List[str]:
     return tokenize_rhs(rhs)
 
 def occurs_on_rhs(g: Grammar, sym: str) -> bool:
-    for _, rhs in g.productions:
-        for alt in split_alternatives(rhs):
-            if sym in rhs_tokens(alt):
-                return True
-    return False
+    c = g.compiled
+    i = c.ids.get(sym)
+    return i is not None and i in c.rhs_symbols
@@ -0,0 +1,390 @@
+import json, os, sys, threading
+from collections import OrderedDict
+from array import array
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from .grammar_parser import Grammar
+from .canonical import canonical_form
+from .utils import EPSILON, write_atomic
+
+_VERSION = 1  # cambiarlo invalida las tablas guardadas en disco
+END = "$"
+_AUGMENTED = "<N0'>"  # S' -> S; no choca con los nombres canónicos <Nk>
+
+def default_cache_dir() -> str:
+    return os.environ.get("CHOMSKY_LALR_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "chomsky-ai", "lalr")
+
+@dataclass(frozen=True)
+class LRConflict:
+    state: int
+    terminal: str
+    kind: str                       # "shift/reduce" o "reduce/reduce"
+    productions: Tuple[int, ...]    # reducciones en conflicto
+
+@dataclass(frozen=True, eq=False)
+class LALRTable:
+    """Tablas LALR(1) compactas de la forma canónica de una gramática.
+
+    action[s * len(terminals) + t]: 0 error, v > 0 desplazar al estado v - 1,
+    v < 0 reducir por la producción -v - 1 (la 0, S' -> S, es aceptar).
+    goto[s * len(nonterminals) + A]: estado destino o -1.
+    Los no terminales usan los nombres canónicos (<N0>, <N1>, ...), así la tabla
+    sirve para toda gramática con la misma huella; `names` los traduce a los de
+    la gramática concreta al mostrarlos.
+    """
+    fingerprint: str
+    terminals: Tuple[str, ...]                      # el último es END
+    nonterminals: Tuple[str, ...]                   # el 0 es S'
+    productions: Tuple[Tuple[int, Tuple[str, ...]], ...]  # (A, cuerpo)
+    n_states: int
+    action: array
+    goto: array
+    conflicts: Tuple[LRConflict, ...]
+    names: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_lalr1(self) -> bool:
+        return not self.conflicts
+
+    def production_text(self, p: int) -> str:
+        A, body = self.productions[p]
+        name = lambda s: self.names.get(s, s)
+        return f"{name(self.nonterminals[A])} -> " + (" ".join(map(name, body)) or EPSILON)
+
+    def conflict_text(self, c: LRConflict) -> str:
+        return (f"estado {c.state}, '{c.terminal}': conflicto {c.kind} con "
+                + " | ".join(self.production_text(p) for p in c.productions))
+
+    def to_bytes(self) -> bytes:
+        header = {"version": _VERSION, "fingerprint": self.fingerprint, "terminals": self.terminals,
+                  "nonterminals": self.nonterminals, "productions": self.productions,
+                  "n_states": self.n_states, "typecode": self.action.typecode,
+                  "byteorder": sys.byteorder,
+                  "conflicts": [[c.state, c.terminal, c.kind, c.productions] for c in self.conflicts]}
+        return (json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n"
+                + self.action.tobytes() + self.goto.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LALRTable":
+        """Inversa de to_bytes; ValueError si el archivo no es válido o es de otra versión."""
+        nl = data.index(b"\n")
+        h = json.loads(data[:nl].decode("utf-8"))
+        if h["version"] != _VERSION or h["byteorder"] != sys.byteorder:
+            raise ValueError("Tabla LALR de otra versión o plataforma")
+        n, nt, nn = h["n_states"], len(h["terminals"]), len(h["nonterminals"])
+        action, goto = array(h["typecode"]), array(h["typecode"])
+        size = action.itemsize
+        body = data[nl + 1:]
+        if len(body) != (n * nt + n * nn) * size:
+            raise ValueError("Tabla LALR truncada")
+        action.frombytes(body[:n * nt * size])
+        goto.frombytes(body[n * nt * size:])
+        return cls(fingerprint=h["fingerprint"], terminals=tuple(h["terminals"]),
+                   nonterminals=tuple(h["nonterminals"]),
+                   productions=tuple((A, tuple(b)) for A, b in h["productions"]),
+                   n_states=n, action=action, goto=goto,
+                   conflicts=tuple(LRConflict(s, t, k, tuple(ps)) for s, t, k, ps in h["conflicts"]))
+
+def _digraph(edges: Sequence[Sequence[int]], init: Sequence[int]) -> List[int]:
+    """F(x) = init(x) ∪ ⋃ F(y) por cada arista x -> y (DeRemer y Pennello),
+    con las componentes fuertemente conexas resueltas de una vez. Iterativo."""
+    n = len(init)
+    F = list(init)
+    N = [0] * n
+    INF = n + 1
+    stack: List[int] = []
+    for x0 in range(n):
+        if N[x0]:
+            continue
+        stack.append(x0)
+        N[x0] = len(stack)
+        work = [(x0, len(stack), 0)]
+        while work:
+            x, d, i = work[-1]
+            if i < len(edges[x]):
+                work[-1] = (x, d, i + 1)
+                y = edges[x][i]
+                if not N[y]:
+                    stack.append(y)
+                    N[y] = len(stack)
+                    work.append((y, len(stack), 0))
+                    continue
+                N[x] = min(N[x], N[y])
+                F[x] |= F[y]
+                continue
+            work.pop()
+            if N[x] == d:
+                while True:
+                    top = stack.pop()
+                    N[top] = INF
+                    F[top] = F[x]
+                    if top == x:
+                        break
+            if work:
+                parent = work[-1][0]
+                N[parent] = min(N[parent], N[x])
+                F[parent] |= F[x]
+    return F
+
+def build_lalr(g: Grammar) -> LALRTable:
+    """Construye las tablas LALR(1) (autómata LR(0) + lookaheads de DeRemer y Pennello)
+    sobre la forma canónica de la gramática. ValueError si no es de tipo 2."""
+    canon, fp, _ = canonical_form(g)
+    return _build_lalr(g, canon, fp)
+
+def _build_lalr(g: Grammar, canon: Grammar, fp: str) -> LALRTable:
+    """build_lalr() con la forma canónica y la huella de g ya calculadas."""
+    c0 = g.compiled
+    for rule in c0.rules:
+        if not (len(rule.lhs_syms) == 1 and c0.is_nt[rule.lhs_syms[0]]):
+            raise ValueError(f"No es libre de contexto: LHS '{rule.lhs}' no es un único no terminal")
+    c = canon.compiled
+    nt_ids = sorted(c.nonterminals, key=lambda s: int(c.symbols[s][2:-1]))
+    term_names = sorted(c.symbols[s] for s in c.terminals if s != c.epsilon) + [END]
+    T = len(term_names)
+    # símbolos unificados: terminales 0..T-1 (END = T-1), no terminales T + índice (S' = T)
+    nonterminals = [_AUGMENTED] + [c.symbols[s] for s in nt_ids]
+    sym = {c.symbols[s]: T + 1 + i for i, s in enumerate(nt_ids)}
+    sym.update({t: i for i, t in enumerate(term_names)})
+    prods: List[Tuple[int, Tuple[int, ...]]] = [(T, (T + 1,))]
+    for A in nt_ids:
+        for body in dict.fromkeys(c.by_lhs.get(A, ())):
+            prods.append((sym[c.symbols[A]], tuple(sym[c.symbols[s]] for s in body)))
+    n_sym = T + len(nonterminals)
+
+    # ítems (p, punto) numerados consecutivamente
+    base, item_prod, item_next = [], [], []
+    for p, (_, body) in enumerate(prods):
+        base.append(len(item_prod))
+        for d in range(len(body) + 1):
+            item_prod.append(p)
+            item_next.append(body[d] if d < len(body) else -1)
+    by_nt: Dict[int, List[int]] = {}
+    for p, (A, _) in enumerate(prods):
+        by_nt.setdefault(A, []).append(p)
+    # no terminales predichos al tener A tras el punto (incluido A)
+    predicts: Dict[int, Set[int]] = {}
+    for A in range(T, n_sym):
+        seen, todo = {A}, [A]
+        while todo:
+            for p in by_nt.get(todo.pop(), ()):
+                body = prods[p][1]
+                if body and body[0] >= T and body[0] not in seen:
+                    seen.add(body[0])
+                    todo.append(body[0])
+        predicts[A] = seen
+
+    nullable: Set[int] = set()
+    changed = True
+    while changed:
+        changed = False
+        for A, body in prods:
+            if A not in nullable and all(s in nullable for s in body):
+                nullable.add(A)
+                changed = True
+
+    # autómata LR(0)
+    kernels: List[Tuple[int, ...]] = [(base[0],)]
+    index: Dict[Tuple[int, ...], int] = {kernels[0]: 0}
+    gotos: List[Dict[int, int]] = []
+    completes: List[List[int]] = []
+    q = 0
+    while q < len(kernels):
+        items = list(kernels[q])
+        predicted: Set[int] = set()
+        for it in kernels[q]:
+            X = item_next[it]
+            if X >= T:
+                predicted |= predicts[X]
+        for A in predicted:
+            items.extend(base[p] for p in by_nt.get(A, ()))
+        moves: Dict[int, List[int]] = {}
+        done: List[int] = []
+        for it in items:
+            X = item_next[it]
+            if X < 0:
+                done.append(item_prod[it])
+            else:
+                moves.setdefault(X, []).append(it + 1)
+        row: Dict[int, int] = {}
+        for X, kernel in moves.items():
+            key = tuple(sorted(set(kernel)))
+            r = index.get(key)
+            if r is None:
+                r = index[key] = len(kernels)
+                kernels.append(key)
+            row[X] = r
+        gotos.append(row)
+        completes.append(done)
+        q += 1
+    n_states = len(kernels)
+
+    # transiciones por no terminal (p, A) y relaciones reads / includes / lookback
+    trans: Dict[Tuple[int, int], int] = {}
+    for p, row in enumerate(gotos):
+        for X in row:
+            if X >= T:
+                trans[(p, X)] = len(trans)
+    DR = [0] * len(trans)
+    reads: List[List[int]] = [[] for _ in trans]
+    includes: List[List[int]] = [[] for _ in trans]
+    lookback: Dict[Tuple[int, int], List[int]] = {}
+    for (p, A), t in trans.items():
+        r = gotos[p][A]
+        m = 0
+        for X, r2 in gotos[r].items():
+            if X < T:
+                m |= 1 << X
+            elif X in nullable:
+                reads[t].append(trans[(r, X)])
+        if p == 0 and A == T + 1:
+            m |= 1 << (T - 1)  # tras el inicial solo puede venir el fin de entrada
+        DR[t] = m
+    for (p0, B), t0 in trans.items():
+        for prod in by_nt.get(B, ()):
+            body = prods[prod][1]
+            nullable_suffix = [True] * (len(body) + 1)
+            for k in range(len(body) - 1, -1, -1):
+                nullable_suffix[k] = nullable_suffix[k + 1] and body[k] in nullable
+            s = p0
+            for k, X in enumerate(body):
+                if X >= T and nullable_suffix[k + 1]:
+                    includes[trans[(s, X)]].append(t0)
+                s = gotos[s][X]
+            lookback.setdefault((s, prod), []).append(t0)
+    follow = _digraph(includes, _digraph(reads, DR))
+
+    # tablas
+    typecode = "h" if max(n_states, len(prods)) < 2 ** 15 - 1 else "i"
+    action = array(typecode, [0]) * (n_states * T)
+    goto = array(typecode, [-1]) * (n_states * len(nonterminals))
+    conflicts: List[LRConflict] = []
+    for q in range(n_states):
+        row_base = q * T
+        reduce_on: Dict[int, List[int]] = {}
+        for X, r in gotos[q].items():
+            if X < T:
+                action[row_base + X] = r + 1
+            else:
+                goto[q * len(nonterminals) + X - T] = r
+        for prod in completes[q]:
+            if prod == 0:
+                reduce_on.setdefault(T - 1, []).append(0)
+                continue
+            la = 0
+            for t in lookback.get((q, prod), ()):
+                la |= follow[t]
+            while la:
+                low = la & -la
+                reduce_on.setdefault(low.bit_length() - 1, []).append(prod)
+                la ^= low
+        for a, ps in sorted(reduce_on.items()):
+            ps.sort()
+            if action[row_base + a] > 0:
+                conflicts.append(LRConflict(q, term_names[a], "shift/reduce", tuple(ps)))
+                continue  # como yacc: se prefiere desplazar
+            if len(ps) > 1:
+                conflicts.append(LRConflict(q, term_names[a], "reduce/reduce", tuple(ps)))
+            action[row_base + a] = -ps[0] - 1
+
+    names = [""] * n_sym
+    for t, i in sym.items():
+        names[i] = t
+    names[T] = _AUGMENTED
+    return LALRTable(fingerprint=fp, terminals=tuple(term_names),
+                     nonterminals=tuple(nonterminals),
+                     productions=tuple((A - T, tuple(names[s] for s in body)) for A, body in prods),
+                     n_states=n_states, action=action, goto=goto, conflicts=tuple(conflicts))
+
+_MAXLOADED = 512  # tablas en memoria (LRU); las expulsadas se releen del disco
+_loaded: "OrderedDict[str, LALRTable]" = OrderedDict()
+_loaded_lock = threading.Lock()
+
+def lalr_table(g: Grammar, cache_dir: Optional[str] = None) -> LALRTable:
+    """Tablas LALR(1) con caché por huella: memoria, luego `<cache_dir>/<huella>.lalr`,
+    luego build_lalr(). cache_dir="" desactiva el disco."""
+    canon, fp, names = canonical_form(g)  # una sola canonicalización por llamada
+    with _loaded_lock:
+        table = _loaded.get(fp)
+        if table is not None:
+            _loaded.move_to_end(fp)
+    if table is None:
+        path = None
+        if cache_dir != "":
+            path = os.path.join(cache_dir or default_cache_dir(), fp + ".lalr")
+            try:
+                with open(path, "rb") as f:
+                    table = LALRTable.from_bytes(f.read())
+            except (OSError, ValueError, KeyError):
+                table = None  # ausente, dañado o de otra versión: se reconstruye
+        if table is None:
+            table = _build_lalr(g, canon, fp)
+            if path is not None:
+                write_atomic(path, table.to_bytes())
+        with _loaded_lock:
+            _loaded[fp] = table
+            _loaded.move_to_end(fp)
+            while len(_loaded) > _MAXLOADED:
+                _loaded.popitem(last=False)
+    return replace(table, names=names)
+
+def clear_loaded() -> None:
+    with _loaded_lock:
+        _loaded.clear()
+
+class LRParser:
+    """Analizador por desplazamiento-reducción dirigido por las tablas LALR(1)."""
+    def __init__(self, table: LALRTable):
+        if not table.is_lalr1:
+            raise ValueError("La gramática no es LALR(1): " + table.conflict_text(table.conflicts[0]))
+        self.t = table
+        self._col = {t: i for i, t in enumerate(table.terminals[:-1])}
+        self._lens = [len(body) for _, body in table.productions]
+        self._lhs = [A for A, _ in table.productions]
+
+    @classmethod
+    def from_grammar(cls, g: Grammar, cache_dir: Optional[str] = None) -> "LRParser":
+        return cls(lalr_table(g, cache_dir))
+
+    def _run(self, word: str) -> Tuple[Optional[List[int]], int]:
+        action, goto = self.t.action, self.t.goto
+        T, N = len(self.t.terminals), len(self.t.nonterminals)
+        col, lens, lhs = self._col, self._lens, self._lhs
+        end = T - 1
+        stack = [0]
+        out: List[int] = []
+        i, n = 0, len(word)
+        a = col.get(word[0], -1) if n else end
+        while True:
+            if a < 0:
+                return None, i
+            v = action[stack[-1] * T + a]
+            if v > 0:
+                stack.append(v - 1)
+                i += 1
+                a = col.get(word[i], -1) if i < n else end
+            elif v < 0:
+                p = -v - 1
+                if p == 0:
+                    return out, i
+                out.append(p)
+                k = lens[p]
+                if k:
+                    del stack[-k:]
+                stack.append(goto[stack[-1] * N + lhs[p]])
+            else:
+                return None, i
+
+    def derivation(self, word: str) -> Optional[List[int]]:
+        """Reducciones en orden (derivación por la derecha al revés), o None."""
+        return self._run(word)[0]
+
+    def recognize(self, word: str) -> bool:
+        return self._run(word)[0] is not None
+
+    def error_position(self, word: str) -> Optional[int]:
+        out, i = self._run(word)
+        return None if out is not None else i
+
+    def accepts_batch(self, words: Sequence[str]) -> List[bool]:
+        return [self.recognize(w) for w in words]
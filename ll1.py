@@ -0,0 +1,275 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+from .grammar_parser import Grammar
+from .cnf import _Builder
+from .utils import EPSILON
+
+END = "$"  # fin de entrada en FOLLOW y en la tabla
+_MAX_PRODUCTIONS = 5000  # tope al transformar, para no explotar con sustituciones
+
+Production = Tuple[int, Tuple[int, ...]]
+
+@dataclass(frozen=True)
+class LL1Conflict:
+    nonterminal: str
+    terminal: str
+    productions: Tuple[str, ...]
+
+@dataclass(frozen=True, eq=False)
+class LL1Table:
+    """FIRST/FOLLOW y tabla LL(1) de una gramática libre de contexto.
+
+    table[A][t] = índice de la producción a usar con A en la pila y t adelante
+    (t ∈ terminales ∪ {$}). Si alguna celda tiene más de una producción hay conflicto
+    y la gramática no es LL(1).
+    """
+    symbols: Tuple[str, ...]
+    is_nt: Tuple[bool, ...]
+    start: int
+    productions: Tuple[Production, ...]
+    nullable: FrozenSet[int]
+    first: Dict[int, FrozenSet[str]]
+    follow: Dict[int, FrozenSet[str]]
+    table: Dict[int, Dict[str, int]]
+    conflicts: Tuple[LL1Conflict, ...]
+
+    @property
+    def is_ll1(self) -> bool:
+        return not self.conflicts
+
+    def production_text(self, p: int) -> str:
+        return _production_text(self.symbols, self.productions[p])
+
+    def to_grammar(self) -> Grammar:
+        bodies: Dict[int, List[str]] = {}
+        for A, body in self.productions:
+            bodies.setdefault(A, []).append(" ".join(self.symbols[s] for s in body) or EPSILON)
+        order = [self.start] + [A for A in bodies if A != self.start]
+        return Grammar(start=self.symbols[self.start],
+                       productions=[(self.symbols[A], " | ".join(bodies[A])) for A in order if A in bodies])
+
+def _production_text(symbols: Sequence[str], prod: Production) -> str:
+    A, body = prod
+    return f"{symbols[A]} -> " + (" ".join(symbols[s] for s in body) or EPSILON)
+
+def _productions(b: _Builder) -> List[Production]:
+    order = [b.start] + sorted(A for A in b.prods if A != b.start)
+    return [(A, body) for A in order for body in sorted(b.prods.get(A, ()))]
+
+def remove_left_recursion(b: _Builder) -> None:
+    """Quita la recursión izquierda directa e indirecta (algoritmo de Paull), solo en
+    los no terminales que forman ciclos por la izquierda. Como en el algoritmo clásico,
+    la recursión escondida tras símbolos anulables no se detecta."""
+    succ: Dict[int, Set[int]] = {A: {body[0] for body in bodies if body and b.is_nt[body[0]]}
+                                 for A, bodies in b.prods.items()}
+    cyclic: List[int] = []
+    for A in sorted(succ):
+        seen, stack = set(), list(succ[A])
+        while stack:
+            X = stack.pop()
+            if X == A:
+                cyclic.append(A)
+                break
+            if X not in seen:
+                seen.add(X)
+                stack.extend(succ.get(X, ()))
+    for i, Ai in enumerate(cyclic):
+        for Aj in cyclic[:i]:
+            new: Set[Tuple[int, ...]] = set()
+            for body in b.prods[Ai]:
+                if body and body[0] == Aj:
+                    new.update(bj + body[1:] for bj in b.prods[Aj])
+                else:
+                    new.add(body)
+            b.prods[Ai] = new
+            if sum(map(len, b.prods.values())) > _MAX_PRODUCTIONS:
+                raise ValueError("La eliminación de recursión izquierda produce demasiadas producciones")
+        rec = [body[1:] for body in b.prods[Ai] if body and body[0] == Ai]
+        if not rec:
+            continue
+        rest = [body for body in b.prods[Ai] if not (body and body[0] == Ai)]
+        A2 = b.fresh(b.symbols[Ai].strip("<>") + "'")
+        b.prods[Ai] = {beta + (A2,) for beta in rest}
+        b.prods[A2] = {alpha + (A2,) for alpha in rec if alpha} | {()}
+
+def left_factor(b: _Builder) -> None:
+    """Factoriza por la izquierda: alternativas con el mismo primer símbolo comparten
+    su prefijo común más largo y el resto pasa a un no terminal nuevo."""
+    work = deque(b.prods)
+    while work:
+        A = work.popleft()
+        groups: Dict[int, List[Tuple[int, ...]]] = {}
+        for body in b.prods.get(A, ()):
+            if body:
+                groups.setdefault(body[0], []).append(body)
+        for bodies in groups.values():
+            if len(bodies) < 2:
+                continue
+            k = 1
+            while all(len(x) > k for x in bodies) and len({x[k] for x in bodies}) == 1:
+                k += 1
+            A2 = b.fresh(b.symbols[A].strip("<>") + "_f")
+            b.prods[A] = (b.prods[A] - set(bodies)) | {bodies[0][:k] + (A2,)}
+            b.prods[A2] = {x[k:] for x in bodies}
+            work.append(A2)
+        if len(b.prods) > _MAX_PRODUCTIONS:
+            raise ValueError("La factorización produce demasiados no terminales")
+
+def _build_table(symbols: Sequence[str], is_nt: Sequence[bool], start: int,
+                 prods: List[Production]) -> LL1Table:
+    terminals = sorted({symbols[s] for _, body in prods for s in body if not is_nt[s]})
+    bit = {t: 1 << i for i, t in enumerate(terminals)}
+    end_bit = 1 << len(terminals)
+    names = terminals + [END]
+    nts = sorted({A for A, _ in prods} | {start} | {s for _, body in prods for s in body if is_nt[s]})
+
+    nullable: Set[int] = set()
+    changed = True
+    while changed:
+        changed = False
+        for A, body in prods:
+            if A not in nullable and all(s in nullable for s in body):
+                nullable.add(A)
+                changed = True
+
+    first = {A: 0 for A in nts}
+
+    def first_of(seq) -> Tuple[int, bool]:
+        m = 0
+        for s in seq:
+            if not is_nt[s]:
+                return m | bit[symbols[s]], False
+            m |= first[s]
+            if s not in nullable:
+                return m, False
+        return m, True
+
+    # FIRST por lista de trabajo: al crecer FIRST(B) se revisan solo las producciones que usan B
+    uses: Dict[int, List[int]] = {}
+    for p, (_, body) in enumerate(prods):
+        for s in set(body):
+            if is_nt[s]:
+                uses.setdefault(s, []).append(p)
+    work = deque(range(len(prods)))
+    queued = [True] * len(prods)
+    while work:
+        p = work.popleft()
+        queued[p] = False
+        A, body = prods[p]
+        m, _ = first_of(body)
+        if m & ~first[A]:
+            first[A] |= m
+            for q in uses.get(A, ()):
+                if not queued[q]:
+                    queued[q] = True
+                    work.append(q)
+
+    # FOLLOW: aportes fijos de FIRST y aristas FOLLOW(A) ⊆ FOLLOW(B), propagadas por lista de trabajo
+    follow = {A: 0 for A in nts}
+    follow[start] = end_bit
+    edges: Dict[int, Set[int]] = {}
+    for A, body in prods:
+        for k, B in enumerate(body):
+            if not is_nt[B]:
+                continue
+            m, rest_nullable = first_of(body[k + 1:])
+            follow[B] |= m
+            if rest_nullable and B != A:
+                edges.setdefault(A, set()).add(B)
+    work = deque(nts)
+    while work:
+        A = work.popleft()
+        for B in edges.get(A, ()):
+            if follow[A] & ~follow[B]:
+                follow[B] |= follow[A]
+                work.append(B)
+
+    def to_set(m: int) -> FrozenSet[str]:
+        return frozenset(names[i] for i in range(len(names)) if m >> i & 1)
+
+    cells: Dict[int, Dict[str, List[int]]] = {}
+    for p, (A, body) in enumerate(prods):
+        m, null = first_of(body)
+        if null:
+            m |= follow[A]
+        for t in to_set(m):
+            cells.setdefault(A, {}).setdefault(t, []).append(p)
+    table = {A: {t: ps[0] for t, ps in row.items()} for A, row in cells.items()}
+    conflicts = tuple(LL1Conflict(symbols[A], t, tuple(_production_text(symbols, prods[p]) for p in ps))
+                      for A, row in cells.items() for t, ps in sorted(row.items()) if len(ps) > 1)
+    return LL1Table(symbols=tuple(symbols), is_nt=tuple(is_nt), start=start, productions=tuple(prods),
+                    nullable=frozenset(nullable),
+                    first={A: to_set(m) for A, m in first.items()},
+                    follow={A: to_set(m) for A, m in follow.items()},
+                    table=table, conflicts=conflicts)
+
+def ll1_table(g: Grammar, transform: bool = False) -> LL1Table:
+    """Tabla LL(1) de la gramática; con transform=True antes se quita la recursión
+    izquierda y se factoriza por la izquierda. ValueError si no es de tipo 2."""
+    b = _Builder(g.compiled)
+    if transform:
+        remove_left_recursion(b)
+        left_factor(b)
+    return _build_table(b.symbols, b.is_nt, b.start, _productions(b))
+
+def ll1_status(g: Grammar) -> Tuple[bool, Optional[bool]]:
+    """(¿es LL(1)?, ¿lo es tras transformarla?); lo segundo es None si no hace falta
+    o si la transformación crece demasiado."""
+    if ll1_table(g).is_ll1:
+        return True, None
+    try:
+        return False, ll1_table(g, transform=True).is_ll1
+    except ValueError:
+        return False, None
+
+class LL1Parser:
+    """Analizador predictivo dirigido por tabla: una pila de símbolos y un carácter
+    de anticipación, tiempo lineal en |w|."""
+    def __init__(self, table: LL1Table):
+        if not table.is_ll1:
+            c = table.conflicts[0]
+            raise ValueError(f"La gramática no es LL(1): conflicto en [{c.nonterminal}, {c.terminal}]")
+        self.t = table
+        # por no terminal: terminal -> (índice de producción, cuerpo invertido para apilar)
+        self._rows: Dict[int, Dict[str, Tuple[int, Tuple[int, ...]]]] = {
+            A: {t: (p, tuple(reversed(table.productions[p][1]))) for t, p in row.items()}
+            for A, row in table.table.items()}
+
+    @classmethod
+    def from_grammar(cls, g: Grammar, transform: bool = False) -> "LL1Parser":
+        return cls(ll1_table(g, transform))
+
+    def _run(self, word: str) -> Tuple[Optional[List[int]], int]:
+        symbols, is_nt, rows = self.t.symbols, self.t.is_nt, self._rows
+        stack = [self.t.start]
+        out: List[int] = []
+        i, n = 0, len(word)
+        while stack:
+            X = stack.pop()
+            a = word[i] if i < n else END
+            if is_nt[X]:
+                entry = rows.get(X, {}).get(a)
+                if entry is None:
+                    return None, i
+                out.append(entry[0])
+                stack.extend(entry[1])
+            elif symbols[X] == a:
+                i += 1
+            else:
+                return None, i
+        return (out, i) if i == n else (None, i)
+
+    def derivation(self, word: str) -> Optional[List[int]]:
+        """Producciones de la derivación por la izquierda (índices), o None."""
+        return self._run(word)[0]
+
+    def recognize(self, word: str) -> bool:
+        return self._run(word)[0] is not None
+
+    def error_position(self, word: str) -> Optional[int]:
+        out, i = self._run(word)
+        return None if out is not None else i
+
+    def accepts_batch(self, words: Sequence[str]) -> List[bool]:
+        return [self.recognize(w) for w in words]
@@ -0,0 +1,196 @@
+import hashlib, json, os, random, sys, tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from .grammar_parser import Grammar, parse_grammar
+from .equivalence import strings_by_length, derive_strings
+from .rewriting import has_context_rules
+from .batch import iter_grammar_files, _chunks
+
+_VERSION = 2  # 2: las de tipo 0/1 se firman con derive_strings
+_P = (1 << 31) - 1   # primo de Mersenne: a·x + b cabe en 64 bits
+_EMPTY = _P          # valor de las firmas de un lenguaje vacío (ningún hash lo alcanza)
+
+def _base_hash(w: str) -> int:
+    # hash estable entre procesos y ejecuciones (hash() de str no lo es)
+    return int.from_bytes(hashlib.blake2b(w.encode("utf-8"), digest_size=8).digest(), "little") % _P
+
+class GrammarLSHIndex:
+    """Índice MinHash + LSH de gramáticas según su lenguaje acotado.
+
+    El lenguaje acotado de una gramática son sus primeras `max_strings` cadenas de
+    longitud ≤ max_len en orden (longitud, alfabético), tomadas de strings_by_length
+    (o de derive_strings si es de tipo 0/1): es un recorte canónico, así que lenguajes
+    iguales dan conjuntos iguales. Cada conjunto se resume en `num_perm` mínimos de
+    hashes a·h(w) + b mod p; la fracción de mínimos que coinciden estima la similitud
+    de Jaccard. La firma se parte en `bands` bandas y dos gramáticas son candidatas si comparten alguna banda entera,
+    así que una consulta solo mira las de sus cubetas y no todo el corpus.
+    """
+    def __init__(self, num_perm: int = 128, bands: int = 32, max_len: int = 8,
+                 max_strings: int = 2000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("bands debe dividir a num_perm")
+        self.num_perm, self.bands, self.rows = num_perm, bands, num_perm // bands
+        self.max_len, self.max_strings, self.seed = max_len, max_strings, seed
+        rng = random.Random(seed)
+        self._a = [rng.randrange(1, _P) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, _P) for _ in range(num_perm)]
+        self.keys: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._sigs = array("i")
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+
+    def params(self) -> Dict:
+        return {"num_perm": self.num_perm, "bands": self.bands, "max_len": self.max_len,
+                "max_strings": self.max_strings, "seed": self.seed}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pos
+
+    def language_sample(self, g: Grammar) -> List[str]:
+        if has_context_rules(g):
+            # tipo 0/1: strings_by_length ignoraría las reglas con LHS de varios símbolos
+            words = sorted(derive_strings(g, self.max_len), key=lambda w: (len(w), w))
+            return words[:self.max_strings]
+        return list(islice(strings_by_length(g, self.max_len), self.max_strings))
+
+    def signature(self, g: Grammar) -> array:
+        xs = [_base_hash(w) for w in self.language_sample(g)]
+        if not xs:
+            return array("i", [_EMPTY] * self.num_perm)
+        if np is not None:
+            A = np.array(self._a, dtype=np.uint64)[:, None]
+            B = np.array(self._b, dtype=np.uint64)[:, None]
+            X = np.array(xs, dtype=np.uint64)[None, :]
+            return array("i", ((A * X + B) % _P).min(axis=1).astype(np.int64).tolist())
+        return array("i", [min((a * x + b) % _P for x in xs) for a, b in zip(self._a, self._b)])
+
+    def _bands_of(self, sig: array) -> List[bytes]:
+        r = self.rows
+        return [sig[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def add_signature(self, key: str, sig: array) -> None:
+        if len(sig) != self.num_perm:
+            raise ValueError(f"La firma debe tener {self.num_perm} valores")
+        if key in self._pos:
+            raise ValueError(f"Clave repetida: {key}")
+        i = len(self.keys)
+        self._pos[key] = i
+        self.keys.append(key)
+        self._sigs.extend(sig)
+        for band, bucket in zip(self._bands_of(sig), self._buckets):
+            bucket.setdefault(band, []).append(i)
+
+    def add(self, key: str, g: Grammar) -> None:
+        self.add_signature(key, self.signature(g))
+
+    def _sig_at(self, i: int) -> array:
+        return self._sigs[i * self.num_perm:(i + 1) * self.num_perm]
+
+    def _query_sig(self, sig: array, k: int, skip: Optional[int] = None) -> List[Tuple[str, float]]:
+        cand = set()
+        for band, bucket in zip(self._bands_of(sig), self._buckets):
+            cand.update(bucket.get(band, ()))
+        cand.discard(skip)
+        scored = []
+        for i in cand:
+            other = self._sig_at(i)
+            same = sum(1 for x, y in zip(sig, other) if x == y)
+            scored.append((same / self.num_perm, self.keys[i]))
+        scored.sort(key=lambda t: (-t[0], t[1]))
+        return [(key, s) for s, key in scored[:k]]
+
+    def query(self, g: Grammar, k: int = 10) -> List[Tuple[str, float]]:
+        """Las k gramáticas del índice más parecidas a g: (clave, Jaccard estimado).
+        Solo se puntúan las candidatas de LSH, así que puede devolver menos de k."""
+        return self._query_sig(self.signature(g), k)
+
+    def similar_to(self, key: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Como query() para una gramática ya indexada, sin incluirla a ella misma."""
+        i = self._pos[key]
+        return self._query_sig(self._sig_at(i), k, skip=i)
+
+    def to_bytes(self) -> bytes:
+        header = dict(self.params(), version=_VERSION, keys=self.keys, byteorder=sys.byteorder,
+                      itemsize=self._sigs.itemsize)
+        return json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + self._sigs.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GrammarLSHIndex":
+        nl = data.index(b"\n")
+        h = json.loads(data[:nl].decode("utf-8"))
+        if h.get("version") != _VERSION or h["byteorder"] != sys.byteorder or h["itemsize"] != array("i").itemsize:
+            raise ValueError("Índice de otra versión o plataforma")
+        index = cls(h["num_perm"], h["bands"], h["max_len"], h["max_strings"], h["seed"])
+        sigs = array("i")
+        sigs.frombytes(data[nl + 1:])
+        if len(sigs) != len(h["keys"]) * index.num_perm:
+            raise ValueError("Índice truncado")
+        for i, key in enumerate(h["keys"]):
+            index.add_signature(key, sigs[i * index.num_perm:(i + 1) * index.num_perm])
+        return index
+
+    def save(self, path: str) -> None:
+        # como utils.write_atomic pero propagando el error: aquí el archivo no es una caché
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.to_bytes())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "GrammarLSHIndex":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+def _sign_chunk(params: Dict, paths: List[str]) -> List[Tuple[str, Optional[bytes], str]]:
+    index = GrammarLSHIndex(**params)
+    out = []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                g = parse_grammar(f.read())
+            out.append((path, index.signature(g).tobytes(), ""))
+        except Exception as e:
+            out.append((path, None, f"{type(e).__name__}: {e}"))
+    return out
+
+def index_files(paths: Iterable[str], index: Optional[GrammarLSHIndex] = None, workers: Optional[int] = None,
+                chunksize: int = 64, pattern: str = "*.txt") -> Tuple[GrammarLSHIndex, List[Tuple[str, str]]]:
+    """Indexa archivos de gramáticas (directorios, globs o archivos, como classify-batch)
+    firmándolos en un pool de procesos. Devuelve el índice y los (archivo, error)."""
+    index = GrammarLSHIndex() if index is None else index
+    params = index.params()
+    chunks = list(_chunks((p for p in iter_grammar_files(paths, pattern) if p not in index), max(1, chunksize)))
+    errors: List[Tuple[str, str]] = []
+    if workers == 1 or len(chunks) <= 1:
+        results = (_sign_chunk(params, c) for c in chunks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        results = pool.map(_sign_chunk, [params] * len(chunks), chunks)
+    try:
+        for rows in results:
+            for path, sig, err in rows:
+                if sig is None:
+                    errors.append((path, err))
+                    continue
+                s = array("i")
+                s.frombytes(sig)
+                index.add_signature(path, s)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return index, errors
@@ -1,15 +1,25 @@
-import argparse, os
+import argparse, os, time
 from .grammar_parser import parse_grammar, Grammar
+from .utils import EPSILON
 from .classifier import classify_grammar
 from .visualizer import render_grammar
 from .report import generate_report
 from .automata_parser import parse_automaton, classify_automaton_type
-from .regex_automata import nfa_from_regex, dfa_from_nfa, regular_grammar_from_dfa
+from .regex_automata import nfa_from_regex, dfa_from_nfa, minimize_dfa, regular_grammar_from_dfa
+from .batch import classify_batch, write_summary
+from .stream import run_stream
+from .regex_search import finditer_file
+from .cyk import CYKRecognizer
+from .earley import EarleyParser
+from .ll1 import ll1_table, LL1Parser
+from .lalr import lalr_table, LRParser
+from .lsh_index import GrammarLSHIndex, index_files
+from .rewriting import RewriteEngine
 
 def cmd_classify_grammar(args):
     text = open(args.file, "r", encoding="utf-8").read()
     g = parse_grammar(text)
-    t, steps = classify_grammar(g)
+    t, steps = classify_grammar(g, ll1=args.ll1)
     print(f"Tipo detectado: {t}")
     for s in steps:
         print("-", s)
@@ -23,6 +33,18 @@ def cmd_classify_grammar(args):
         out = generate_report(args.report, "Reporte Chomsky Classifier AI", text, t, steps, args.diagram if args.diagram else None)
         print("Reporte PDF:", out)
 
+def cmd_classify_batch(args):
+    t0 = time.perf_counter()
+    rows = classify_batch(args.paths, workers=args.workers, chunksize=args.chunksize, pattern=args.pattern)
+    counts = write_summary(rows, args.out)
+    total = sum(counts.values())
+    print(f"{total} archivos en {time.perf_counter() - t0:.2f}s -> {args.out}")
+    for k in sorted(counts):
+        print(f"- {k}: {counts[k]}")
+
+def cmd_stream(args):
+    run_stream(workers=args.workers, max_inflight=args.max_inflight)
+
 def cmd_classify_automaton(args):
     text = open(args.file, "r", encoding="utf-8").read()
     a_type, obj = parse_automaton(text)
@@ -33,6 +55,8 @@ def cmd_regex_convert(args):
     regex = args.regex
     nfa = nfa_from_regex(regex)
     dfa = dfa_from_nfa(nfa)
+    if args.minimize:
+        dfa = minimize_dfa(dfa)
     start, prods = regular_grammar_from_dfa(dfa)
     print("Gramática regular equivalente:")
     # Agrupar por LHS
@@ -48,6 +72,131 @@ def cmd_regex_convert(args):
                 f.write(lhs + " -> " + " | ".join(rhss) + "\n")
         print("Guardado en", args.out)
 
+def cmd_regex_search(args):
+    total = 0
+    for path in args.files:
+        for start, end, text in finditer_file(args.regex, path):
+            total += 1
+            if not args.count:
+                print(f"{path}:{start}-{end}: {text.decode('utf-8', errors='replace')}")
+    if args.count:
+        print(total)
+
+def cmd_cyk(args):
+    g = parse_grammar(open(args.file, "r", encoding="utf-8").read())
+    rec = CYKRecognizer(g)
+    if args.show_cnf:
+        print("FNC:")
+        for lhs, rhs in rec.cnf.to_grammar().productions:
+            print(lhs + " -> " + rhs)
+    words = list(args.words)
+    if args.words_file:
+        with open(args.words_file, "r", encoding="utf-8") as f:
+            words.extend(line.rstrip("\r\n") for line in f)
+    for w, ok in zip(words, rec.accepts_batch(words)):
+        print(f"{'sí' if ok else 'no'}\t{w if w else EPSILON}")
+
+def cmd_earley(args):
+    parser = EarleyParser(parse_grammar(open(args.file, "r", encoding="utf-8").read()))
+    for w in args.words:
+        forest = parser.parse(w)
+        shown = w if w else EPSILON
+        if forest is None:
+            print(f"no\t{shown}\t(error en la posición {parser.error_position(w)})")
+            continue
+        print(f"sí\t{shown}\tárboles: {forest.count()}")
+        if args.tree:
+            print(f"\t{forest.tree()}")
+
+def cmd_ll1(args):
+    table = ll1_table(parse_grammar(open(args.file, "r", encoding="utf-8").read()), transform=args.transform)
+    if args.transform:
+        print("Gramática transformada:")
+        for lhs, rhs in table.to_grammar().productions:
+            print(lhs + " -> " + rhs)
+    for A in sorted(table.first, key=lambda A: table.symbols[A]):
+        print(f"{table.symbols[A]}\tFIRST={{{', '.join(sorted(table.first[A]))}}}\tFOLLOW={{{', '.join(sorted(table.follow[A]))}}}")
+    if not table.is_ll1:
+        print("No es LL(1). Conflictos:")
+        for c in table.conflicts:
+            print(f"  [{c.nonterminal}, {c.terminal}]: " + " | ".join(c.productions))
+        return
+    print("Es LL(1).")
+    parser = LL1Parser(table)
+    for w in args.words:
+        pos = parser.error_position(w)
+        shown = w if w else EPSILON
+        print(f"sí\t{shown}" if pos is None else f"no\t{shown}\t(error en la posición {pos})")
+
+def cmd_lalr(args):
+    table = lalr_table(parse_grammar(open(args.file, "r", encoding="utf-8").read()),
+                       cache_dir="" if args.no_cache else None)
+    print(f"{table.n_states} estados, {len(table.productions) - 1} producciones")
+    if not table.is_lalr1:
+        print("No es LALR(1). Conflictos:")
+        for c in table.conflicts:
+            print("  " + table.conflict_text(c))
+        return
+    print("Es LALR(1).")
+    parser = LRParser(table)
+    for w in args.words:
+        pos = parser.error_position(w)
+        shown = w if w else EPSILON
+        print(f"sí\t{shown}" if pos is None else f"no\t{shown}\t(error en la posición {pos})")
+
+def cmd_lsh_index(args):
+    t0 = time.perf_counter()
+    if os.path.exists(args.index):
+        index = GrammarLSHIndex.load(args.index)
+    else:
+        index = GrammarLSHIndex(num_perm=args.num_perm, bands=args.bands, max_len=args.max_len)
+    before = len(index)
+    index, errors = index_files(args.paths, index, workers=args.workers, chunksize=args.chunksize,
+                                pattern=args.pattern)
+    index.save(args.index)
+    print(f"{len(index) - before} gramáticas nuevas ({len(index)} en total) en "
+          f"{time.perf_counter() - t0:.2f}s -> {args.index}")
+    for path, err in errors:
+        print(f"- error en {path}: {err}")
+
+def cmd_lsh_query(args):
+    index = GrammarLSHIndex.load(args.index)
+    key = args.file if args.file in index else os.path.normpath(args.file)
+    if key in index:
+        hits = index.similar_to(key, args.k)
+    else:
+        hits = index.query(parse_grammar(open(args.file, "r", encoding="utf-8").read()), args.k)
+    if not hits:
+        print("Sin candidatas parecidas en el índice.")
+    for other, sim in hits:
+        print(f"{sim:.3f}\t{other}")
+
+def cmd_derive(args):
+    engine = RewriteEngine(parse_grammar(open(args.file, "r", encoding="utf-8").read()))
+    budgets = dict(max_steps=args.max_steps, max_seconds=args.max_seconds,
+                   max_memory_mb=args.max_memory_mb, max_form_len=args.max_form_len)
+    if args.word is None:
+        r = engine.search(args.max_len, **budgets)
+        for w in sorted(r.strings, key=lambda w: (len(w), w)):
+            print(w or EPSILON)
+    else:
+        r = engine.find_derivation(args.word, **budgets)
+        if r.derivation:
+            print(" => ".join(r.derivation))
+        elif r.exact:
+            print(f"{args.word or EPSILON} no pertenece al lenguaje.")
+        else:
+            print(f"No se halló una derivación de {args.word or EPSILON}.")
+    if r.derivation:
+        state = "detenida al hallar la palabra"
+    elif r.exact:
+        state = "búsqueda exhaustiva"
+    elif r.complete:
+        state = "exhaustiva solo hasta la cota de longitud de las formas"
+    else:
+        state = f"cortada por {r.stopped}"
+    print(f"{r.steps} formas expandidas, {r.forms} distintas ({state})")
+
 def build_parser():
     p = argparse.ArgumentParser(prog="chomsky-ai", description="Chomsky Classifier AI (CLI)")
     sub = p.add_subparsers()
@@ -56,8 +205,22 @@ def build_parser():
     p1.add_argument("file", help="Ruta al archivo con reglas")
     p1.add_argument("--diagram", help="Ruta base para guardar diagrama (sin extensión)", default=None)
     p1.add_argument("--report", help="Ruta del PDF a generar", default=None)
+    p1.add_argument("--ll1", action="store_true", help="Indicar también si la gramática es LL(1)")
     p1.set_defaults(func=cmd_classify_grammar)
 
+    pb = sub.add_parser("classify-batch", help="Clasificar muchas gramáticas (directorios o globs) en paralelo")
+    pb.add_argument("paths", nargs="+", help="Directorios, globs o archivos")
+    pb.add_argument("--out", help="Resumen .csv o .jsonl", default="resumen.csv")
+    pb.add_argument("--workers", type=int, help="Procesos del pool (por defecto: núcleos)", default=None)
+    pb.add_argument("--chunksize", type=int, help="Archivos por tarea enviada al pool", default=64)
+    pb.add_argument("--pattern", help="Filtro de archivos dentro de directorios", default="*.txt")
+    pb.set_defaults(func=cmd_classify_batch)
+
+    ps = sub.add_parser("stream", help="Leer peticiones NDJSON de stdin y escribir resultados NDJSON en stdout")
+    ps.add_argument("--workers", type=int, help="Procesos del pool (0 = en línea, en orden)", default=0)
+    ps.add_argument("--max-inflight", type=int, help="Máximo de peticiones en vuelo", default=64)
+    ps.set_defaults(func=cmd_stream)
+
     p2 = sub.add_parser("classify-automaton", help="Clasificar autómata (JSON)")
     p2.add_argument("file")
     p2.set_defaults(func=cmd_classify_automaton)
@@ -65,8 +228,67 @@ def build_parser():
     p3 = sub.add_parser("regex-to-grammar", help="Convertir regex a gramática regular")
     p3.add_argument("regex")
     p3.add_argument("--out", help="Guardar gramática en archivo", default=None)
+    p3.add_argument("--minimize", action="store_true", help="Usar el DFA mínimo (Hopcroft) para generar la gramática")
     p3.set_defaults(func=cmd_regex_convert)
 
+    p4 = sub.add_parser("regex-search", help="Buscar una regex en archivos grandes (mmap + prefiltro de literales)")
+    p4.add_argument("regex", help="Los espacios cuentan; \\ escapa operadores (\\. \\| \\* \\( ...) y \\n es salto de línea; . es cualquier carácter salvo el salto de línea")
+    p4.add_argument("files", nargs="+")
+    p4.add_argument("--count", action="store_true", help="Solo imprimir el número de coincidencias")
+    p4.set_defaults(func=cmd_regex_search)
+
+    p5 = sub.add_parser("cyk", help="¿w ∈ L(G)? para una gramática libre de contexto (FNC + CYK)")
+    p5.add_argument("file", help="Ruta al archivo con reglas")
+    p5.add_argument("words", nargs="*", help="Cadenas a verificar")
+    p5.add_argument("--words-file", help="Archivo con una cadena por línea", default=None)
+    p5.add_argument("--show-cnf", action="store_true", help="Imprimir la gramática en FNC")
+    p5.set_defaults(func=cmd_cyk)
+
+    p6 = sub.add_parser("earley", help="Analizar cadenas con Earley (cuenta árboles de derivación)")
+    p6.add_argument("file", help="Ruta al archivo con reglas")
+    p6.add_argument("words", nargs="+", help="Cadenas a analizar")
+    p6.add_argument("--tree", action="store_true", help="Imprimir un árbol de derivación")
+    p6.set_defaults(func=cmd_earley)
+
+    p7 = sub.add_parser("ll1", help="FIRST/FOLLOW, conflictos LL(1) y análisis predictivo")
+    p7.add_argument("file", help="Ruta al archivo con reglas")
+    p7.add_argument("words", nargs="*", help="Cadenas a analizar (si es LL(1))")
+    p7.add_argument("--transform", action="store_true", help="Quitar recursión izquierda y factorizar antes")
+    p7.set_defaults(func=cmd_ll1)
+
+    p8 = sub.add_parser("lalr", help="Tablas LALR(1) (cacheadas en disco) y análisis por desplazamiento-reducción")
+    p8.add_argument("file", help="Ruta al archivo con reglas")
+    p8.add_argument("words", nargs="*", help="Cadenas a analizar (si es LALR(1))")
+    p8.add_argument("--no-cache", action="store_true", help="No leer ni escribir las tablas en disco")
+    p8.set_defaults(func=cmd_lalr)
+
+    p9 = sub.add_parser("lsh-index", help="Indexar gramáticas por similitud de lenguaje (MinHash + LSH)")
+    p9.add_argument("paths", nargs="+", help="Directorios, globs o archivos")
+    p9.add_argument("--index", help="Archivo del índice (se amplía si ya existe)", default="gramaticas.lsh")
+    p9.add_argument("--workers", type=int, help="Procesos del pool (por defecto: núcleos)", default=None)
+    p9.add_argument("--chunksize", type=int, help="Archivos por tarea enviada al pool", default=64)
+    p9.add_argument("--pattern", help="Filtro de archivos dentro de directorios", default="*.txt")
+    p9.add_argument("--num-perm", type=int, help="Valores MinHash por firma (índice nuevo)", default=128)
+    p9.add_argument("--bands", type=int, help="Bandas LSH; debe dividir a --num-perm (índice nuevo)", default=32)
+    p9.add_argument("--max-len", type=int, help="Longitud máxima de las cadenas muestreadas (índice nuevo)", default=8)
+    p9.set_defaults(func=cmd_lsh_index)
+
+    p10 = sub.add_parser("lsh-query", help="Las k gramáticas del índice más parecidas a una dada")
+    p10.add_argument("index", help="Archivo del índice")
+    p10.add_argument("file", help="Gramática (indexada o no)")
+    p10.add_argument("-k", type=int, help="Cuántas devolver", default=10)
+    p10.set_defaults(func=cmd_lsh_query)
+
+    p11 = sub.add_parser("derive", help="Buscar derivaciones en gramáticas de tipo 0/1 (reescritura con Aho–Corasick)")
+    p11.add_argument("file", help="Ruta al archivo con reglas")
+    p11.add_argument("word", nargs="?", help="Palabra cuya derivación buscar (sin ella: listar cadenas)", default=None)
+    p11.add_argument("--max-len", type=int, help="Longitud máxima de las cadenas listadas", default=6)
+    p11.add_argument("--max-steps", type=int, help="Formas sentenciales a expandir como mucho", default=100000)
+    p11.add_argument("--max-seconds", type=float, help="Tiempo máximo de búsqueda", default=None)
+    p11.add_argument("--max-memory-mb", type=float, help="Memoria aproximada máxima de formas visitadas", default=None)
+    p11.add_argument("--max-form-len", type=int, help="Descartar formas más largas (por defecto según la gramática)", default=None)
+    p11.set_defaults(func=cmd_derive)
+
     return p
 
 def main(argv=None):
@@ -0,0 +1,98 @@
+from typing import Dict, List, Sequence
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from .automata_parser import DFA
+
+class DenseDFA:
+    """DFA compilado a una matriz densa de transiciones para validar lotes de cadenas.
+
+    Filas = estados (más un estado muerto absorbente), columnas = símbolos (más una
+    columna para caracteres fuera del alfabeto, que lleva al muerto, y una de relleno
+    que deja el estado igual). Todo el lote avanza en paralelo: un paso vectorizado
+    por posición de carácter. Sin NumPy se usa un recorrido en Python equivalente.
+    """
+    def __init__(self, dfa: DFA):
+        bad = [a for a in dfa.alphabet if len(a) != 1]
+        if bad:
+            raise ValueError(f"Solo se admiten símbolos de un carácter: {sorted(bad)}")
+        known = set(dfa.states) | {dfa.start}
+        for (s, _), t in dfa.transitions.items():
+            known.update((s, t))
+        states = [dfa.start] + sorted(known - {dfa.start})
+        self.states = states
+        index = {q: i for i, q in enumerate(states)}
+        self.dead = len(states)
+        self.symbols = sorted(dfa.alphabet)
+        self.column: Dict[str, int] = {a: j for j, a in enumerate(self.symbols)}
+        self.unknown = len(self.symbols)
+        self.pad = self.unknown + 1
+        n, k = len(states) + 1, len(self.symbols) + 2
+        table = [[self.dead] * k for _ in range(n)]
+        for i in range(n):
+            table[i][self.pad] = i
+        for (s, a), t in dfa.transitions.items():
+            if a in self.column:
+                table[index[s]][self.column[a]] = index[t]
+        self.accepting = [q in dfa.accepts for q in states] + [False]
+        self._table = table
+        if np is not None:
+            dtype = np.int32 if n < 2**31 else np.int64
+            self.table = np.array(table, dtype=dtype)
+            self.accept_vec = np.array(self.accepting, dtype=bool)
+            # tabla de consulta: punto de código -> columna (crece bajo demanda)
+            size = max([256] + [ord(a) + 1 for a in self.symbols])
+            self._lut = np.full(size, self.unknown, dtype=self.table.dtype)
+            for a, j in self.column.items():
+                self._lut[ord(a)] = j
+
+    def accepts(self, word: str) -> bool:
+        q = 0
+        table, column, unknown = self._table, self.column, self.unknown
+        for ch in word:
+            q = table[q][column.get(ch, unknown)]
+        return self.accepting[q]
+
+    def _encode(self, words: Sequence[str]):
+        """Matriz (B, L) de columnas. Un arreglo 'U<L>' de NumPy rellena con NUL y se ve
+        como puntos de código uint32; las posiciones tras la longitud real de cada cadena
+        van a la columna de relleno, así que un NUL dentro de una cadena se trata como
+        cualquier otro carácter, igual que en accepts()."""
+        L = max(map(len, words), default=0)
+        if L == 0:
+            return np.zeros((len(words), 0), dtype=self.table.dtype)
+        cps = np.array(words, dtype=f"U{L}").view(np.uint32).reshape(len(words), L)
+        top = int(cps.max()) + 1
+        if top > len(self._lut):
+            lut = np.full(top, self.unknown, dtype=self.table.dtype)
+            lut[:len(self._lut)] = self._lut
+            self._lut = lut
+        codes = self._lut[cps]
+        lens = np.fromiter(map(len, words), dtype=np.intp, count=len(words))
+        codes[np.arange(L) >= lens[:, None]] = self.pad
+        return codes
+
+    def accepts_batch(self, words: Sequence[str], chunk: int = 65536) -> List[bool]:
+        """Pertenencia de cada cadena; procesa en bloques de `chunk` para acotar memoria."""
+        if np is None:
+            return [self.accepts(w) for w in words]
+        out = np.empty(len(words), dtype=bool)
+        flat = self.table.ravel()
+        k = self.table.shape[1]
+        for lo in range(0, len(words), chunk):
+            block = words[lo:lo + chunk]
+            # (L, B) contiguo: cada paso lee una fila; tabla aplanada: índice = estado*k + columna
+            codes = np.ascontiguousarray(self._encode(block).T)
+            cur = np.zeros(len(block), dtype=self.table.dtype)
+            for col in codes:
+                cur = flat[cur * k + col]
+            out[lo:lo + len(block)] = self.accept_vec[cur]
+        return out.tolist()
+
+def compile_dfa(dfa: DFA) -> DenseDFA:
+    return DenseDFA(dfa)
+
+def accepts_batch(dfa: DFA, words: Sequence[str]) -> List[bool]:
+    return DenseDFA(dfa).accepts_batch(words)
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
-from typing import Dict, Set, Tuple, List, Optional
+from typing import Dict, FrozenSet, Iterator, Sequence, Set, Tuple, List, Optional
 from collections import defaultdict, deque
+from functools import cached_property, lru_cache
+import threading
 
 EPS = None  # epsilon interno
 
@@ -63,77 +65,82 @@ def _to_postfix(regex: str) -> str:
         output.append(op)
     return ''.join(output)
 
-_counter = [0]
-def _new_state() -> int:
-    _counter[0] += 1
-    return _counter[0]
+class _Arena:
+    """Estados y aristas de todo el NFA en arreglos planos (src, sym, dst).
 
-def _nfa_single(c: str) -> NFA:
-    s = _new_state(); f = _new_state()
-    trans: Dict[Tuple[int, Optional[str]], Set[int]] = defaultdict(set)
-    trans[(s, c)].add(f)
-    return NFA(start=s, accepts={f}, trans=trans)
+    Los operadores de Thompson solo agregan estados y aristas; nunca copian las
+    transiciones acumuladas, así que construir el NFA es lineal en |regex|.
+    """
+    __slots__ = ("n", "src", "sym", "dst")
 
-def _append_trans(dst: Dict[Tuple[int, Optional[str]], Set[int]], src: Dict[Tuple[int, Optional[str]], Set[int]]):
-    for k, vs in src.items():
-        for v in vs:
-            dst[k].add(v)
+    def __init__(self):
+        self.n = 0  # numeración local a esta construcción
+        self.src: List[int] = []
+        self.sym: List[Optional[str]] = []
+        self.dst: List[int] = []
+
+    def new_state(self) -> int:
+        i = self.n
+        self.n += 1
+        return i
+
+    def edge(self, u: int, a: Optional[str], v: int) -> None:
+        self.src.append(u)
+        self.sym.append(a)
+        self.dst.append(v)
+
+    def to_trans(self) -> Dict[Tuple[int, Optional[str]], Set[int]]:
+        trans: Dict[Tuple[int, Optional[str]], Set[int]] = defaultdict(set)
+        for u, a, v in zip(self.src, self.sym, self.dst):
+            trans[(u, a)].add(v)
+        return trans
 
 def _thompson(postfix: str) -> NFA:
-    stack: List[NFA] = []
+    arena = _Arena()
+    start, accept = _thompson_into(arena, postfix)
+    return NFA(start=start, accepts={accept}, trans=arena.to_trans())
+
+def _thompson_into(arena: _Arena, postfix: str) -> Tuple[int, int]:
+    """Agrega al arena el fragmento de Thompson de `postfix` y devuelve (inicio, aceptación)."""
+    edge = arena.edge
+    new_state = arena.new_state
+    stack: List[Tuple[int, int]] = []  # fragmentos (inicio, aceptación)
     for token in postfix:
         if token not in {'|','.','*','+','?'}:
-            stack.append(_nfa_single(token))
+            s = new_state(); f = new_state()
+            edge(s, token, f)
+            stack.append((s, f))
             continue
         if token == '.':
-            n2 = stack.pop()
-            n1 = stack.pop()
-            trans = defaultdict(set)
-            _append_trans(trans, n1.trans)
-            _append_trans(trans, n2.trans)
-            for a in n1.accepts:
-                trans[(a, EPS)].add(n2.start)
-            stack.append(NFA(start=n1.start, accepts=set(n2.accepts), trans=trans))
+            s2, f2 = stack.pop()
+            s1, f1 = stack.pop()
+            edge(f1, EPS, s2)
+            stack.append((s1, f2))
         elif token == '|':
-            n2 = stack.pop()
-            n1 = stack.pop()
-            s = _new_state(); f = _new_state()
-            trans = defaultdict(set)
-            _append_trans(trans, n1.trans)
-            _append_trans(trans, n2.trans)
-            trans[(s, EPS)].update({n1.start, n2.start})
-            for a in n1.accepts:
-                trans[(a, EPS)].add(f)
-            for a in n2.accepts:
-                trans[(a, EPS)].add(f)
-            stack.append(NFA(start=s, accepts={f}, trans=trans))
+            s2, f2 = stack.pop()
+            s1, f1 = stack.pop()
+            s = new_state(); f = new_state()
+            edge(s, EPS, s1); edge(s, EPS, s2)
+            edge(f1, EPS, f); edge(f2, EPS, f)
+            stack.append((s, f))
         elif token == '*':
-            n1 = stack.pop()
-            s = _new_state(); f = _new_state()
-            trans = defaultdict(set)
-            _append_trans(trans, n1.trans)
-            trans[(s, EPS)].update({n1.start, f})
-            for a in n1.accepts:
-                trans[(a, EPS)].update({n1.start, f})
-            stack.append(NFA(start=s, accepts={f}, trans=trans))
+            s1, f1 = stack.pop()
+            s = new_state(); f = new_state()
+            edge(s, EPS, s1); edge(s, EPS, f)
+            edge(f1, EPS, s1); edge(f1, EPS, f)
+            stack.append((s, f))
         elif token == '+':
-            n1 = stack.pop()
-            s = _new_state(); f = _new_state()
-            trans = defaultdict(set)
-            _append_trans(trans, n1.trans)
-            trans[(s, EPS)].add(n1.start)
-            for a in n1.accepts:
-                trans[(a, EPS)].update({n1.start, f})
-            stack.append(NFA(start=s, accepts={f}, trans=trans))
+            s1, f1 = stack.pop()
+            s = new_state(); f = new_state()
+            edge(s, EPS, s1)
+            edge(f1, EPS, s1); edge(f1, EPS, f)
+            stack.append((s, f))
         elif token == '?':
-            n1 = stack.pop()
-            s = _new_state(); f = _new_state()
-            trans = defaultdict(set)
-            _append_trans(trans, n1.trans)
-            trans[(s, EPS)].update({n1.start, f})
-            for a in n1.accepts:
-                trans[(a, EPS)].add(f)
-            stack.append(NFA(start=s, accepts={f}, trans=trans))
+            s1, f1 = stack.pop()
+            s = new_state(); f = new_state()
+            edge(s, EPS, s1); edge(s, EPS, f)
+            edge(f1, EPS, f)
+            stack.append((s, f))
     if not stack:
         raise ValueError("Expresión vacía")
     if len(stack) != 1:
@@ -159,30 +166,250 @@ def _move(nfa: NFA, S: Set[int], sym: str) -> Set[int]:
     return R
 
 def nfa_from_regex(regex: str) -> NFA:
+    """NFA nuevo con estados numerados desde 0; no comparte estado con otras llamadas."""
     pf = _to_postfix(regex)
     return _thompson(pf)
 
+def _eps_closure_masks(n: int, succ: List[List[int]]) -> List[int]:
+    """ε-clausura de cada estado como máscara, en O(V+E) operaciones de máscara:
+    Tarjan entrega las componentes fuertemente conexas con sus sucesoras ya resueltas."""
+    closure = [0] * n
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    counter = 0
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        call = [(root, 0)]
+        while call:
+            v, pi = call[-1]
+            if pi < len(succ[v]):
+                call[-1] = (v, pi + 1)
+                w = succ[v][pi]
+                if index[w] < 0:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    call.append((w, 0))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+            call.pop()
+            if call:
+                u = call[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                members = []
+                mask = 0
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    members.append(w)
+                    mask |= 1 << w
+                    if w == v:
+                        break
+                for w in members:
+                    for x in succ[w]:
+                        if not mask >> x & 1:
+                            mask |= closure[x]
+                for w in members:
+                    closure[w] = mask
+    return closure
+
+class BitNFA:
+    """NFA indexado para determinizar con máscaras de bits.
+
+    Los estados se renumeran 0..n-1 y un conjunto de estados es un int. Las
+    ε-clausuras se calculan una sola vez y step[a][i] ya es la ε-clausura de los
+    destinos de i con el símbolo a, así que mover un conjunto es un OR de máscaras.
+    """
+    def __init__(self, nfa: NFA):
+        states = {nfa.start} | set(nfa.accepts)
+        for (q, _), dsts in nfa.trans.items():
+            states.add(q)
+            states |= dsts
+        order = sorted(states)
+        idx = {q: i for i, q in enumerate(order)}
+        n = len(order)
+        eps_succ: List[List[int]] = [[] for _ in range(n)]
+        sym_succ: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        for (q, sym), dsts in nfa.trans.items():
+            if sym is EPS:
+                eps_succ[idx[q]].extend(idx[d] for d in dsts)
+            else:
+                sym_succ[sym].setdefault(idx[q], []).extend(idx[d] for d in dsts)
+        closure = _eps_closure_masks(n, eps_succ)
+        self.order = order
+        self.index = idx
+        self.closure = closure
+        self.alphabet = sorted(sym_succ)
+        # step[a]: {i: máscara}, solo para estados con transición en a; has[a]: máscara de esos estados
+        self.step: Dict[str, Dict[int, int]] = {}
+        self.has: Dict[str, int] = {}
+        for a, succ in sym_succ.items():
+            table: Dict[int, int] = {}
+            has = 0
+            for i, dsts in succ.items():
+                m = 0
+                for j in dsts:
+                    m |= closure[j]
+                table[i] = m
+                has |= 1 << i
+            self.step[a] = table
+            self.has[a] = has
+        self.start_mask = closure[idx[nfa.start]]
+        self.accept_mask = 0
+        for q in nfa.accepts:
+            self.accept_mask |= 1 << idx[q]
+
+    def move(self, S: int, a: str) -> int:
+        """ε-clausura de los destinos de S con a."""
+        table = self.step.get(a)
+        if table is None:
+            return 0
+        m = S & self.has[a]
+        out = 0
+        while m:
+            low = m & -m
+            out |= table[low.bit_length() - 1]
+            m ^= low
+        return out
+
 def dfa_from_nfa(nfa: NFA) -> DFA:
-    alphabet = set(sym for (_, sym) in nfa.trans.keys() if sym is not EPS)
-    start_set = frozenset(_eps_closure(nfa, {nfa.start}))
-    idx = {start_set: 0}
-    queue = deque([start_set])
+    """Construcción de subconjuntos con conjuntos de estados como máscaras de bits."""
+    bn = BitNFA(nfa)
+    alphabet = bn.alphabet
+    idx = {bn.start_mask: 0}
+    queue = deque([bn.start_mask])
     trans: Dict[Tuple[int, str], int] = {}
     accepts: Set[int] = set()
     while queue:
         S = queue.popleft()
         s_idx = idx[S]
-        if any(q in nfa.accepts for q in S):
+        if S & bn.accept_mask:
             accepts.add(s_idx)
         for a in alphabet:
-            U = _eps_closure(nfa, _move(nfa, set(S), a))
-            F = frozenset(U)
-            if F not in idx:
-                idx[F] = len(idx)
+            F = bn.move(S, a)
+            t = idx.get(F)
+            if t is None:
+                t = idx[F] = len(idx)
                 queue.append(F)
-            trans[(s_idx, a)] = idx[F]
+            trans[(s_idx, a)] = t
     return DFA(start=0, accepts=accepts, trans=trans, alphabet=set(alphabet))
 
+def hopcroft_minimize(start, accepts, trans, alphabet) -> Tuple[List[List], Dict[Tuple[int, str], int], Set[int]]:
+    """Minimización de Hopcroft (O(n·k·log n)) sobre un DFA genérico.
+
+    Descarta estados inalcanzables y, tras minimizar, los estados muertos (desde los
+    que no se llega a aceptación); las transiciones hacia ellos se omiten. Devuelve
+    (bloques, trans, aceptación) con bloques numerados en BFS desde el inicial (0):
+    bloques[i] es la lista de estados originales fusionados en el estado i.
+    """
+    order = [start]
+    seen = {start}
+    for q in order:
+        for a in alphabet:
+            t = trans.get((q, a))
+            if t is not None and t not in seen:
+                seen.add(t)
+                order.append(t)
+    idx = {q: i for i, q in enumerate(order)}
+    n = len(order)
+    sink = n  # sumidero implícito para completar el DFA
+    syms = sorted(alphabet)
+    delta = [[sink] * len(syms) for _ in range(n + 1)]
+    inv = [[[] for _ in range(n + 1)] for _ in syms]
+    for i, q in enumerate(order):
+        for k, a in enumerate(syms):
+            t = trans.get((q, a))
+            if t is not None:
+                delta[i][k] = idx[t]
+    for i in range(n + 1):
+        for k in range(len(syms)):
+            inv[k][delta[i][k]].append(i)
+
+    acc = [i < n and order[i] in accepts for i in range(n + 1)]
+    blocks = [b for b in ({i for i in range(n + 1) if acc[i]}, {i for i in range(n + 1) if not acc[i]}) if b]
+    block_of = [0] * (n + 1)
+    for b, members in enumerate(blocks):
+        for i in members:
+            block_of[i] = b
+    work = list(range(len(blocks)))
+    while work:
+        splitter = list(blocks[work.pop()])
+        for k in range(len(syms)):
+            touched: Dict[int, List[int]] = {}
+            for q in splitter:
+                for p in inv[k][q]:
+                    touched.setdefault(block_of[p], []).append(p)
+            for b, members in touched.items():
+                Y = blocks[b]
+                if len(members) == len(Y):
+                    continue
+                new = set(members)
+                if 2 * len(new) > len(Y):
+                    new = Y - new
+                Y -= new
+                nb = len(blocks)
+                blocks.append(new)
+                for p in new:
+                    block_of[p] = nb
+                # Siempre se encola la mitad pequeña (si Y ya estaba, ambas quedan en cola)
+                work.append(nb)
+
+    # Bloques vivos: los que alcanzan aceptación
+    nb = len(blocks)
+    rev: List[Set[int]] = [set() for _ in range(nb)]
+    for i in range(n + 1):
+        for k in range(len(syms)):
+            rev[block_of[delta[i][k]]].add(block_of[i])
+    live = {block_of[i] for i in range(n + 1) if acc[i]}
+    stack = list(live)
+    while stack:
+        b = stack.pop()
+        for c in rev[b]:
+            if c not in live:
+                live.add(c)
+                stack.append(c)
+
+    start_b = block_of[0]
+    if start_b not in live:
+        return [list(order)], {}, set()
+    new_id = {start_b: 0}
+    queue = deque([start_b])
+    rep = {start_b: next(iter(blocks[start_b]))}
+    new_trans: Dict[Tuple[int, str], int] = {}
+    while queue:
+        b = queue.popleft()
+        r = rep[b]
+        for k, a in enumerate(syms):
+            c = block_of[delta[r][k]]
+            if c not in live:
+                continue
+            if c not in new_id:
+                new_id[c] = len(new_id)
+                rep[c] = next(iter(blocks[c]))
+                queue.append(c)
+            new_trans[(new_id[b], a)] = new_id[c]
+    groups: List[List] = [[] for _ in new_id]
+    for b, i in new_id.items():
+        groups[i] = [order[q] for q in sorted(blocks[b]) if q != sink]
+    new_accepts = {i for b, i in new_id.items() if acc[rep[b]]}
+    return groups, new_trans, new_accepts
+
+def minimize_dfa(dfa: DFA) -> DFA:
+    """DFA mínimo equivalente (parcial: sin estado muerto), con estados 0..n-1."""
+    _, trans, accepts = hopcroft_minimize(dfa.start, dfa.accepts, dfa.trans, dfa.alphabet)
+    return DFA(start=0, accepts=accepts, trans=trans, alphabet=set(dfa.alphabet))
+
 def regular_grammar_from_dfa(dfa: DFA):
     # Gramática lineal derecha A_i -> a A_j | ε
     states = set([dfa.start]) | set(s for (s,_) in dfa.trans.keys()) | set(dfa.trans.values()) | set(dfa.accepts)
@@ -194,3 +421,256 @@ def regular_grammar_from_dfa(dfa: DFA):
     for q in dfa.accepts:
         prods.append((name[q], 'ε'))
     return start, prods
+
+class LazyDFA:
+    """DFA construido bajo demanda sobre un BitNFA, con caché de estados acotada.
+
+    Solo se determinizan los estados y transiciones que la entrada realmente usa.
+    Cuando la caché llega a `max_states` se vacía entera (como en RE2) y se sigue
+    desde el estado actual, así que la memoria queda acotada y cada carácter cuesta
+    a lo sumo un paso de subconjuntos: la pertenencia es lineal en |texto| para
+    cualquier patrón. Un candado por llamada lo hace seguro entre hilos.
+    """
+    def __init__(self, nfa: NFA, max_states: int = 4096):
+        self.bn = BitNFA(nfa)
+        self.max_states = max(2, max_states)
+        self.flushes = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._ids: Dict[int, int] = {}
+        self._masks: List[int] = []
+        self._trans: List[Dict[str, int]] = []
+        self._accepting: List[bool] = []
+
+    def _add(self, mask: int) -> int:
+        q = self._ids.get(mask)
+        if q is None:
+            q = self._ids[mask] = len(self._masks)
+            self._masks.append(mask)
+            self._trans.append({})
+            self._accepting.append(bool(mask & self.bn.accept_mask))
+        return q
+
+    def _step(self, q: int, ch: str) -> Tuple[int, int]:
+        """Calcula y memoriza la transición (q, ch). Devuelve (q, destino) porque un
+        vaciado de caché renumera el estado actual; destino -1 = estado muerto."""
+        mask = self.bn.move(self._masks[q], ch)
+        if not mask:
+            self._trans[q][ch] = -1
+            return q, -1
+        t = self._ids.get(mask)
+        if t is None:
+            if len(self._masks) >= self.max_states:
+                cur = self._masks[q]
+                self._reset()
+                self.flushes += 1
+                q = self._add(cur)
+            t = self._add(mask)
+        self._trans[q][ch] = t
+        return q, t
+
+    def fullmatch(self, text: str) -> bool:
+        with self._lock:
+            q = self._add(self.bn.start_mask)
+            for ch in text:
+                t = self._trans[q].get(ch)
+                if t is None:
+                    q, t = self._step(q, ch)
+                if t < 0:
+                    return False
+                q = t
+            return self._accepting[q]
+
+    def longest_match(self, text, pos: int = 0, end: Optional[int] = None) -> int:
+        """Fin de la coincidencia más larga que empieza en `pos` (o -1). `text` solo
+        necesita text[i] -> carácter, así que sirve cualquier vista indexable."""
+        if end is None:
+            end = len(text)
+        with self._lock:
+            q = self._add(self.bn.start_mask)
+            last = pos if self._accepting[q] else -1
+            for i in range(pos, end):
+                ch = text[i]
+                t = self._trans[q].get(ch)
+                if t is None:
+                    q, t = self._step(q, ch)
+                if t < 0:
+                    break
+                q = t
+                if self._accepting[q]:
+                    last = i + 1
+            return last
+
+    def cached_states(self) -> int:
+        return len(self._masks)
+
+class CompiledRegex:
+    """Regex compilada (como re.Pattern). `fullmatch` usa un DFA perezoso; el DFA
+    mínimo completo (`dfa`) solo se construye si se pide."""
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.nfa = nfa_from_regex(pattern)
+
+    @cached_property
+    def dfa(self) -> DFA:
+        return minimize_dfa(dfa_from_nfa(self.nfa))
+
+    @cached_property
+    def lazy(self) -> LazyDFA:
+        return LazyDFA(self.nfa)
+
+    def fullmatch(self, text: str) -> bool:
+        """Pertenencia con el DFA perezoso: no hay explosión de subconjuntos."""
+        return self.lazy.fullmatch(text)
+
+    def __repr__(self) -> str:
+        return f"CompiledRegex({self.pattern!r})"
+
+_MAXCACHE = 512
+
+@lru_cache(maxsize=_MAXCACHE)
+def compile(regex: str) -> CompiledRegex:
+    """Compila y memoriza por patrón (LRU acotado, seguro entre hilos). Las construcciones
+    no comparten estado global, así que se puede llamar desde varios hilos a la vez."""
+    return CompiledRegex(regex)
+
+def purge() -> None:
+    """Vacía la caché de patrones compilados."""
+    compile.cache_clear()
+
+@dataclass
+class TaggedDFA(DFA):
+    """DFA de la unión de varios patrones; tags[q] = ids de los patrones que aceptan en q."""
+    tags: Dict[int, FrozenSet[int]]
+
+def multi_nfa(patterns: Sequence[str]) -> Tuple[NFA, Dict[int, int]]:
+    """NFA de la unión (un inicio con ε a cada patrón) y {estado de aceptación: id}."""
+    arena = _Arena()
+    start = arena.new_state()
+    owner: Dict[int, int] = {}
+    for pid, regex in enumerate(patterns):
+        s, f = _thompson_into(arena, _to_postfix(regex))
+        arena.edge(start, EPS, s)
+        owner[f] = pid
+    return NFA(start=start, accepts=set(owner), trans=arena.to_trans()), owner
+
+class _TaggedLazyDFA(LazyDFA):
+    """LazyDFA que además guarda, por estado, los ids de patrones que aceptan."""
+    def __init__(self, nfa: NFA, owner: Dict[int, int], max_states: int = 4096):
+        self._bit_owner: List[Tuple[int, int]] = []
+        super().__init__(nfa, max_states)
+        self._bit_owner = [(1 << self.bn.index[q], pid) for q, pid in sorted(owner.items(), key=lambda x: x[1])]
+
+    def _reset(self) -> None:
+        super()._reset()
+        self._tags: List[Tuple[int, ...]] = []
+
+    def tags_of(self, mask: int) -> Tuple[int, ...]:
+        return tuple(pid for bit, pid in self._bit_owner if mask & bit) if mask & self.bn.accept_mask else ()
+
+    def _add(self, mask: int) -> int:
+        q = self._ids.get(mask)
+        if q is None:
+            q = super()._add(mask)
+            self._tags.append(self.tags_of(mask))
+        return q
+
+    def scan(self, text, pos: int = 0, end: Optional[int] = None) -> List[Tuple[int, Tuple[int, ...]]]:
+        """Recorre text[pos:end] desde el inicio y devuelve (fin, ids) de cada posición
+        de aceptación, incluida la vacía. Se detiene en el estado muerto."""
+        if end is None:
+            end = len(text)
+        out: List[Tuple[int, Tuple[int, ...]]] = []
+        with self._lock:
+            q = self._add(self.bn.start_mask)
+            if self._tags[q]:
+                out.append((pos, self._tags[q]))
+            for i in range(pos, end):
+                ch = text[i]
+                t = self._trans[q].get(ch)
+                if t is None:
+                    q, t = self._step(q, ch)
+                if t < 0:
+                    break
+                q = t
+                if self._tags[q]:
+                    out.append((i + 1, self._tags[q]))
+        return out
+
+class PatternSet:
+    """Varios patrones compilados en un solo autómata con estados etiquetados.
+
+    Cada entrada se recorre una vez para todos los patrones: el estado del DFA de la
+    unión dice qué patrones aceptan en cada posición. El DFA es perezoso (como
+    LazyDFA), así que cientos de patrones no obligan a construir todos los
+    subconjuntos; `to_dfa()` da el DFA etiquetado completo si se necesita.
+    """
+    def __init__(self, patterns: Sequence[str], max_states: int = 4096):
+        self.patterns = list(patterns)
+        self.nfa, self._owner = multi_nfa(self.patterns)
+        self._lazy = _TaggedLazyDFA(self.nfa, self._owner, max_states)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def matches(self, text: str) -> List[int]:
+        """Ids de los patrones que reconocen `text` completo."""
+        hits = self._lazy.scan(text)
+        return list(hits[-1][1]) if hits and hits[-1][0] == len(text) else []
+
+    def match(self, text: str, pos: int = 0) -> Optional[Tuple[int, List[int]]]:
+        """Coincidencia más larga que empieza en `pos`: (fin, ids) o None."""
+        hits = self._lazy.scan(text, pos)
+        return (hits[-1][0], list(hits[-1][1])) if hits else None
+
+    def finditer(self, text: str, overlapping: bool = False) -> Iterator[Tuple[int, int, List[int]]]:
+        """(inicio, fin, ids) de las coincidencias no vacías.
+
+        overlapping=False: más a la izquierda y más larga, sin solaparse (ids = los
+        patrones que reconocen exactamente ese tramo). overlapping=True: todos los pares
+        (inicio, fin) en que algún patrón reconoce text[inicio:fin].
+        """
+        pos, n = 0, len(text)
+        while pos < n:
+            if overlapping:
+                for e, ids in self._lazy.scan(text, pos):
+                    if e > pos:
+                        yield pos, e, list(ids)
+                pos += 1
+                continue
+            m = self.match(text, pos)
+            if m is not None and m[0] > pos:
+                yield pos, m[0], m[1]
+                pos = m[0]
+            else:
+                pos += 1
+
+    def findall(self, text: str, overlapping: bool = False) -> List[Tuple[str, List[int]]]:
+        return [(text[s:e], ids) for s, e, ids in self.finditer(text, overlapping)]
+
+    def to_dfa(self) -> TaggedDFA:
+        """DFA completo de la unión por subconjuntos, con las etiquetas de cada estado."""
+        bn = self._lazy.bn
+        idx = {bn.start_mask: 0}
+        queue = deque([bn.start_mask])
+        trans: Dict[Tuple[int, str], int] = {}
+        tags: Dict[int, FrozenSet[int]] = {}
+        while queue:
+            S = queue.popleft()
+            s_idx = idx[S]
+            ids = self._lazy.tags_of(S)
+            if ids:
+                tags[s_idx] = frozenset(ids)
+            for a in bn.alphabet:
+                F = bn.move(S, a)
+                t = idx.get(F)
+                if t is None:
+                    t = idx[F] = len(idx)
+                    queue.append(F)
+                trans[(s_idx, a)] = t
+        return TaggedDFA(start=0, accepts=set(tags), trans=trans, alphabet=set(bn.alphabet), tags=tags)
+
+def compile_many(patterns: Sequence[str], max_states: int = 4096) -> PatternSet:
+    return PatternSet(patterns, max_states)
@@ -0,0 +1,368 @@
+import mmap
+from dataclasses import dataclass
+from typing import FrozenSet, Iterator, List, Optional, Tuple
+from .regex_automata import NFA, LazyDFA, EPS, _Arena
+
+# Límites del análisis de literales: conjuntos más grandes no sirven como filtro
+_MAX_SET = 16
+_MAX_LIT = 64
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+# '.' = un carácter UTF-8 salvo '\n': bytes iniciales de 1, 2, 3 y 4 bytes, y de continuación
+_UTF8_LEADS = ([b for b in range(0x80) if b != 0x0A], range(0xC2, 0xE0), range(0xE0, 0xF0), range(0xF0, 0xF5))
+_UTF8_CONT = range(0x80, 0xC0)
+
+def _tokenize(regex: str) -> List[tuple]:
+    """Tokens del dialecto de búsqueda: ("lit", c), ("any",) u ("op", c).
+
+    A diferencia de regex_automata, los espacios son literales y '\\' escapa cualquier
+    carácter no alfanumérico ('\\.', '\\ ', '\\|', '\\*', '\\(', '\\\\', ...); además
+    '\\n', '\\t' y '\\r'. '.' es cualquier carácter salvo el salto de línea.
+    """
+    tokens: List[tuple] = []
+    i = 0
+    while i < len(regex):
+        c = regex[i]
+        if c == '\\':
+            if i + 1 == len(regex):
+                raise ValueError("Escape incompleto al final de la regex")
+            e = regex[i + 1]
+            if e in _ESCAPES:
+                tokens.append(("lit", _ESCAPES[e]))
+            elif e.isalnum():
+                raise ValueError(f"Escape no soportado: \\{e}")
+            else:
+                tokens.append(("lit", e))
+            i += 2
+            continue
+        if c == '.':
+            tokens.append(("any",))
+        elif c in '|*+?()':
+            tokens.append(("op", c))
+        else:
+            tokens.append(("lit", c))
+        i += 1
+    return tokens
+
+# AST: ("lit", c) | ("any",) | ("cat", a, b) | ("alt", a, b) | ("star", a) | ("plus", a) | ("opt", a)
+def parse_regex(regex: str) -> tuple:
+    """AST de la regex de búsqueda (tokens de _tokenize, concatenación implícita)."""
+    out: List[tuple] = []
+    ops: List[str] = []
+
+    def reduce(op: str) -> None:
+        if len(out) < 2:
+            raise ValueError("Regex mal formada")
+        b = out.pop(); a = out.pop()
+        out.append(("cat" if op == '.' else "alt", a, b))
+
+    operand = False  # ¿lo anterior cierra un operando? (entonces hay concatenación implícita)
+    for tok in _tokenize(regex):
+        op = tok[1] if tok[0] == "op" else None
+        if op in ('*', '+', '?'):
+            if not operand:
+                raise ValueError("Regex mal formada")
+            out.append(({'*': "star", '+': "plus", '?': "opt"}[op], out.pop()))
+        elif op == ')':
+            while ops and ops[-1] != '(':
+                reduce(ops.pop())
+            if not ops:
+                raise ValueError("Paréntesis desbalanceados")
+            ops.pop()
+            operand = True
+        elif op == '|':
+            while ops and ops[-1] != '(':
+                reduce(ops.pop())
+            ops.append('|')
+            operand = False
+        else:
+            if operand:
+                while ops and ops[-1] == '.':
+                    reduce(ops.pop())
+                ops.append('.')
+            if op == '(':
+                ops.append('(')
+                operand = False
+            else:
+                out.append(tok)
+                operand = True
+    while ops:
+        op = ops.pop()
+        if op == '(':
+            raise ValueError("Paréntesis desbalanceados")
+        reduce(op)
+    if not out:
+        raise ValueError("Expresión vacía")
+    if len(out) != 1:
+        raise ValueError("Regex mal formada")
+    return out[0]
+
+def _byte_nfa(ast: tuple) -> NFA:
+    """Thompson sobre el AST en bytes: cada literal pasa a su secuencia UTF-8 (un carácter
+    latin-1 por byte), así el DFA recorre directamente el contenido del archivo."""
+    arena = _Arena()
+    edge, new_state = arena.edge, arena.new_state
+
+    def build(node: tuple) -> Tuple[int, int]:
+        kind = node[0]
+        if kind == "cat":
+            s1, f1 = build(node[1])
+            s2, f2 = build(node[2])
+            edge(f1, EPS, s2)
+            return s1, f2
+        s, f = new_state(), new_state()
+        if kind == "lit":
+            bs = node[1].encode("utf-8")
+            q = s
+            for b in bs[:-1]:
+                nq = new_state()
+                edge(q, chr(b), nq)
+                q = nq
+            edge(q, chr(bs[-1]), f)
+        elif kind == "any":
+            rest = [f] + [new_state() for _ in range(3)]  # rest[k]: faltan k bytes de continuación
+            for k in (1, 2, 3):
+                for b in _UTF8_CONT:
+                    edge(rest[k], chr(b), rest[k - 1])
+            for k, leads in enumerate(_UTF8_LEADS):
+                for b in leads:
+                    edge(s, chr(b), rest[k])
+        elif kind == "alt":
+            for sub in node[1:]:
+                s1, f1 = build(sub)
+                edge(s, EPS, s1); edge(f1, EPS, f)
+        else:
+            s1, f1 = build(node[1])
+            edge(s, EPS, s1); edge(f1, EPS, f)
+            if kind in ("star", "plus"):
+                edge(f1, EPS, s1)
+            if kind in ("star", "opt"):
+                edge(s, EPS, f)
+        return s, f
+
+    start, accept = build(ast)
+    return NFA(start=start, accepts={accept}, trans=arena.to_trans())
+
+@dataclass(frozen=True)
+class _Info:
+    """Lo que se sabe de las coincidencias de un subárbol (cadenas en bytes).
+
+    exact: todas las coincidencias posibles (None si son demasiadas o infinitas).
+    prefix / suffix: toda coincidencia empieza / termina con alguna de estas.
+    factor: toda coincidencia contiene alguna de estas.
+    Un conjunto que contiene b"" no aporta información.
+    """
+    exact: Optional[FrozenSet[bytes]]
+    prefix: FrozenSet[bytes]
+    suffix: FrozenSet[bytes]
+    factor: FrozenSet[bytes]
+    min_len: int
+    max_len: Optional[int]
+
+_ANY = frozenset([b""])
+
+def _bounded(s: FrozenSet[bytes]) -> FrozenSet[bytes]:
+    if len(s) > _MAX_SET or any(len(x) > _MAX_LIT for x in s):
+        return _ANY
+    return s
+
+def _cross(a: FrozenSet[bytes], b: FrozenSet[bytes]) -> FrozenSet[bytes]:
+    if len(a) * len(b) > _MAX_SET:
+        return _ANY
+    return _bounded(frozenset(x + y for x in a for y in b))
+
+def _score(s: FrozenSet[bytes]) -> Tuple[int, int]:
+    """Mejor filtro = literal más corto del conjunto más largo, luego menos alternativas."""
+    return (min(map(len, s)) if s else 0, -len(s))
+
+def _best(*sets: FrozenSet[bytes]) -> FrozenSet[bytes]:
+    return max(sets, key=_score)
+
+def _union(a: FrozenSet[bytes], b: FrozenSet[bytes]) -> FrozenSet[bytes]:
+    return _ANY if b"" in a or b"" in b else _bounded(a | b)
+
+def _info(node: tuple) -> _Info:
+    kind = node[0]
+    if kind == "lit":
+        s = frozenset([node[1].encode("utf-8")])
+        n = len(next(iter(s)))
+        return _Info(s, s, s, s, n, n)
+    if kind == "any":
+        return _Info(None, _ANY, _ANY, _ANY, 1, 4)
+    a = _info(node[1])
+    if kind == "cat":
+        b = _info(node[2])
+        exact = None
+        if a.exact is not None and b.exact is not None and len(a.exact) * len(b.exact) <= _MAX_SET:
+            exact = _bounded(frozenset(x + y for x in a.exact for y in b.exact))
+            exact = None if exact is _ANY else exact
+        prefix = _cross(a.exact, b.prefix) if a.exact is not None else a.prefix
+        suffix = _cross(a.suffix, b.exact) if b.exact is not None else b.suffix
+        prefix = _best(prefix, a.prefix)
+        suffix = _best(suffix, b.suffix)
+        factor = _best(a.factor, b.factor, _cross(a.suffix, b.prefix), prefix, suffix,
+                       exact if exact is not None else _ANY)
+        max_len = None if a.max_len is None or b.max_len is None else a.max_len + b.max_len
+        return _Info(exact, prefix, suffix, factor, a.min_len + b.min_len, max_len)
+    if kind == "alt":
+        b = _info(node[2])
+        exact = None
+        if a.exact is not None and b.exact is not None:
+            exact = _bounded(a.exact | b.exact)
+            exact = None if exact is _ANY else exact
+        max_len = None if a.max_len is None or b.max_len is None else max(a.max_len, b.max_len)
+        return _Info(exact, _union(a.prefix, b.prefix), _union(a.suffix, b.suffix),
+                     _union(a.factor, b.factor), min(a.min_len, b.min_len), max_len)
+    if kind == "plus":
+        return _Info(None, a.prefix, a.suffix, a.factor, a.min_len, None)
+    if kind == "opt":
+        exact = _bounded(a.exact | {b""}) if a.exact is not None else None
+        return _Info(None if exact is _ANY else exact, _ANY, _ANY, _ANY, 0, a.max_len)
+    return _Info(None, _ANY, _ANY, _ANY, 0, None)  # star
+
+def required_literals(regex: str) -> List[bytes]:
+    """Literales de los que toda coincidencia no vacía contiene al menos uno
+    ([] si no hay ninguno útil como filtro)."""
+    f = _info(parse_regex(regex)).factor
+    return [] if b"" in f else sorted(f)
+
+class _Latin1View:
+    """Vista de bytes como caracteres latin-1 (lo que espera el DFA), sin copiar."""
+    __slots__ = ("buf",)
+
+    def __init__(self, buf):
+        self.buf = buf
+
+    def __getitem__(self, i: int) -> str:
+        return chr(self.buf[i])
+
+    def __len__(self) -> int:
+        return len(self.buf)
+
+class Scanner:
+    """Búsqueda de una regex en bytes (o un mmap) con prefiltro de literales.
+
+    Las coincidencias son las más a la izquierda y, entre ellas, las más largas; no se
+    solapan y las vacías se omiten. Con un literal obligatorio se salta con `find`
+    hasta cada aparición y el DFA solo corre en la ventana que la rodea: si la
+    coincidencia tiene largo acotado M, los inicios a menos de M bytes; si no, la
+    línea que la contiene (cuando el patrón no puede cruzar un salto de línea, es
+    decir, si no tiene '\\n').
+    """
+    def __init__(self, pattern: str, max_states: int = 4096):
+        self.pattern = pattern
+        ast = parse_regex(pattern)
+        info = _info(ast)
+        self.literals: List[bytes] = [] if b"" in info.factor else sorted(info.factor)
+        self.max_len = info.max_len
+        self.dfa = LazyDFA(_byte_nfa(ast), max_states=max_states)
+        self.multiline = "\n" in self.dfa.bn.alphabet
+        self._first = {ord(c) for c in self.dfa.bn.alphabet if self.dfa.bn.move(self.dfa.bn.start_mask, c)}
+
+    def _scan(self, buf, view, lo: int, hi: int, limit: int) -> Optional[Tuple[int, int]]:
+        """Primera coincidencia no vacía con inicio en [lo, hi) y fin <= limit."""
+        first, longest = self._first, self.dfa.longest_match
+        for s in range(lo, hi):
+            if buf[s] in first:
+                e = longest(view, s, limit if self.max_len is None else min(limit, s + self.max_len))
+                if e > s:
+                    return s, e
+        return None
+
+    def _next_literal(self, buf, nxt: List[int], pos: int, end: int) -> Tuple[int, int]:
+        """Posición de la próxima aparición de algún literal (o -1) y su largo. `nxt`
+        guarda la última aparición hallada de cada literal; solo se vuelve a buscar la
+        de los que quedaron atrás, así un literal ausente no se rebusca hasta el final."""
+        best, blen = -1, 0
+        for i, lit in enumerate(self.literals):
+            p = nxt[i]
+            if p != -1 and p < pos:
+                p = nxt[i] = buf.find(lit, pos, end)
+            if p >= 0 and (best < 0 or p < best):
+                best, blen = p, len(lit)
+        return best, blen
+
+    def finditer(self, buf, pos: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """(inicio, fin) de cada coincidencia en buf[pos:end]."""
+        end = len(buf) if end is None else end
+        view = _Latin1View(buf)
+        if not self.literals:
+            if self.multiline:
+                while pos < end:
+                    m = self._scan(buf, view, pos, end, end)
+                    if m is None:
+                        return
+                    yield m
+                    pos = m[1]
+                return
+            while pos < end:
+                nl = buf.find(b"\n", pos, end)
+                line_end = end if nl < 0 else nl
+                while pos < line_end:
+                    m = self._scan(buf, view, pos, line_end, line_end)
+                    if m is None:
+                        break
+                    yield m
+                    pos = m[1]
+                pos = line_end + 1
+            return
+        minlit = min(map(len, self.literals))
+        nxt = [-2] * len(self.literals)  # -2 = sin buscar, -1 = ya no aparece
+        tried = pos  # inicios < tried ya se probaron
+        while pos < end:
+            p, n = self._next_literal(buf, nxt, pos, end)
+            if p < 0:
+                return
+            if self.max_len is not None:
+                # toda coincidencia que contiene un literal en p empieza en [p+|lit|-M, p]
+                lo, hi, limit = max(tried, p + minlit - self.max_len), p + 1, end
+            elif not self.multiline:
+                nl = buf.rfind(b"\n", pos, p)
+                lo = max(tried, nl + 1)
+                nl = buf.find(b"\n", p, end)
+                limit = end if nl < 0 else nl
+                hi = limit
+            else:
+                lo, hi, limit = tried, p + 1, end
+            m = self._scan(buf, view, lo, hi, limit)
+            if m is not None:
+                yield m
+                pos = tried = m[1]
+            else:
+                tried = max(tried, hi)
+                pos = max(p + 1, tried) if self.max_len is None and not self.multiline else p + 1
+
+    def search(self, buf, pos: int = 0, end: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        return next(self.finditer(buf, pos, end), None)
+
+    def findall(self, buf, pos: int = 0, end: Optional[int] = None) -> List[bytes]:
+        return [bytes(buf[s:e]) for s, e in self.finditer(buf, pos, end)]
+
+def _open_map(path: str):
+    with open(path, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # archivo vacío: mmap no admite longitud 0
+            return None
+
+def finditer_file(pattern: str, path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """Recorre el archivo por mmap (no se carga en memoria) y da (inicio, fin, texto)."""
+    scanner = Scanner(pattern)
+    mm = _open_map(path)
+    if mm is None:
+        return
+    with mm:
+        for s, e in scanner.finditer(mm):
+            yield s, e, mm[s:e]
+
+def search_file(pattern: str, path: str) -> Optional[Tuple[int, int, bytes]]:
+    return next(finditer_file(pattern, path), None)
+
+def findall_file(pattern: str, path: str) -> List[bytes]:
+    return [m for _, _, m in finditer_file(pattern, path)]
+
+def search(pattern: str, data: bytes) -> Optional[Tuple[int, int]]:
+    return Scanner(pattern).search(data)
+
+def findall(pattern: str, data: bytes) -> List[bytes]:
+    return Scanner(pattern).findall(data)
@@ -0,0 +1,235 @@
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+from .grammar_parser import Grammar
+from .utils import EPSILON, is_nonterminal, tokenize_rhs
+
+_FORM_OVERHEAD = 72  # bytes aproximados por forma visitada además de sus símbolos (objeto + conjunto)
+
+class AhoCorasick:
+    """Autómata de Aho–Corasick sobre secuencias de enteros: una sola pasada encuentra
+    todas las apariciones de todos los patrones, también las solapadas."""
+    def __init__(self, patterns: Sequence[Sequence[int]]):
+        self.goto: List[Dict[int, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[Tuple[Tuple[int, int], ...]] = [()]  # (patrón, longitud) que acaban aquí
+        for p, pat in enumerate(patterns):
+            s = 0
+            for x in pat:
+                nxt = self.goto[s].get(x)
+                if nxt is None:
+                    nxt = self.goto[s][x] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                s = nxt
+            self.out[s] += ((p, len(pat)),)
+        # enlaces de fallo por BFS; las salidas heredan las del estado de fallo
+        work = deque(self.goto[0].values())
+        while work:
+            s = work.popleft()
+            for x, t in self.goto[s].items():
+                f = self.fail[s]
+                while f and x not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[t] = self.goto[f].get(x, 0)
+                self.out[t] += self.out[self.fail[t]]
+                work.append(t)
+
+    def matches(self, seq: Sequence[int]) -> Iterator[Tuple[int, int, int]]:
+        """(inicio, patrón, longitud) de cada aparición en seq."""
+        goto, fail, out = self.goto, self.fail, self.out
+        s = 0
+        for i, x in enumerate(seq):
+            while s and x not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(x, 0)
+            for p, n in out[s]:
+                yield i - n + 1, p, n
+
+def has_context_rules(g: Grammar) -> bool:
+    """¿Alguna regla tiene un LHS que no es un único no terminal ("AB", "aB", "A B")?
+    Esas reglas solo las expande RewriteEngine."""
+    c = g.compiled
+    return any(not (len(rule.lhs_syms) == 1 and c.is_nt[rule.lhs_syms[0]]) for rule in c.rules)
+
+@dataclass(frozen=True)
+class DerivationSearch:
+    strings: FrozenSet[str]            # cadenas terminales halladas (longitud ≤ max_len)
+    derivation: Optional[Tuple[str, ...]]  # formas sentenciales hasta la palabra buscada
+    complete: bool       # se recorrió todo el espacio acotado sin agotar presupuestos
+    exact: bool          # complete y la cota de longitud no pierde nada (gramática no contráctil)
+    stopped: Optional[str]  # "pasos" | "tiempo" | "memoria" si se cortó
+    steps: int           # formas expandidas
+    forms: int           # formas distintas vistas
+
+class RewriteEngine:
+    """Búsqueda de derivaciones para gramáticas de tipo 0/1 como sistema de reescritura.
+
+    Los LHS son secuencias de símbolos como los cuerpos ("aB" -> a B), así que sirven
+    reglas como AB -> BA o aB -> Ba. Un autómata de Aho–Corasick con todos los LHS da
+    en una sola pasada cada posición donde se puede aplicar alguna regla. Las formas sentenciales
+    se guardan como bytes (un símbolo por byte si caben), que se cortan, concatenan y
+    comparan en C, y el BFS lleva un conjunto de formas visitadas con presupuestos de
+    pasos, tiempo y memoria.
+    """
+    def __init__(self, g: Grammar):
+        c = g.compiled
+        self.symbols: List[str] = list(c.symbols)
+        ids = dict(c.ids)
+
+        def intern(tok: str) -> int:
+            i = ids.get(tok)
+            if i is None:
+                i = ids[tok] = len(self.symbols)
+                self.symbols.append(tok)
+            return i
+
+        patterns: Dict[Tuple[int, ...], List[Tuple[int, ...]]] = {}
+        for rule in c.rules:
+            lhs = rule.lhs_syms
+            if not lhs:
+                raise ValueError(f"LHS vacío en la regla '{rule.lhs} -> {' | '.join(rule.alt_texts)}'")
+            bodies = patterns.setdefault(lhs, [])
+            for toks in rule.alts:
+                body = tuple(t for t in toks if t != c.epsilon)
+                if body not in bodies:
+                    bodies.append(body)
+        self.start = tuple(intern(t) for t in tokenize_rhs(g.start) if t != EPSILON)
+        self.is_nt = [is_nonterminal(s) for s in self.symbols]
+        n = len(self.symbols)
+        self.code = "B" if n <= 0xFF else "H" if n <= 0xFFFF else "I"
+        self.width = array(self.code).itemsize
+        self.lhs = list(patterns)
+        self.bodies = [[self.encode(b) for b in patterns[lhs]] for lhs in self.lhs]
+        self.ac = AhoCorasick(self.lhs)
+        # si ningún LHS tiene terminales, los terminales ya generados no cambian nunca
+        self.frozen_terminals = not any(not self.is_nt[s] for lhs in self.lhs for s in lhs)
+        on_rhs = {s for bodies in patterns.values() for b in bodies for s in b}
+        self.noncontracting = all(
+            len(b) >= len(lhs) or (not b and lhs == self.start and not set(self.start) & on_rhs)
+            for lhs, bodies in patterns.items() for b in bodies)
+        self._nt_bytes = bytes(i for i in range(min(n, 256)) if self.is_nt[i])
+
+    def encode(self, seq: Sequence[int]) -> bytes:
+        return array(self.code, seq).tobytes()
+
+    def decode(self, form: bytes) -> Sequence[int]:
+        return form if self.width == 1 else memoryview(form).cast(self.code)
+
+    def text(self, form: bytes) -> str:
+        return "".join(self.symbols[s] for s in self.decode(form)) or EPSILON
+
+    def is_terminal(self, form: bytes) -> bool:
+        if self.width == 1:
+            return len(form.translate(None, self._nt_bytes)) == len(form)
+        return not any(self.is_nt[s] for s in self.decode(form))
+
+    def successors(self, form: bytes) -> Iterator[bytes]:
+        w = self.width
+        for i, p, n in self.ac.matches(self.decode(form)):
+            head, tail = form[:i * w], form[(i + n) * w:]
+            for body in self.bodies[p]:
+                yield head + body + tail
+
+    def _search(self, max_len: int, target: Optional[str], max_steps: int, max_seconds: Optional[float],
+                max_memory_mb: Optional[float], max_form_len: Optional[int]) -> DerivationSearch:
+        if max_form_len is None:
+            # sin reglas contráctiles ninguna forma útil supera max_len; si las hay la cota es heurística
+            max_form_len = max_len if self.noncontracting else 2 * max_len + 2
+        w = self.width
+        limit = max_form_len * w
+        max_bytes = None if max_memory_mb is None else max_memory_mb * 2 ** 20
+        deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        ids = {s: i for i, s in enumerate(self.symbols) if not self.is_nt[i]}
+        goal = None
+        if target is not None:
+            if any(ch not in ids for ch in target):
+                return DerivationSearch(frozenset(), None, True, self.noncontracting, None, 0, 0)
+            goal = self.encode([ids[ch] for ch in target])
+        frozen = self.frozen_terminals
+
+        def viable(form: bytes) -> bool:
+            if len(form) > limit:
+                return False
+            if not frozen:
+                return True
+            seq = self.decode(form)
+            terms = [s for s in seq if not self.is_nt[s]]
+            if len(terms) > max_len:
+                return False
+            if goal is None:
+                return True
+            # con terminales fijos, el prefijo y el sufijo terminales deben coincidir con la palabra
+            gseq = self.decode(goal)
+            if len(terms) > len(gseq):
+                return False
+            k = 0
+            while k < len(seq) and not self.is_nt[seq[k]]:
+                if seq[k] != gseq[k]:
+                    return False
+                k += 1
+            if k == len(seq):
+                return True
+            k = 0
+            while not self.is_nt[seq[-1 - k]]:
+                if seq[-1 - k] != gseq[-1 - k]:
+                    return False
+                k += 1
+            return True
+
+        start = self.encode(self.start)
+        parent: Dict[bytes, Optional[bytes]] = {start: None}
+        used = len(start) + _FORM_OVERHEAD
+        queue = deque([start])
+        found: List[str] = []
+        steps, stopped, hit = 0, None, None
+        while queue:
+            form = queue.popleft()
+            if self.is_terminal(form):
+                if len(form) <= max_len * w:
+                    found.append("".join(self.symbols[s] for s in self.decode(form)))
+                    if form == goal:
+                        hit = form
+                        break
+                continue
+            if steps >= max_steps:
+                stopped = "pasos"
+                break
+            if deadline is not None and not steps & 1023 and time.perf_counter() > deadline:
+                stopped = "tiempo"
+                break
+            steps += 1
+            for nxt in self.successors(form):
+                if nxt in parent or not viable(nxt):
+                    continue
+                parent[nxt] = form if goal is not None else None
+                used += len(nxt) + _FORM_OVERHEAD
+                queue.append(nxt)
+            if max_bytes is not None and used > max_bytes:
+                stopped = "memoria"
+                break
+        derivation = None
+        node = hit
+        while node is not None:
+            derivation = (self.text(node),) + (derivation or ())
+            node = parent[node]
+        complete = stopped is None and hit is None
+        return DerivationSearch(frozenset(found), derivation, complete, complete and self.noncontracting,
+                                stopped, steps, len(parent))
+
+    def search(self, max_len: int, max_steps: int = 100_000, max_seconds: Optional[float] = None,
+               max_memory_mb: Optional[float] = None, max_form_len: Optional[int] = None) -> DerivationSearch:
+        """Cadenas terminales de longitud ≤ max_len por BFS desde el símbolo inicial.
+        Se descartan las formas con más de max_form_len símbolos (por defecto max_len si
+        la gramática no es contráctil, y entonces el resultado completo es exacto)."""
+        return self._search(max_len, None, max_steps, max_seconds, max_memory_mb, max_form_len)
+
+    def find_derivation(self, word: str, max_steps: int = 100_000, max_seconds: Optional[float] = None,
+                        max_memory_mb: Optional[float] = None,
+                        max_form_len: Optional[int] = None) -> DerivationSearch:
+        """Derivación más corta de `word` (formas sentenciales en orden) en .derivation,
+        o None si no se halló dentro de los presupuestos; ver complete/exact."""
+        return self._search(len(word), word, max_steps, max_seconds, max_memory_mb, max_form_len)
@@ -0,0 +1,184 @@
+import random
+from dataclasses import dataclass
+from operator import mul
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+from .grammar_parser import Grammar
+from .cnf import CNFGrammar, to_cnf
+from .earley import EarleyParser
+
+class CFGSampler:
+    """Muestreo uniforme de cadenas de longitud fija de una gramática libre de contexto.
+
+    Sobre la FNC se cuenta una vez N[A][k] = número de árboles de derivación de A con
+    k hojas (enteros grandes, O(n²·|P|)); luego cada muestra baja desde el inicial
+    eligiendo producción y punto de corte con probabilidad proporcional a los conteos.
+    Los cortes se prueban en orden bustrofedón (1, k-1, 2, k-2, ...), así que una
+    muestra cuesta O(n log n) esperado. Es uniforme sobre los árboles de la FNC: sobre
+    las cadenas lo es exactamente si la FNC no es ambigua.
+    """
+    def __init__(self, grammar: Grammar = None, cnf: Optional[CNFGrammar] = None):
+        if cnf is None:
+            if grammar is None:
+                raise ValueError("Se necesita una gramática o su FNC")
+            cnf = to_cnf(grammar)
+        self.cnf = cnf
+        self.unary: Dict[int, List[str]] = {A: [] for A in cnf.nonterminals}
+        self.binary: Dict[int, List[Tuple[int, int]]] = {A: [] for A in cnf.nonterminals}
+        # índices inversos para tree_count: terminal -> A con A -> a, B -> (A, C) con A -> B C
+        self.by_char: Dict[str, List[int]] = {}
+        self.by_left: Dict[int, List[Tuple[int, int]]] = {}
+        for A, a in cnf.unary:
+            self.unary[A].append(cnf.symbols[a])
+            self.by_char.setdefault(cnf.symbols[a], []).append(A)
+        for A, B, C in cnf.binary:
+            self.binary[A].append((B, C))
+            self.by_left.setdefault(B, []).append((A, C))
+        self.N: Dict[int, List[int]] = {A: [0] for A in cnf.nonterminals}  # N[A][0] = 0 en FNC
+
+    def _extend(self, n: int) -> None:
+        N = self.N
+        for k in range(len(N[self.cnf.start]), n + 1):
+            for A in N:
+                if k == 1:
+                    total = len(self.unary[A])
+                else:
+                    total = 0
+                    for B, C in self.binary[A]:
+                        NB, NC = N[B], N[C]
+                        total += sum(map(mul, NB[1:k], NC[k - 1:0:-1]))
+                N[A].append(total)
+
+    def count(self, k: int) -> int:
+        """Árboles de derivación (= cadenas si no hay ambigüedad) de longitud k."""
+        if k == 0:
+            return int(self.cnf.accepts_empty)
+        self._extend(k)
+        return self.N[self.cnf.start][k]
+
+    def _choose(self, A: int, k: int, r: int) -> Tuple[int, int, int]:
+        """Producción A -> B C y corte j para el índice r en [0, N[A][k])."""
+        N = self.N
+        for B, C in self.binary[A]:
+            NB, NC = N[B], N[C]
+            lo, hi = 1, k - 1
+            while lo <= hi:
+                for j in ((lo, hi) if lo != hi else (lo,)):
+                    c = NB[j] * NC[k - j]
+                    if r < c:
+                        return B, C, j
+                    r -= c
+                lo, hi = lo + 1, hi - 1
+        raise ValueError("Índice fuera de rango")
+
+    def sample(self, k: int, rng: Optional[random.Random] = None) -> Optional[str]:
+        """Una cadena de longitud k al azar, o None si no hay ninguna."""
+        rng = rng or random
+        total = self.count(k)
+        if not total:
+            return None
+        if k == 0:
+            return ""
+        N, out = self.N, []
+        stack = [(self.cnf.start, k)]
+        while stack:
+            A, k = stack.pop()
+            if k == 1:
+                out.append(rng.choice(self.unary[A]))
+                continue
+            B, C, j = self._choose(A, k, rng.randrange(N[A][k]))
+            stack.append((C, k - j))
+            stack.append((B, j))
+        return "".join(out)
+
+    def tree_count(self, word: str) -> int:
+        """Árboles de derivación de la FNC para `word` (CYK contando, O(n³·|P|))."""
+        n = len(word)
+        if n == 0:
+            return int(self.cnf.accepts_empty)
+        by_char, by_left = self.by_char, self.by_left
+        T: List[List[Dict[int, int]]] = [[{A: 1 for A in by_char.get(ch, ())} for ch in word]]
+        for l in range(2, n + 1):
+            row = []
+            for i in range(n - l + 1):
+                cell: Dict[int, int] = {}
+                for m in range(1, l):
+                    left, right = T[m - 1][i], T[l - m - 1][i + m]
+                    if not (left and right):
+                        continue
+                    for B, nb in left.items():
+                        for A, C in by_left.get(B, ()):
+                            nc = right.get(C)
+                            if nc:
+                                cell[A] = cell.get(A, 0) + nb * nc
+                row.append(cell)
+            T.append(row)
+        return T[n - 1][0].get(self.cnf.start, 0)
+
+    def sample_up_to(self, n: int, rng: Optional[random.Random] = None,
+                     unbiased: bool = False, max_tries: int = 1000) -> Optional[str]:
+        """Cadena al azar entre todas las de longitud ≤ n (la longitud se elige según
+        los conteos), o None si no hay ninguna. Con unbiased=True cada muestra w se
+        acepta con probabilidad 1/árboles(w), lo que da cadenas uniformes aunque la
+        gramática sea ambigua; ValueError si tras max_tries intentos no se aceptó ninguna."""
+        rng = rng or random
+        counts = [self.count(k) for k in range(n + 1)]
+        total = sum(counts)
+        if not total:
+            return None
+        for _ in range(max_tries):
+            r = rng.randrange(total)
+            k = 0
+            while r >= counts[k]:
+                r -= counts[k]
+                k += 1
+            w = self.sample(k, rng)
+            if not unbiased or rng.randrange(self.tree_count(w)) == 0:
+                return w
+        raise ValueError("La gramática es demasiado ambigua para muestrear sin sesgo")
+
+def _wilson(hits: int, n: int, z: float) -> Tuple[float, float]:
+    p = hits / n
+    den = 1 + z * z / n
+    mid = (p + z * z / (2 * n)) / den
+    half = z * ((p * (1 - p) / n + z * z / (4 * n * n)) ** 0.5) / den
+    return max(0.0, mid - half), min(1.0, mid + half)
+
+def _jaccard(p1: float, p2: float) -> float:
+    # con p1 = |I|/|L1| y p2 = |I|/|L2|: |I|/|L1 ∪ L2| = p1·p2 / (p1 + p2 - p1·p2)
+    return p1 * p2 / (p1 + p2 - p1 * p2) if p1 and p2 else 0.0
+
+@dataclass(frozen=True)
+class JaccardEstimate:
+    estimate: float
+    low: float
+    high: float
+    samples: int      # muestras por gramática
+    confidence: float
+
+def estimate_jaccard(g1: Grammar, g2: Grammar, max_len: int, samples: int = 400,
+                     confidence: float = 0.95, rng: Optional[random.Random] = None) -> JaccardEstimate:
+    """Estima |L1∩L2| / |L1∪L2| sobre las cadenas de longitud ≤ max_len sin enumerarlas.
+
+    Se muestrean cadenas uniformes de L1 y se prueba cuáles están en L2 (Earley), y al
+    revés; las dos proporciones dan la similitud. Cada proporción lleva un intervalo de
+    Wilson a nivel 1 - α/2 y, como la similitud crece con ambas, sus extremos dan un
+    intervalo conjunto de nivel ≥ 1 - α. Las muestras son uniformes sobre las cadenas
+    aunque la gramática sea ambigua (rechazo con CYK, O(n³) por muestra, ver
+    CFGSampler.sample_up_to); ValueError si es demasiado ambigua para ello.
+    """
+    rng = rng or random.Random()
+    s1, s2 = CFGSampler(g1), CFGSampler(g2)
+    e1 = not any(s1.count(k) for k in range(max_len + 1))
+    e2 = not any(s2.count(k) for k in range(max_len + 1))
+    if e1 or e2:
+        j = 1.0 if e1 and e2 else 0.0
+        return JaccardEstimate(j, j, j, 0, confidence)
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 4)
+    p1, p2 = EarleyParser(g1), EarleyParser(g2)
+    hits1 = sum(p2.recognize(s1.sample_up_to(max_len, rng, unbiased=True)) for _ in range(samples))
+    hits2 = sum(p1.recognize(s2.sample_up_to(max_len, rng, unbiased=True)) for _ in range(samples))
+    lo1, hi1 = _wilson(hits1, samples, z)
+    lo2, hi2 = _wilson(hits2, samples, z)
+    return JaccardEstimate(_jaccard(hits1 / samples, hits2 / samples), _jaccard(lo1, lo2),
+                           _jaccard(hi1, hi2), samples, confidence)
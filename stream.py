@@ -0,0 +1,94 @@
+import json, sys, threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, IO, Optional
+from .grammar_parser import parse_grammar
+from .classifier import classify_grammar
+from .automata_parser import parse_automaton, classify_automaton_type
+from .regex_automata import nfa_from_regex, dfa_from_nfa, regular_grammar_from_dfa
+
+def handle_request(req: Dict) -> Dict:
+    """Atiende una petición {"grammar": ...} | {"automaton": ...} | {"regex": ...}."""
+    out: Dict = {"id": req.get("id")}
+    try:
+        if "grammar" in req:
+            t, steps = classify_grammar(parse_grammar(req["grammar"]))
+            out.update(kind="grammar", type=t, steps=steps)
+        elif "automaton" in req:
+            a = req["automaton"]
+            a_type, _ = parse_automaton(a if isinstance(a, str) else json.dumps(a))
+            out.update(kind="automaton", automaton_type=a_type, type=classify_automaton_type(a_type))
+        elif "regex" in req:
+            start, prods = regular_grammar_from_dfa(dfa_from_nfa(nfa_from_regex(req["regex"])))
+            by_lhs: Dict[str, list] = {}
+            for lhs, rhs in prods:
+                by_lhs.setdefault(lhs, []).append(rhs)
+            out.update(kind="regex", start=start,
+                       grammar="\n".join(f"{lhs} -> " + " | ".join(rhss) for lhs, rhss in by_lhs.items()))
+        else:
+            out["error"] = "Petición sin campo 'grammar', 'automaton' ni 'regex'"
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+    return out
+
+def run_stream(inp: IO[str] = None, out: IO[str] = None, workers: int = 0, max_inflight: int = 64) -> int:
+    """Lee NDJSON de `inp` y escribe un resultado NDJSON por línea en `out`.
+
+    Con workers=0 todo corre en línea y en orden. Con workers>0 las peticiones van a
+    un pool de procesos; cada resultado se escribe (y se hace flush) apenas termina, y
+    un semáforo limita las peticiones en vuelo a `max_inflight` para que la memoria no
+    crezca con una entrada infinita. Devuelve el número de líneas procesadas.
+    """
+    inp = inp or sys.stdin
+    out = out or sys.stdout
+    lock = threading.Lock()
+
+    def emit(res: Dict) -> None:
+        line = json.dumps(res, ensure_ascii=False)
+        with lock:
+            out.write(line + "\n")
+            out.flush()
+
+    def parse_line(n: int, line: str) -> Optional[Dict]:
+        try:
+            req = json.loads(line)
+            if not isinstance(req, dict):
+                raise ValueError("se esperaba un objeto JSON")
+        except ValueError as e:
+            emit({"id": n, "error": f"JSON inválido: {e}"})
+            return None
+        req.setdefault("id", n)
+        return req
+
+    n = 0
+    if workers <= 0:
+        for line in inp:
+            if not line.strip():
+                continue
+            n += 1
+            req = parse_line(n, line)
+            if req is not None:
+                emit(handle_request(req))
+        return n
+
+    slots = threading.BoundedSemaphore(max(1, max_inflight))
+
+    def done(fut, req_id):
+        try:
+            emit(fut.result())
+        except Exception as e:
+            emit({"id": req_id, "error": f"{type(e).__name__}: {e}"})
+        finally:
+            slots.release()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for line in inp:
+            if not line.strip():
+                continue
+            n += 1
+            req = parse_line(n, line)
+            if req is None:
+                continue
+            slots.acquire()
+            fut = pool.submit(handle_request, req)
+            fut.add_done_callback(lambda f, rid=req["id"]: done(f, rid))
+    return n
@@ -1,4 +1,5 @@
-from typing import List, Tuple, Set, Dict
+import os, tempfile
+from typing import List, Tuple, Set, Dict, Union
 
 EPSILON = "ε"
 
@@ -108,3 +109,19 @@ def strip_comments(text: str) -> str:
             cut = min(cut, idx2)
         lines.append(ln[:cut])
     return "\n".join(lines)
+
+def write_atomic(path: str, data: Union[str, bytes]) -> None:
+    """Escribe path de golpe (temporal + os.replace). Pensado para cachés en disco: si
+    falla, no pasa nada y se sigue con lo que hay en memoria."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        if isinstance(data, bytes):
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+        os.replace(tmp, path)  # atómico: otro proceso nunca ve un archivo a medias
+    except OSError:
+        pass
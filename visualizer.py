@@ -4,7 +4,7 @@ try:
 except Exception:
     Digraph = None
 
-from .grammar_parser import Grammar, productions_expanded, rhs_tokens
+from .grammar_parser import Grammar
 from .automata_parser import DFA as DFAStruct
 
 def render_grammar(g: Grammar, path: str) -> Optional[str]:
@@ -12,11 +12,13 @@ def render_grammar(g: Grammar, path: str) -> Optional[str]:
         return None
     dot = Digraph(comment="Grammar", format="png")
     dot.attr(rankdir='LR')
+    c = g.compiled
     for nt in g.nonterminals:
         dot.node(nt, shape="circle")
-    for lhs, alts in productions_expanded(g):
-        for alt in alts:
-            toks = rhs_tokens(alt)
+    for rule in c.rules:
+        lhs = rule.lhs
+        for toks in rule.alts:
+            toks = [c.symbols[t] for t in toks]
             if len(toks) == 1 and toks[0] == 'ε':
                 dot.node(f"{lhs}_end", label="ε", shape="doublecircle")
                 dot.edge(lhs, f"{lhs}_end", label="ε")